@@ -1,195 +1,674 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-import os
-from main import process_cv
-from db import init_db
-from models import Candidate, SessionLocal
-
-app = FastAPI(title="CV Processor API", version="1.0.0")
-
-# Servir archivos estáticos
-app.mount("/static", StaticFiles(directory="static"), name="static")
-
-# Servir el index.html en la raíz
-@app.get("/")
-def read_index():
-    return FileResponse("index.html")
-
-@app.get("/api")
-def read_root():
-    return {"message": "CV Processor API"}
-
-@app.post("/process-cvs")
-def process_all_cvs(role: str = None):
-    """
-    Procesa todos los CVs en la carpeta 'cvs'
-    """
-    try:
-        # Inicializar base de datos antes de procesar
-        init_db()
-        
-        folder = "cvs"
-        if not os.path.exists(folder):
-            return {"error": f"La carpeta '{folder}' no existe"}
-        
-        pdf_files = [f for f in os.listdir(folder) if f.endswith(".pdf")]
-        
-        if not pdf_files:
-            return {"message": "No se encontraron archivos PDF en la carpeta 'cvs'"}
-        
-        processed_files = []
-        for file in pdf_files:
-            file_path = os.path.join(folder, file)
-            process_cv(file_path, role if role else None)
-            processed_files.append(file)
-        
-        return {
-            "message": f"Procesados {len(processed_files)} archivos CV",
-            "files": processed_files,
-            "role": role if role else "detección automática"
-        }
-        
-    except Exception as e:
-        return {"error": str(e)}
-
-@app.get("/candidates")
-def get_candidates():
-    """
-    Obtiene todos los candidatos de la base de datos
-    """
-    try:
-        session = SessionLocal()
-        candidates = session.query(Candidate).all()
-        
-        candidates_data = []
-        for candidate in candidates:
-            candidates_data.append({
-                "id": candidate.id,
-                "nombre": candidate.nombre,
-                "email": candidate.email,
-                "perfil": candidate.perfil,
-                "skills": candidate.skills,
-                "seniority": candidate.seniority,
-                "area_profesional": candidate.area_profesional,
-                "match": candidate.match
-            })
-        
-        session.close()
-        return {"candidates": candidates_data}
-        
-    except Exception as e:
-        return {"error": str(e)}
-
-@app.get("/pdf-files")
-def get_pdf_files():
-    """
-    Lista todos los archivos PDF en la carpeta 'cvs'
-    """
-    try:
-        folder = "cvs"
-        if not os.path.exists(folder):
-            os.makedirs(folder)
-            return {"files": []}
-        
-        pdf_files = [f for f in os.listdir(folder) if f.endswith(".pdf")]
-        
-        # Obtener información adicional de cada archivo
-        files_info = []
-        for file in pdf_files:
-            file_path = os.path.join(folder, file)
-            file_size = os.path.getsize(file_path)
-            files_info.append({
-                "name": file,
-                "size": file_size,
-                "size_mb": round(file_size / 1024 / 1024, 2)
-            })
-        
-        return {"files": files_info}
-        
-    except Exception as e:
-        return {"error": str(e)}
-
-@app.delete("/pdf-files/{filename}")
-def delete_pdf_file(filename: str):
-    """
-    Elimina un archivo PDF específico de la carpeta 'cvs'
-    """
-    try:
-        folder = "cvs"
-        file_path = os.path.join(folder, filename)
-        
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="Archivo no encontrado")
-        
-        if not filename.endswith(".pdf"):
-            raise HTTPException(status_code=400, detail="Solo se pueden eliminar archivos PDF")
-        
-        os.remove(file_path)
-        return {"message": f"Archivo {filename} eliminado correctamente"}
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        return {"error": str(e)}
-
-@app.post("/pdf-files")
-async def upload_pdf_file(file: UploadFile = File(...)):
-    """
-    Sube un archivo PDF a la carpeta 'cvs'
-    """
-    try:
-        if not file.filename.endswith(".pdf"):
-            raise HTTPException(status_code=400, detail="Solo se permiten archivos PDF")
-        
-        folder = "cvs"
-        if not os.path.exists(folder):
-            os.makedirs(folder)
-        
-        file_path = os.path.join(folder, file.filename)
-        
-        # Verificar si el archivo ya existe
-        if os.path.exists(file_path):
-            raise HTTPException(status_code=409, detail="El archivo ya existe")
-        
-        # Guardar el archivo
-        contents = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(contents)
-        
-        return {
-            "message": f"Archivo {file.filename} subido correctamente",
-            "filename": file.filename,
-            "size": len(contents)
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        return {"error": str(e)}
-
-@app.delete("/database")
-def clear_database():
-    """
-    Limpia todos los registros de la base de datos candidates
-    """
-    try:
-        session = SessionLocal()
-        
-        # Contar registros antes de eliminar
-        count_before = session.query(Candidate).count()
-        
-        # Eliminar todos los registros
-        session.query(Candidate).delete()
-        session.commit()
-        
-        session.close()
-        
-        return {"message": f"Base de datos limpiada correctamente. Se eliminaron {count_before} registros."}
-        
-    except Exception as e:
-        return {"error": str(e)}
-
-if __name__ == "__main__":
-    import uvicorn
+from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi.staticfiles import StaticFiles
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+import os
+import json
+import tempfile
+import base64
+import hashlib
+import threading
+import time
+from sqlalchemy import and_, or_, func
+from db import init_db
+from jobs import job_manager
+from events import event_bus
+from metrics import METRICS_ENABLED, MetricsMiddleware, registry
+from models import DB_PATH, Candidate, SessionLocal
+from llm_cache import llm_cache
+from text_cache import text_cache
+from search import search_candidates
+from skills import skill_facets, candidates_with_skills
+from ranking import ranking_index, rank_candidates
+from embeddings import vector_store, load_candidates
+from documents import load_document
+from uploads import UploadError, save_pdf, save_uploads, clean_partial_uploads
+from file_index import SORT_KEYS, file_index
+from watcher import WATCH_ENABLED, WATCH_ROLE, FolderWatcher
+from reports import REPORT_FORMATS, iter_candidate_rows, stream_csv, stream_jsonl, export_pdf, iter_file
+
+app = FastAPI(title="CV Processor API", version="1.0.0")
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Servir archivos estáticos
+app.mount("/static", StaticFiles(directory="static"), name="static")
+
+# Vigilante de cvs/: encola los PDFs nuevos o modificados (CV_WATCH=1)
+folder_watcher = FolderWatcher(lambda paths: job_manager.submit(paths, WATCH_ROLE))
+
+# Servir el index.html en la raíz
+@app.get("/")
+def read_index():
+    return FileResponse("index.html")
+
+@app.get("/api")
+def read_root():
+    return {"message": "CV Processor API"}
+
+@app.on_event("startup")
+def resume_pending_jobs():
+    # Crear tablas (incluidas las de jobs) y retomar los lotes interrumpidos
+    init_db()
+    clean_partial_uploads()
+    job_manager.resume()
+    # Cargar o actualizar el índice de ranking y los embeddings sin retrasar el arranque
+    threading.Thread(target=ranking_index.refresh, name="cv-rank-index", daemon=True).start()
+    threading.Thread(target=vector_store.sync, name="cv-embeddings", daemon=True).start()
+    threading.Thread(target=file_index.refresh, name="cv-file-index-scan", daemon=True).start()
+    if WATCH_ENABLED:
+        folder_watcher.start()
+
+@app.on_event("shutdown")
+def save_indexes():
+    # Cambios del índice de ranking que aún esperan su guardado diferido
+    ranking_index.save()
+
+@app.post("/process-cvs")
+def process_all_cvs(role: str = None, use_cache: bool = True):
+    """
+    Encola todos los CVs de la carpeta 'cvs' en un job en segundo plano
+    """
+    try:
+        folder = "cvs"
+        if not os.path.exists(folder):
+            return {"error": f"La carpeta '{folder}' no existe"}
+        
+        pdf_files = [f for f in os.listdir(folder) if f.endswith(".pdf")]
+        
+        if not pdf_files:
+            return {"message": "No se encontraron archivos PDF en la carpeta 'cvs'"}
+        
+        paths = [os.path.join(folder, file) for file in pdf_files]
+        job_id = job_manager.submit(paths, role if role else None, use_cache=use_cache)
+        folder_watcher.claim(paths)
+        
+        return {
+            "message": f"Encolados {len(pdf_files)} archivos CV",
+            "job_id": job_id,
+            "files": pdf_files,
+            "role": role if role else "detección automática"
+        }
+        
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    """
+    Aciertos, fallos y tamaño de la caché de respuestas del LLM; en
+    "text_cache", entradas y tamaño de la caché de texto extraído
+    """
+    try:
+        return {**llm_cache.stats(), "text_cache": text_cache.stats()}
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/metrics")
+def get_metrics(format: str = "prometheus"):
+    """
+    Métricas del proceso en formato Prometheus (o resumen JSON con format=json):
+    histogramas de extracción, análisis, tokens, guardado y endpoints, colas
+    del pipeline, jobs pendientes y aciertos de la caché del LLM.
+    """
+    if format == "json":
+        return registry.summary()
+    return PlainTextResponse(registry.prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/watch")
+def get_watch_status():
+    """
+    Estado del vigilante de la carpeta 'cvs' (modo inotify o sondeo, archivos
+    pendientes de terminar de escribirse y encolados)
+    """
+    try:
+        return dict(folder_watcher.stats(), enabled=WATCH_ENABLED)
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/jobs")
+def get_jobs(limit: int = 50):
+    """
+    Lista los jobs de procesamiento más recientes
+    """
+    try:
+        return {"jobs": job_manager.list_jobs(limit)}
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """
+    Estado de un job: progreso por archivo, tiempos y throughput
+    """
+    job = job_manager.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job no encontrado")
+    return job
+
+@app.get("/events")
+async def get_events(last_event_id: str = Header(None), since: int = None):
+    """
+    Progreso del procesamiento en tiempo real (Server-Sent Events): eventos
+    job, file (estado de cada archivo), candidate (candidato recién guardado),
+    cleared y reset. Al reconectar, EventSource envía Last-Event-ID y se
+    reenvían los eventos perdidos que sigan en el buffer.
+    """
+    last_id = since
+    if last_event_id and last_event_id.isdigit():
+        last_id = int(last_event_id)
+    return StreamingResponse(
+        event_bus.stream(last_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+CANDIDATE_FIELDS = {
+    "id": Candidate.id,
+    "nombre": Candidate.nombre,
+    "email": Candidate.email,
+    "perfil": Candidate.perfil,
+    "skills": Candidate.skills,
+    "experiencia": Candidate.experiencia,
+    "seniority": Candidate.seniority,
+    "area_profesional": Candidate.area_profesional,
+    "match": Candidate.match
+}
+DEFAULT_FIELDS = ["id", "nombre", "email", "perfil", "skills", "seniority", "area_profesional", "match"]
+MAX_PAGE_SIZE = 500
+
+_candidates_version = {"files": None, "at": 0.0, "value": None}
+
+def db_files_state():
+    """Tamaño y fecha de la base de datos y su WAL: cambian con cada escritura,
+    también las de otros procesos (main.py, watcher.py)"""
+    state = []
+    for path in (DB_PATH, DB_PATH + "-wal"):
+        try:
+            st = os.stat(path)
+            state.append((st.st_size, st.st_mtime_ns))
+        except OSError:
+            state.append(None)
+    return tuple(state)
+
+def candidates_version(session):
+    """(total, id máximo, suma de match) de la tabla candidates. Los candidatos
+    solo se insertan o se borran todos a la vez; la suma distingue una tabla
+    vaciada y vuelta a llenar con los mismos ids. Contar recorre un índice, así
+    que se reutiliza mientras la base de datos no cambie (como mucho 5 s)"""
+    files = db_files_state()
+    cached = _candidates_version
+    if cached["files"] == files and time.monotonic() - cached["at"] < 5:
+        return cached["value"]
+    count, last_id, total_match = session.query(
+        func.count(Candidate.id), func.max(Candidate.id), func.total(Candidate.match)).one()
+    value = (count, last_id or 0, round(total_match, 3))
+    _candidates_version.update(files=files, at=time.monotonic(), value=value)
+    return value
+
+def make_etag(*parts):
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+def etag_matches(if_none_match, etag):
+    return bool(if_none_match) and etag in [tag.strip() for tag in if_none_match.split(",")]
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+@app.get("/candidates")
+def get_candidates(
+    limit: int = 50,
+    cursor: str = None,
+    area: str = None,
+    seniority: str = None,
+    min_match: float = None,
+    max_match: float = None,
+    sort: str = "match",
+    order: str = "desc",
+    fields: str = None,
+    since: int = None,
+    if_none_match: str = Header(None)
+):
+    """
+    Obtiene candidatos página a página (paginación por cursor).
+    Filtros: area, seniority, min_match, max_match. Orden: sort=match|id,
+    order=asc|desc. fields limita las columnas devueltas. since=<id> devuelve
+    solo los candidatos guardados después (max_id de una respuesta anterior).
+    Lleva ETag: con If-None-Match y sin cambios en la tabla responde 304.
+    """
+    if sort not in ("match", "id") or order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="Orden no válido")
+    selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else DEFAULT_FIELDS
+    unknown = [f for f in selected if f not in CANDIDATE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Campos no válidos: {', '.join(unknown)}")
+    if "id" not in selected:
+        selected = ["id"] + selected
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    last = decode_cursor(cursor) if cursor is not None else None
+    if last is not None and len(last) != (2 if sort == "match" else 1):
+        raise HTTPException(status_code=400, detail="El cursor no corresponde a este orden")
+
+    try:
+        session = SessionLocal()
+        count, max_id, total_match = candidates_version(session)
+        params = [limit, cursor, area, seniority, min_match, max_match, sort, order, ",".join(selected), since]
+        etag = make_etag(count, max_id, total_match, hashlib.sha1(json.dumps(params).encode("utf-8")).hexdigest()[:16])
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, etag):
+            session.close()
+            return Response(status_code=304, headers=headers)
+
+        columns = [CANDIDATE_FIELDS[f] for f in selected]
+        if sort == "match" and "match" not in selected:
+            columns.append(Candidate.match)
+        query = session.query(*columns)
+
+        filters = []
+        if area:
+            filters.append(Candidate.area_profesional == area)
+        if seniority:
+            filters.append(Candidate.seniority == seniority)
+        if min_match is not None:
+            filters.append(Candidate.match >= min_match)
+        if max_match is not None:
+            filters.append(Candidate.match <= max_match)
+        if since is not None:
+            filters.append(Candidate.id > since)
+        query = query.filter(*filters)
+        total = query.order_by(None).count() if cursor is None else None
+
+        # Orden estable por (match, id) y continuación desde el último elemento visto
+        descending = order == "desc"
+        if last is not None:
+            if sort == "match":
+                last_match, last_id = last
+                if descending:
+                    query = query.filter(or_(Candidate.match < last_match,
+                                             and_(Candidate.match == last_match, Candidate.id < last_id)))
+                else:
+                    query = query.filter(or_(Candidate.match > last_match,
+                                             and_(Candidate.match == last_match, Candidate.id > last_id)))
+            else:
+                last_id = last[0]
+                query = query.filter(Candidate.id < last_id if descending else Candidate.id > last_id)
+
+        if sort == "match":
+            ordering = [Candidate.match.desc(), Candidate.id.desc()] if descending else [Candidate.match, Candidate.id]
+        else:
+            ordering = [Candidate.id.desc()] if descending else [Candidate.id]
+        rows = query.order_by(*ordering).limit(limit + 1).all()
+        session.close()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        candidates_data = [{field: row[i] for i, field in enumerate(selected)} for row in rows]
+
+        next_cursor = None
+        if has_more and rows:
+            last_row = rows[-1]
+            if sort == "match":
+                next_cursor = encode_cursor([last_row._mapping["match"], last_row._mapping["id"]])
+            else:
+                next_cursor = encode_cursor([last_row._mapping["id"]])
+
+        result = {"candidates": candidates_data, "next_cursor": next_cursor, "limit": limit, "max_id": max_id}
+        if total is not None:
+            result["total"] = total
+        return JSONResponse(result, headers=headers)
+        
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/candidates/search")
+def search_candidates_endpoint(q: str, limit: int = 20, offset: int = 0):
+    """
+    Búsqueda de texto completo en skills, perfil, experiencia y texto del CV.
+    Admite la sintaxis de FTS5: python AND docker, "machine learning", react OR vue
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="La consulta está vacía")
+    limit = max(1, min(limit, 100))
+    offset = max(0, offset)
+    try:
+        total, results = search_candidates(q, limit, offset)
+        return {
+            "query": q,
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "next_offset": offset + limit if offset + limit < total else None,
+            "candidates": results
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/candidates/rank")
+def rank_candidates_endpoint(role: str, limit: int = 50, offset: int = 0):
+    """
+    Reordena los candidatos para un rol con un modelo BM25 local sobre skills,
+    perfil, experiencia y texto del CV (más perfiles de habilidades por rol),
+    sin volver a extraer los PDFs ni llamar al LLM
+    """
+    if not role.strip():
+        raise HTTPException(status_code=400, detail="Indica un rol")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    offset = max(0, offset)
+    try:
+        start = time.time()
+        total, results, profiles = rank_candidates(role, limit, offset)
+        return {
+            "role": role,
+            "profiles": profiles,
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "next_offset": offset + limit if offset + limit < total else None,
+            "seconds": round(time.time() - start, 4),
+            "candidates": results
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/candidates/semantic")
+def semantic_candidates(q: str, limit: int = 10):
+    """
+    Búsqueda por significado: candidatos cuyo embedding es más parecido al texto
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="La consulta está vacía")
+    limit = max(1, min(limit, 100))
+    try:
+        return {
+            "query": q,
+            "model": vector_store.embedder.name,
+            "candidates": load_candidates(vector_store.semantic(q, limit))
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/candidates/{candidate_id}/similar")
+def similar_candidates(candidate_id: int, limit: int = 10):
+    """
+    Candidatos más parecidos a uno dado (similitud coseno entre embeddings)
+    """
+    limit = max(1, min(limit, 100))
+    scored = vector_store.similar(candidate_id, limit)
+    if scored is None:
+        raise HTTPException(status_code=404, detail="Candidato no encontrado o sin embedding")
+    try:
+        return {
+            "candidate_id": candidate_id,
+            "model": vector_store.embedder.name,
+            "candidates": load_candidates(scored)
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/candidates/{candidate_id}/document")
+def get_candidate_document(candidate_id: int):
+    """
+    Texto completo del CV y respuesta del LLM de un candidato (están
+    comprimidos en candidate_documents y solo se leen al pedirlos)
+    """
+    try:
+        document = load_document(candidate_id)
+    except Exception as e:
+        return {"error": str(e)}
+    if document is None:
+        raise HTTPException(status_code=404, detail="Candidato no encontrado o sin texto guardado")
+    return {"candidate_id": candidate_id, "chars": len(document["cv_text"]), **document}
+
+@app.get("/candidates/{candidate_id}")
+def get_candidate(candidate_id: int):
+    """
+    Todos los datos de un candidato (sin el texto del CV), para la vista de
+    detalle; la lista de /candidates solo trae las columnas de las tarjetas
+    """
+    try:
+        session = SessionLocal()
+        candidate = session.get(Candidate, candidate_id)
+        session.close()
+    except Exception as e:
+        return {"error": str(e)}
+    if candidate is None:
+        raise HTTPException(status_code=404, detail="Candidato no encontrado")
+    return {column.name: getattr(candidate, column.name) for column in Candidate.__table__.columns}
+
+@app.get("/skills")
+def get_skills(prefix: str = None, limit: int = 50):
+    """
+    Facetas de habilidades normalizadas con el número de candidatos de cada una
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    try:
+        return {"skills": skill_facets(prefix, limit)}
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/skills/candidates")
+def get_candidates_by_skills(skills: str, limit: int = 50, offset: int = 0):
+    """
+    Candidatos que tienen todas las habilidades indicadas (separadas por comas),
+    por ejemplo /skills/candidates?skills=python,docker
+    """
+    names = [name for name in skills.split(",") if name.strip()]
+    if not names:
+        raise HTTPException(status_code=400, detail="Indica al menos una habilidad")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    offset = max(0, offset)
+    try:
+        normalized, total, results = candidates_with_skills(names, limit, offset)
+        return {
+            "skills": normalized,
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "next_offset": offset + limit if offset + limit < total else None,
+            "candidates": results
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/pdf-files")
+def get_pdf_files(offset: int = 0, limit: int = 100, sort: str = "name", order: str = "asc",
+                  if_none_match: str = Header(None)):
+    """
+    Lista los archivos PDF de la carpeta 'cvs' desde el índice en memoria,
+    paginada y ordenada por name, date o size (order=asc|desc). Cada archivo
+    indica si ya está procesado (su hash está en la base de datos). Con
+    If-None-Match y la lista sin cambios responde 304 sin cuerpo.
+    """
+    if sort not in SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"Orden no válido (usa {', '.join(SORT_KEYS)})")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order debe ser asc o desc")
+    limit = max(1, min(limit, 1000))
+    offset = max(0, offset)
+    try:
+        version, total, entries = file_index.page(offset, limit, sort, order)
+        # Los archivos de la base de datos cambian con cada escritura (también de
+        # otros procesos), entre ellas las que cambian "processed": el 304 sale sin
+        # abrir una sesión
+        db_state = hashlib.sha1(repr(db_files_state()).encode("ascii")).hexdigest()[:12]
+        etag = make_etag(version, db_state, sort, order, offset, limit)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+        hashes = [entry["hash"] for entry in entries if entry["hash"]]
+        processed = set()
+        if hashes:
+            db = SessionLocal()
+            try:
+                processed = {row[0] for row in db.query(Candidate.file_hash)
+                             .filter(Candidate.file_hash.in_(hashes)).distinct()}
+            finally:
+                db.close()
+
+        files_info = [{
+            "name": entry["name"],
+            "size": entry["size"],
+            "size_mb": round(entry["size"] / 1024 / 1024, 2),
+            "modified": entry["mtime"],
+            "hash": entry["hash"],
+            "processed": entry["hash"] in processed,
+        } for entry in entries]
+        return JSONResponse({
+            "files": files_info,
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "next_offset": offset + limit if offset + limit < total else None,
+            "sort": sort,
+            "order": order,
+        }, headers=headers)
+        
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.delete("/pdf-files/{filename}")
+def delete_pdf_file(filename: str):
+    """
+    Elimina un archivo PDF específico de la carpeta 'cvs'
+    """
+    try:
+        folder = "cvs"
+        file_path = os.path.join(folder, filename)
+        
+        if not os.path.exists(file_path):
+            raise HTTPException(status_code=404, detail="Archivo no encontrado")
+        
+        if not filename.endswith(".pdf"):
+            raise HTTPException(status_code=400, detail="Solo se pueden eliminar archivos PDF")
+        
+        os.remove(file_path)
+        file_index.remove(filename)
+        return {"message": f"Archivo {filename} eliminado correctamente"}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        return {"error": str(e)}
+
+def _multipart_body(field, many=False):
+    """Formulario de la subida para /docs: los endpoints leen la petición ellos
+    mismos (uploads.receive_files) en lugar de recibir un UploadFile"""
+    schema = {"type": "string", "format": "binary"}
+    if many:
+        schema = {"type": "array", "items": schema}
+    return {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object", "required": [field], "properties": {field: schema}}}}}}
+
+@app.post("/pdf-files", openapi_extra=_multipart_body("file"))
+async def upload_pdf_file(request: Request):
+    """
+    Sube un archivo PDF a la carpeta 'cvs' (por bloques, sin cargarlo entero en
+    memoria y cortando la transferencia si supera CV_MAX_UPLOAD_MB)
+    """
+    try:
+        saved = await save_pdf(request)
+        file_index.add(saved["path"])
+        return {
+            "message": f"Archivo {saved['filename']} subido correctamente",
+            "filename": saved["filename"],
+            "size": saved["size"]
+        }
+        
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.post("/pdf-files/batch", openapi_extra=_multipart_body("files", many=True))
+async def upload_pdf_batch(request: Request, process: bool = False,
+                           role: str = None, use_cache: bool = True):
+    """
+    Sube varios PDFs y/o archivos .zip con PDFs en una sola petición.
+    Con process=true los PDFs guardados se encolan en un job de procesamiento.
+    """
+    try:
+        results = await save_uploads(request)
+        saved = [r for r in results if r["status"] == "saved"]
+        for r in saved:
+            file_index.add(r["path"])
+        response = {
+            "message": f"{len(saved)} de {len(results)} archivos guardados",
+            "saved": len(saved),
+            "files": [{k: v for k, v in r.items() if k != "path"} for r in results]
+        }
+        if process and saved:
+            response["job_id"] = job_manager.submit([r["path"] for r in saved], role if role else None,
+                                                    use_cache=use_cache)
+            folder_watcher.claim([r["path"] for r in saved])
+        return response
+        
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/reports/{format}")
+def get_report(format: str, area: str = None, seniority: str = None, min_match: float = None):
+    """
+    Descarga el informe de candidatos en formato csv, jsonl o pdf.
+    CSV y JSONL se generan mientras se envían; el PDF se maqueta por bloques
+    en un temporal que se borra al terminar la descarga.
+    """
+    if format not in REPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato no válido (usa {', '.join(REPORT_FORMATS)})")
+    filters = {"area": area, "seniority": seniority, "min_match": min_match}
+    headers = {"Content-Disposition": f'attachment; filename="analisis_cvs.{format}"'}
+    try:
+        if format == "pdf":
+            fd, path = tempfile.mkstemp(prefix="report-", suffix=".pdf")
+            os.close(fd)
+            try:
+                export_pdf(path, **filters)
+            except BaseException:
+                os.remove(path)
+                raise
+            headers["Content-Length"] = str(os.path.getsize(path))
+            body = iter_file(path, delete=True)
+        else:
+            stream = stream_csv if format == "csv" else stream_jsonl
+            body = stream(iter_candidate_rows(**filters))
+        return StreamingResponse(body, media_type=REPORT_FORMATS[format], headers=headers)
+        
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.delete("/database")
+def clear_database():
+    """
+    Limpia todos los registros de la base de datos candidates
+    """
+    try:
+        session = SessionLocal()
+        
+        # Contar registros antes de eliminar
+        count_before = session.query(Candidate).count()
+        
+        # Eliminar todos los registros
+        session.query(Candidate).delete()
+        session.commit()
+        ranking_index.invalidate()
+        vector_store.clear()
+        event_bus.publish("cleared", {"deleted": count_before})
+        
+        session.close()
+        
+        return {"message": f"Base de datos limpiada correctamente. Se eliminaron {count_before} registros."}
+        
+    except Exception as e:
+        return {"error": str(e)}
+
+if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
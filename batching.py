@@ -0,0 +1,229 @@
+import asyncio
+import os
+import threading
+import time
+
+import httpx
+
+from compaction import estimate_tokens
+from llm_cache import LLM_CACHE_ENABLED, cache_key, cached_analyze_cv, llm_cache
+from metrics import inc, observe
+from ollama_client import OllamaClient, normalize_analysis
+
+# Máximo de CVs por petición al LLM (1 = desactivado: un CV por llamada)
+BATCH_MAX = int(os.environ.get("CV_LLM_BATCH", "1"))
+# Solo se agrupan CVs cortos: tokens estimados del texto ya compactado
+BATCH_CV_TOKENS = int(os.environ.get("CV_LLM_BATCH_CV_TOKENS", "700"))
+# Tokens de CVs por petición agrupada, y contexto pedido a Ollama para que quepan
+# las instrucciones, los CVs y la respuesta (por defecto Ollama usa 2048)
+BATCH_TOKENS = int(os.environ.get("CV_LLM_BATCH_TOKENS", "2800"))
+BATCH_NUM_CTX = int(os.environ.get("CV_LLM_BATCH_CTX", "8192"))
+# CVs analizados de uno en uno antes de volver a probar lotes tras un fallo
+BATCH_PROBE = 20
+# Las respuestas agrupadas se guardan en la caché aparte de las individuales
+BATCH_PROMPT_VERSION = "batch-1"
+
+# Las instrucciones van primero y no dependen de los CVs: con keep_alive Ollama
+# reutiliza la caché KV de este prefijo entre peticiones
+BATCH_INSTRUCTIONS = """Eres un analista de selección de personal. Vas a recibir varios currículums numerados \
+("CV 1", "CV 2"...). Analiza cada uno por separado: no mezcles datos de un currículum con los de otro y no \
+inventes información que no aparezca en su texto (deja el campo vacío).
+
+{match}
+
+Responde solo con un objeto JSON con esta forma, con un elemento por currículum y en el mismo orden:
+{{"candidatos": [{{"cv": 1, "nombre": "nombre completo", "email": "correo", "perfil": "resumen breve del perfil", \
+"skills": ["habilidad"], "experiencia": "resumen de la experiencia laboral", "seniority": "Junior, Mid o Senior", \
+"area_profesional": "área", "match": 0}}]}}
+"""
+
+
+def create_batch_prompt(texts, role=None):
+    """Prompt con varios CVs: instrucciones comunes y después los CVs numerados"""
+    if role:
+        match = f'"match" es un número de 0 a 100 según lo adecuado que es el candidato para el puesto: {role}.'
+    else:
+        match = '"match" es un número de 0 a 100 según lo sólido que es el perfil en su área profesional.'
+    parts = [BATCH_INSTRUCTIONS.format(match=match), f"Hay {len(texts)} currículums.\n"]
+    parts += [f"=== CV {index} ===\n{text.strip()}\n" for index, text in enumerate(texts, start=1)]
+    parts.append("JSON:")
+    return "\n".join(parts)
+
+
+def split_batch(data, texts):
+    """Análisis de cada CV a partir de la respuesta agrupada, en el orden de
+    texts. None en los que falten, estén repetidos o traigan el correo de otro
+    CV (el modelo mezcló candidatos): esos se vuelven a analizar solos."""
+    results = [None] * len(texts)
+    items = data.get("candidatos") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return results
+    repeated = set()
+    lowered = [text.lower() for text in texts]
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(item.get("cv", position + 1)) - 1
+        except (TypeError, ValueError):
+            continue
+        if not 0 <= index < len(texts):
+            continue
+        if results[index] is not None or index in repeated:
+            repeated.add(index)
+            results[index] = None
+            continue
+        analysis = normalize_analysis(item)
+        email = str(analysis["email"]).strip().lower()
+        if email and email not in lowered[index] and any(email in other for other in lowered):
+            repeated.add(index)
+            continue
+        results[index] = analysis
+    return results
+
+
+def pack(indexes, tokens, size, budget=None):
+    """Agrupa los índices en orden en lotes de hasta size CVs y budget tokens"""
+    budget = BATCH_TOKENS if budget is None else budget
+    groups = []
+    current = []
+    used = 0
+    for index in indexes:
+        if current and (len(current) >= size or used + tokens[index] > budget):
+            groups.append(current)
+            current = []
+            used = 0
+        current.append(index)
+        used += tokens[index]
+    if current:
+        groups.append(current)
+    return groups
+
+
+class AdaptiveBatching:
+    """Tamaño de lote compartido por los workers del LLM.
+
+    Crece de uno en uno con cada respuesta agrupada que se separa bien y se
+    reduce a la mitad cuando alguna falla. En 1 se analiza CV a CV y cada
+    BATCH_PROBE CVs se vuelve a probar con lotes de 2.
+    """
+
+    def __init__(self, maximum=None, probe_every=BATCH_PROBE):
+        self.maximum = max(1, BATCH_MAX if maximum is None else maximum)
+        self.size = self.maximum
+        self.probe_every = probe_every
+        self.requests = 0
+        self.batched = 0
+        self.fallbacks = 0
+        self._singles = 0
+        self._lock = threading.Lock()
+
+    def next_size(self):
+        with self._lock:
+            if self.size == 1 and self.maximum > 1:
+                self._singles += 1
+                if self._singles > self.probe_every:
+                    self._singles = 0
+                    self.size = 2
+            return self.size
+
+    def record(self, count, parsed):
+        with self._lock:
+            self.requests += 1
+            self.batched += parsed
+            self.fallbacks += count - parsed
+            if parsed == count:
+                self.size = min(self.maximum, self.size + 1)
+            else:
+                self.size = max(1, self.size // 2)
+
+    def stats(self):
+        with self._lock:
+            return {"max": self.maximum, "size": self.size, "requests": self.requests,
+                    "batched": self.batched, "fallbacks": self.fallbacks}
+
+
+class BatchAnalyzer:
+    """Analiza varios CVs cortos en una sola petición a Ollama.
+
+    Cada worker del pipeline usa el suyo (tiene su propio event loop y
+    cliente). Los CVs largos, los que no se pudieron separar de la respuesta
+    agrupada y los lotes de uno se analizan con single(text, role, use_cache,
+    count), por defecto cached_analyze_cv, el mismo camino que sin lotes. Cada
+    CV cuenta un solo acierto o fallo en la caché del LLM, el de _cached.
+    """
+
+    def __init__(self, role=None, use_cache=True, batching=None, client=None, single=None):
+        self.role = role
+        self.use_cache = use_cache
+        self.batching = batching or AdaptiveBatching()
+        self.single = single or cached_analyze_cv
+        self._client = client or OllamaClient()
+        self._loop = None
+
+    def run(self, coro):
+        """Ejecuta la corrutina en el event loop de este analizador"""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coro)
+
+    def _cached(self, text):
+        """Respuesta guardada, individual o agrupada, para este CV y rol"""
+        if not (self.use_cache and LLM_CACHE_ENABLED):
+            return None
+        start = time.perf_counter()
+        for version in (None, BATCH_PROMPT_VERSION):
+            key = cache_key(text, self.role) if version is None else cache_key(text, self.role, version)
+            cached = llm_cache.get_json(key, count=False)
+            if cached is not None:
+                llm_cache.record(True)
+                observe("cv_analyze_seconds", time.perf_counter() - start, cache="hit")
+                return cached
+        llm_cache.record(False)
+        return None
+
+    def analyze(self, texts, tokens=None, size=None):
+        """Análisis de cada texto, en el mismo orden (mismo formato que analyze_cv)"""
+        tokens = tokens or [estimate_tokens(text) for text in texts]
+        size = size or self.batching.size
+        results = [self._cached(text) for text in texts]
+        short = [i for i, result in enumerate(results) if result is None and tokens[i] <= BATCH_CV_TOKENS]
+        for group in pack(short, tokens, size):
+            if len(group) > 1:
+                for index, analysis in zip(group, self._analyze_group([texts[i] for i in group])):
+                    results[index] = analysis
+        for index, result in enumerate(results):
+            if result is None:
+                results[index] = self.single(texts[index], self.role, use_cache=self.use_cache, count=False)
+        return results
+
+    def _analyze_group(self, texts):
+        start = time.perf_counter()
+        try:
+            data, _, _ = self.run(self._client.generate_json(
+                create_batch_prompt(texts, self.role), {"options": {"num_ctx": BATCH_NUM_CTX}}))
+            results = split_batch(data, texts)
+        except (httpx.HTTPError, ValueError, RuntimeError) as e:
+            print(f"⚠️ Falló la petición con {len(texts)} CVs ({e}); se analizarán de uno en uno")
+            results = [None] * len(texts)
+        parsed = sum(1 for result in results if result is not None)
+        self.batching.record(len(texts), parsed)
+        inc("cv_llm_batches_total", result="ok" if parsed == len(texts) else "partial" if parsed else "failed")
+        observe("cv_llm_batch_size", len(texts))
+
+        seconds = (time.perf_counter() - start) / len(texts)
+        for text, result in zip(texts, results):
+            if result is None:
+                continue
+            observe("cv_analyze_seconds", seconds, cache="batch")
+            if self.use_cache and LLM_CACHE_ENABLED:
+                llm_cache.set_json(cache_key(text, self.role, BATCH_PROMPT_VERSION), result)
+        return results
+
+    def close(self):
+        if self._loop is not None:
+            self._loop.run_until_complete(self._client.aclose())
+            # Los streams cortados al completar el JSON se cierran aquí
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+            self._loop = None
@@ -0,0 +1,141 @@
+"""CVs por minuto analizando de uno en uno frente a lotes de CVs cortos.
+
+Usa el servidor falso de Ollama con un coste fijo por petición (--latency),
+otro por token del prompt (--prompt-delay) y otro por token generado
+(--token-delay): agrupar ahorra el coste fijo y las instrucciones repetidas,
+no la generación. Con --bad-every una de cada N respuestas agrupadas pierde
+un candidato, para ver cómo se reduce el lote y se analiza de uno en uno.
+
+    python benchmarks/bench_batching.py --cvs 120 --workers 2 --sizes 1,2,4,6
+"""
+import argparse
+import json
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from batching import AdaptiveBatching, BatchAnalyzer  # noqa: E402
+from compaction import compact_cv, estimate_tokens  # noqa: E402
+from cv_generator import cv_data  # noqa: E402
+from ollama_client import OllamaClient  # noqa: E402
+from stub_ollama import fake_analysis, start_stub_server  # noqa: E402
+
+_CV_RE = re.compile(r"=== CV (\d+) ===\n(.*?)(?=\n=== CV \d+ ===|\nJSON:)", re.S)
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+")
+
+
+def make_respond(bad_every):
+    counter = {"batches": 0}
+    lock = threading.Lock()
+
+    def analysis_for(text):
+        analysis = fake_analysis(text)
+        email = _EMAIL_RE.search(text)
+        if email:
+            analysis["email"] = email.group(0)
+        return analysis
+
+    def respond(prompt):
+        sections = _CV_RE.findall(prompt)
+        if not sections:
+            return json.dumps(analysis_for(prompt), ensure_ascii=False)
+        items = [dict(analysis_for(text), cv=int(number)) for number, text in sections]
+        with lock:
+            counter["batches"] += 1
+            bad = bad_every and counter["batches"] % bad_every == 0
+        if bad:
+            items.pop()
+        return json.dumps({"candidatos": items}, ensure_ascii=False)
+
+    return respond
+
+
+def cv_texts(count):
+    rng = random.Random(3)
+    texts = []
+    for index in range(count):
+        data = cv_data(index, rng)
+        lines = [data["nombre"], data["email"], "", "Perfil", data["perfil"], "", "Experiencia"]
+        lines += [task for job in data["jobs"][:2] for task in job["tasks"]]
+        lines += ["", "Formación", data["formacion"], "", "Habilidades", ", ".join(data["skills"])]
+        texts.append(compact_cv("\n".join(lines))[0])
+    return texts
+
+
+def run(url, texts, workers, size):
+    """Analiza todos los textos con workers hilos, como _analyze_stage del pipeline"""
+    pending = queue.Queue()
+    for index, text in enumerate(texts):
+        pending.put((index, text))
+    batching = AdaptiveBatching(size)
+    results = [None] * len(texts)
+
+    def worker():
+        client = OllamaClient(base_url=url, concurrency=1)
+        analyzer = BatchAnalyzer(use_cache=False, batching=batching, client=client)
+        analyzer.single = lambda text, role, use_cache=False, count=True: analyzer.run(client.analyze_cv(text, role))
+        while True:
+            items = []
+            want = batching.next_size()
+            try:
+                while len(items) < want:
+                    items.append(pending.get_nowait())
+            except queue.Empty:
+                pass
+            if not items:
+                break
+            chunk = [text for _, text in items]
+            for (index, _), result in zip(items, analyzer.analyze(chunk, [estimate_tokens(t) for t in chunk], want)):
+                results[index] = result
+        analyzer.close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    # Cada CV tiene que quedarse con su propio correo
+    wrong = sum(1 for text, result in zip(texts, results)
+                if result is None or "error" in result or result.get("email", "") not in text)
+    return elapsed, wrong, batching.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cvs", type=int, default=120)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--sizes", default="1,2,4,6", help="CVs por petición (1 = sin lotes)")
+    parser.add_argument("--latency", type=float, default=0.3, help="segundos fijos por petición")
+    parser.add_argument("--prompt-delay", type=float, default=0.0005, help="segundos por token del prompt")
+    parser.add_argument("--token-delay", type=float, default=0.001, help="segundos por token generado")
+    parser.add_argument("--bad-every", type=int, default=0, help="una de cada N respuestas agrupadas incompleta")
+    args = parser.parse_args()
+
+    server = start_stub_server(latency=args.latency, token_delay=args.token_delay,
+                               prompt_delay=args.prompt_delay, respond=make_respond(args.bad_every))
+    texts = cv_texts(args.cvs)
+    print(f"{args.cvs} CVs de ~{sum(map(estimate_tokens, texts)) // len(texts)} tokens, {args.workers} workers\n")
+    print(f"{'lote':>5} {'tiempo':>9} {'CVs/min':>9} {'peticiones':>11} {'agrupados':>10} {'de uno en uno':>14} {'errores':>8}")
+    base = None
+    for size in (int(value) for value in args.sizes.split(",")):
+        before = server.requests
+        elapsed, wrong, stats = run(server.url, texts, args.workers, size)
+        rate = args.cvs / elapsed * 60
+        base = base or rate
+        print(f"{size:>5} {elapsed:8.2f}s {rate:9.1f} {server.requests - before:>11} {stats['batched']:>10} "
+              f"{args.cvs - stats['batched']:>14} {wrong:>8}   {rate / base:.2f}x")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Compara un commit por candidato (como process_cv) con el BatchWriter.
+
+    python benchmarks/bench_db_writer.py --rows 10000
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from db_writer import BatchWriter  # noqa: E402
+from documents import candidate_columns, pack_document, store_documents  # noqa: E402
+from models import Base, Candidate, set_sqlite_pragmas  # noqa: E402
+
+
+def fake_rows(count):
+    for i in range(count):
+        yield {
+            "nombre": f"Candidato {i}",
+            "email": f"candidato{i}@example.com",
+            "perfil": "Desarrollador backend con experiencia en APIs REST " * 3,
+            "skills": "Python, Docker, SQL, FastAPI, Git",
+            "experiencia": "5 años en desarrollo de software " * 4,
+            "seniority": "Senior" if i % 3 == 0 else "Mid",
+            "area_profesional": "Tecnología",
+            "match": float(i % 100),
+            "cv_text": "Texto del CV " * 400,
+            "file_hash": hashlib.sha256(str(i).encode()).hexdigest(),
+            "role_fingerprint": "bench"
+        }
+
+
+def new_engine(folder, name, wal):
+    engine = create_engine(f"sqlite:///{os.path.join(folder, name)}")
+    if wal:
+        event.listen(engine, "connect", set_sqlite_pragmas)
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def per_row_commit(engine, rows):
+    Session = sessionmaker(bind=engine)
+    for row in rows:
+        session = Session()
+        candidate = Candidate(**candidate_columns(row))
+        session.add(candidate)
+        session.flush()
+        store_documents(session.connection(), [(candidate.id, row, pack_document(row))])
+        session.commit()
+        session.close()
+
+
+def batched(engine, rows, producers=1):
+    writer = BatchWriter(engine=engine)
+    rows = list(rows)
+
+    def produce(part):
+        for row in part:
+            writer.add(row)
+
+    threads = [threading.Thread(target=produce, args=(rows[i::producers],)) for i in range(producers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    writer.close()
+
+
+def timed(label, func, engine, rows, baseline=None):
+    start = time.perf_counter()
+    func(engine, rows)
+    elapsed = time.perf_counter() - start
+    with engine.connect() as conn:
+        stored = conn.exec_driver_sql("SELECT COUNT(*) FROM candidates").scalar()
+    speedup = f"  x{baseline / elapsed:.1f}" if baseline else ""
+    print(f"{label:<38} {elapsed:8.2f} s  {len(rows) / elapsed:10.0f} filas/s  ({stored} guardadas){speedup}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+    rows = list(fake_rows(args.rows))
+
+    with tempfile.TemporaryDirectory() as folder:
+        base = timed("commit por fila (journal por defecto)", per_row_commit,
+                     new_engine(folder, "a.db", wal=False), rows)
+        timed("commit por fila (WAL)", per_row_commit, new_engine(folder, "b.db", wal=True), rows, base)
+        timed("BatchWriter (WAL)", batched, new_engine(folder, "c.db", wal=True), rows, base)
+        timed("BatchWriter (WAL, 4 hilos)", lambda e, r: batched(e, r, producers=4),
+              new_engine(folder, "d.db", wal=True), rows, base)
+
+
+if __name__ == "__main__":
+    main()
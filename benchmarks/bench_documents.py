@@ -0,0 +1,170 @@
+"""Tamaño de candidates.db y velocidad de los recorridos con el texto del CV
+dentro de candidates (esquema anterior) y tras migrarlo a candidate_documents.
+
+Crea una base de datos con la columna cv_text (hasta 15000 caracteres por CV,
+como se guardaba antes) y el índice FTS anterior, mide, ejecuta la migración
+de init_db (migrate_cv_text y ensure_fts) y vuelve a medir.
+
+    python benchmarks/bench_documents.py --rows 20000
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from sqlalchemy import create_engine, event, text  # noqa: E402
+
+from cv_generator import cv_data  # noqa: E402
+from documents import load_document, migrate_cv_text  # noqa: E402
+from models import Base, set_sqlite_pragmas  # noqa: E402
+from reports import iter_candidate_rows  # noqa: E402
+from search import ensure_fts, search_candidates  # noqa: E402
+
+# Índice FTS de la versión anterior (contenido externo sobre candidates.cv_text)
+LEGACY_FTS = [
+    """CREATE VIRTUAL TABLE candidates_fts USING fts5(
+        skills, perfil, experiencia, cv_text,
+        content='candidates', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER candidates_fts_ai AFTER INSERT ON candidates BEGIN
+        INSERT INTO candidates_fts(rowid, skills, perfil, experiencia, cv_text)
+        VALUES (new.id, new.skills, new.perfil, new.experiencia, new.cv_text);
+    END""",
+]
+
+
+def cv_text(data, rng):
+    """Texto de un CV de 3000 a 15000 caracteres, como el que devuelve la extracción
+    (las experiencias de otros CVs generados hacen de páginas adicionales)"""
+    lines = [data["nombre"], data["email"], data["telefono"], "", "Perfil", data["perfil"], "", "Experiencia"]
+    jobs = list(data["jobs"])
+    target = rng.randint(3000, 15000)
+    while sum(len(line) + 1 for line in lines) < target:
+        if not jobs:
+            jobs = cv_data(rng.randint(0, 10 ** 6), rng)["jobs"]
+        job = jobs.pop()
+        lines += ["", f"{job['title']} - {job['company']} ({job['period']})"] + job["tasks"]
+    lines += ["", "Formación", data["formacion"], "", "Habilidades", ", ".join(data["skills"]),
+              "", "Idiomas", ", ".join(data["idiomas"])]
+    return "\n".join(lines)[:15000]
+
+
+def legacy_rows(count, rng):
+    for i in range(count):
+        data = cv_data(i, rng)
+        yield (data["nombre"], data["email"], data["perfil"], ", ".join(data["skills"]),
+               " ".join(job["tasks"][0] for job in data["jobs"]), rng.choice(["Junior", "Mid", "Senior"]),
+               data["area"], float(rng.randint(0, 100)), cv_text(data, rng),
+               hashlib.sha256(str(i).encode()).hexdigest(), "bench")
+
+
+def best_of(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def file_size(path):
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+
+def table_sizes(engine):
+    """Bytes por tabla (necesita la tabla virtual dbstat de SQLite)"""
+    with engine.connect() as conn:
+        try:
+            rows = conn.execute(text("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name")).all()
+        except Exception:
+            return {}
+    return dict(rows)
+
+
+def measure(engine, path, ids, label, legacy):
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def scan():
+        # Filtro sin índice: recorre toda la tabla candidates
+        with engine.connect() as conn:
+            conn.execute(text("SELECT COUNT(*) FROM candidates WHERE email LIKE '%.9%' OR prompt_tokens > 0")).scalar()
+
+    def report():
+        sum(len(rows) for rows in iter_candidate_rows(engine=engine))
+
+    def details():
+        # Texto de un CV al abrir su detalle
+        for candidate_id in ids:
+            if legacy:
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT cv_text FROM candidates WHERE id = :id"), {"id": candidate_id}).scalar()
+            else:
+                load_document(candidate_id, engine=engine)
+
+    def search():
+        search_candidates("python docker", limit=20, engine=engine)
+
+    sizes = table_sizes(engine)
+    result = {
+        "archivo": file_size(path) / 1024 / 1024,
+        "candidates": sizes.get("candidates", 0) / 1024 / 1024,
+        "escaneo": best_of(scan) * 1000,
+        "informe": best_of(report, 3) * 1000,
+        "detalle": best_of(details) * 1000 / len(ids),
+        "búsqueda": best_of(search) * 1000,
+    }
+    print(f"{label:<10} {result['archivo']:9.1f} MB {result['candidates']:9.1f} MB {result['escaneo']:9.1f} ms "
+          f"{result['informe']:9.1f} ms {result['detalle']:9.3f} ms {result['búsqueda']:9.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "bench.db")
+        engine = create_engine(f"sqlite:///{path}")
+        event.listen(engine, "connect", set_sqlite_pragmas)
+        Base.metadata.create_all(engine)
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ALTER TABLE candidates ADD COLUMN cv_text TEXT")
+            for statement in LEGACY_FTS:
+                conn.exec_driver_sql(statement)
+            conn.exec_driver_sql(
+                """INSERT INTO candidates (nombre, email, perfil, skills, experiencia, seniority,
+                       area_profesional, match, cv_text, file_hash, role_fingerprint)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""", list(legacy_rows(args.rows, rng))
+            )
+        print(f"{args.rows} candidatos con el esquema anterior en {time.perf_counter() - start:.1f} s\n")
+
+        ids = random.Random(1).sample(range(1, args.rows + 1), min(200, args.rows))
+        print(f"{'esquema':<10} {'archivo':>12} {'candidates':>12} {'escaneo':>12} {'informe':>12} "
+              f"{'detalle/CV':>12} {'búsqueda':>12}")
+        before = measure(engine, path, ids, "anterior", legacy=True)
+
+        start = time.perf_counter()
+        moved = migrate_cv_text(engine)
+        ensure_fts(engine)
+        migration = time.perf_counter() - start
+        after = measure(engine, path, ids, "nuevo", legacy=False)
+
+        print(f"\nmigración: {moved} textos en {migration:.1f} s")
+        print(f"archivo {before['archivo'] / after['archivo']:.1f}x más pequeño, "
+              f"escaneo {before['escaneo'] / after['escaneo']:.1f}x, informe {before['informe'] / after['informe']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Coste de calcular embeddings y de las consultas top-k sobre el memmap.
+
+    python benchmarks/bench_embeddings.py --rows 100000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine  # noqa: E402
+
+from bench_fts import fake_rows  # noqa: E402
+from embeddings import VectorStore, embedding_text  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as folder:
+        engine = create_engine(f"sqlite:///{os.path.join(folder, 'bench.db')}")
+        store = VectorStore(engine=engine)
+        print(f"modelo: {store.embedder.info()[0]}")
+
+        rows = list(fake_rows(args.rows, rng))
+        embed_seconds = 0.0
+        append_seconds = 0.0
+        for start in range(0, len(rows), args.batch):
+            chunk = rows[start:start + args.batch]
+            t0 = time.perf_counter()
+            vectors = [store.embedder.embed(embedding_text(row)) for row in chunk]
+            t1 = time.perf_counter()
+            store.add([(start + n + 1, vector) for n, vector in enumerate(vectors)])
+            embed_seconds += t1 - t0
+            append_seconds += time.perf_counter() - t1
+        size_mb = os.path.getsize(store.vec_path) / 1024 / 1024
+        print(f"{args.rows} embeddings: {embed_seconds / args.rows * 1000:.2f} ms/candidato al calcular, "
+              f"{append_seconds / args.rows * 1e6:.1f} µs/candidato al añadir ({size_mb:.0f} MB)")
+
+        for label, query in (("similar", lambda: store.similar(rng.randint(1, args.rows), 10)),
+                             ("semantic", lambda: store.semantic("desarrollador python con docker", 10))):
+            times = []
+            for _ in range(20):
+                t0 = time.perf_counter()
+                query()
+                times.append(time.perf_counter() - t0)
+            times.sort()
+            print(f"{label:<9} p50 {times[len(times) // 2] * 1000:6.1f} ms   máx {times[-1] * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
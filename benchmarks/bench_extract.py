@@ -0,0 +1,128 @@
+"""Limpieza del texto extraído: concatenación + 20 str.replace frente a join + una pasada.
+
+Simula el texto de cada página (con mojibake y caracteres de control en parte
+de ellas) para medir solo el coste de montar y limpiar el documento. Con
+--pdf mide además extract_text_from_pdf sobre CVs generados, con y sin límite
+de páginas (necesita pymupdf).
+
+    python benchmarks/bench_extract.py --pages 2,20,200
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from cv_generator import cv_data  # noqa: E402
+from utils import repair_text  # noqa: E402
+
+LEGACY_REPLACEMENTS = {
+    "Ã¡": "á", "Ã©": "é", "Ã­": "í", "Ã³": "ó", "Ãº": "ú",
+    "Ã±": "ñ", "Ã'": "Ñ", "Ã€": "À", "Ã‰": "É", "Ã“": "Ó",
+    "Ãš": "Ú", "Ãˆ": "È", "Ã¼": "ü", "Ã§": "ç",
+    "Ã¢": "â", "Ãª": "ê", "Ã®": "î", "Ã´": "ô", "Ã»": "û"
+}
+
+
+def legacy_build(pages):
+    """La versión anterior: text += por página, regex y un replace por clave"""
+    text = ""
+    for page in pages:
+        text += page
+    text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', text)
+    for wrong, correct in LEGACY_REPLACEMENTS.items():
+        text = text.replace(wrong, correct)
+    return text
+
+
+def current_build(pages):
+    """La versión actual: reparación por página y un único join"""
+    return "".join([repair_text(page) for page in pages])
+
+
+def page_texts(count, rng, kind):
+    """Páginas de ~3 KB: "limpio", "mojibake" (UTF-8 leído como latin-1)
+    o "mixto" (solo algunas líneas mal codificadas), con algún carácter de control"""
+    pages = []
+    for index in range(count):
+        data = cv_data(index, rng)
+        lines = [data["nombre"], "¿Año? Íñigo Ángel Ñandú", data["perfil"], data["formacion"],
+                 ", ".join(data["skills"])]
+        lines += [task for job in data["jobs"] for task in job["tasks"]]
+        while sum(len(line) for line in lines) < 3000:
+            lines.append(data["perfil"])
+        if kind == "mojibake":
+            lines = [line.encode("utf-8").decode("latin-1") for line in lines]
+        elif kind == "mixto":
+            lines = [line.encode("utf-8").decode("latin-1") if i % 4 == 1 else line
+                     for i, line in enumerate(lines)]
+        pages.append("\x0c\n".join(lines))
+    return pages
+
+
+def timed(func, pages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(pages)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_pdf(count):
+    from cv_generator import write_cv_pdf
+    from utils import extract_text_from_pdf
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "largo.pdf")
+        data = cv_data(0, rng)
+        # Un CV muy largo: muchas experiencias, varias decenas de páginas
+        data["jobs"] = [job for i in range(count) for job in cv_data(i, rng)["jobs"]]
+        write_cv_pdf(path, data)
+        for label, kwargs in (("sin límite", {"max_pages": 0, "max_bytes": 0}),
+                              ("max_pages=3", {"max_pages": 3, "max_bytes": 0}),
+                              ("max_bytes=20000", {"max_pages": 0, "max_bytes": 20000})):
+            start = time.perf_counter()
+            text = extract_text_from_pdf(path, **kwargs)
+            print(f"  {label:<16} {time.perf_counter() - start:8.3f} s   {len(text.encode('utf-8')):>9} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", default="2,20,200", help="páginas por documento")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--pdf", type=int, default=0, help="bloques de experiencias del PDF largo (0 = no medir)")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'texto':<10} {'páginas':>8} {'anterior':>12} {'actual':>12} {'mejora':>8}")
+    for kind in ("limpio", "mojibake", "mixto"):
+        for count in (int(value) for value in args.pages.split(",")):
+            pages = page_texts(count, rng, kind)
+            old = timed(legacy_build, pages, args.repeat)
+            new = timed(current_build, pages, args.repeat)
+            print(f"{kind:<10} {count:>8} {old * 1000:10.2f}ms {new * 1000:10.2f}ms {old / new:7.1f}x")
+
+    # Lo que queda sin reparar: la tabla anterior no cubría Á, Í, Ñ ni los signos ¿ ¡
+    expected = current_build(page_texts(20, random.Random(1), "limpio"))
+    for kind in ("mojibake", "mixto"):
+        sample = page_texts(20, random.Random(1), kind)
+        old_ok = legacy_build(sample) == expected
+        new_ok = current_build(sample) == expected
+        print(f"\n{kind}: texto original recuperado -> anterior {old_ok}, actual {new_ok}", end="")
+    print()
+
+    if args.pdf:
+        print("\nextract_text_from_pdf con un PDF largo")
+        bench_pdf(args.pdf)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Lista de cvs/: listdir + getsize por archivo frente al índice en memoria.
+
+Crea una carpeta con muchos PDFs pequeños y mide cada forma de servir la
+primera página de GET /pdf-files. En un disco de red cada stat cuesta mucho
+más que aquí, así que la diferencia real es mayor.
+
+    python benchmarks/bench_file_index.py --files 20000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_index import FileIndex  # noqa: E402
+
+
+def legacy_list(folder):
+    """La versión anterior: listdir y un getsize por archivo, en cada petición"""
+    files = []
+    for name in os.listdir(folder):
+        if name.endswith(".pdf"):
+            size = os.path.getsize(os.path.join(folder, name))
+            files.append({"name": name, "size": size, "size_mb": round(size / 1024 / 1024, 2)})
+    return files
+
+
+def timed(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        for i in range(args.files):
+            with open(os.path.join(folder, f"cv_{i:06d}.pdf"), "wb") as f:
+                f.write(b"%PDF-1.4\n" + os.urandom(i % 4096))
+
+        index = FileIndex(folder, ttl=3600)
+        start = time.perf_counter()
+        index.refresh()
+        first_scan = time.perf_counter() - start
+        results = [
+            ("listdir + getsize (anterior)", timed(lambda: legacy_list(folder), args.repeat)),
+            ("primer recorrido del índice", first_scan),
+            ("recorrido con scandir", timed(lambda: index.refresh(force=True), args.repeat)),
+            ("página por nombre (en caché)", timed(lambda: index.page(0, 100, "name"), args.repeat)),
+            ("página por fecha (en caché)", timed(lambda: index.page(0, 100, "date", "desc"), args.repeat)),
+        ]
+        print(f"{args.files} archivos")
+        for label, seconds in results:
+            print(f"  {label:<32} {seconds * 1000:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Compara la búsqueda FTS5 con un escaneo LIKE sobre las mismas columnas.
+
+    python benchmarks/bench_fts.py --rows 50000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, text  # noqa: E402
+
+from db_writer import BatchWriter  # noqa: E402
+from models import Base, set_sqlite_pragmas  # noqa: E402
+from search import ensure_fts, rebuild_fts, search_candidates  # noqa: E402
+
+SKILLS = ["Python", "Docker", "Java", "React", "Node.js", "SQL", "Kubernetes", "AWS", "Excel",
+          "Figma", "Photoshop", "Go", "Rust", "C++", "Django", "FastAPI", "Angular", "Vue",
+          "Power BI", "Tableau", "Scrum", "Git", "Linux", "TensorFlow", "PyTorch"]
+WORDS = ("desarrollo gestión proyectos equipo cliente análisis datos diseño sistemas "
+         "empresa liderazgo comunicación servicios plataforma integración soporte").split()
+
+QUERIES = [
+    ("python AND docker", ["python", "docker"]),
+    ("kubernetes", ["kubernetes"]),
+    ("react AND node", ["react", "node"]),
+    ("tensorflow AND liderazgo", ["tensorflow", "liderazgo"]),
+]
+LIKE_COLUMNS = ("skills", "perfil", "experiencia", "cv_text")
+# El texto del CV está comprimido: el LIKE lo descomprime en cada fila
+LIKE_SOURCE = """(SELECT c.id, c.skills, c.perfil, c.experiencia, unpack_text(d.cv_text) AS cv_text
+                  FROM candidates c JOIN candidate_documents d ON d.candidate_id = c.id)"""
+
+
+def fake_rows(count, rng):
+    for i in range(count):
+        skills = rng.sample(SKILLS, 5)
+        body = " ".join(rng.choice(WORDS) for _ in range(150))
+        yield {
+            "nombre": f"Candidato {i}",
+            "email": f"c{i}@example.com",
+            "perfil": f"Profesional con experiencia en {skills[0]} y {rng.choice(WORDS)}",
+            "skills": ", ".join(skills),
+            "experiencia": " ".join(rng.choice(WORDS) for _ in range(30)),
+            "seniority": rng.choice(["Junior", "Mid", "Senior"]),
+            "area_profesional": "Tecnología",
+            "match": float(rng.randint(0, 100)),
+            "cv_text": f"{body} {' '.join(skills)}",
+            "file_hash": f"{i:064x}",
+            "role_fingerprint": "bench"
+        }
+
+
+def like_search(conn, terms, limit=20):
+    # Cada término debe aparecer en alguna de las columnas
+    clauses = []
+    params = {}
+    for t, term in enumerate(terms):
+        params[f"t{t}"] = f"%{term}%"
+        clauses.append("(" + " OR ".join(f"{col} LIKE :t{t}" for col in LIKE_COLUMNS) + ")")
+    where = " AND ".join(clauses)
+    total = conn.execute(text(f"SELECT COUNT(*) FROM {LIKE_SOURCE} WHERE {where}"), params).scalar()
+    conn.execute(text(f"SELECT id FROM {LIKE_SOURCE} WHERE {where} LIMIT {limit}"), params).all()
+    return total
+
+
+def best_of(func, repeat=5):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as folder:
+        engine = create_engine(f"sqlite:///{os.path.join(folder, 'bench.db')}")
+        event.listen(engine, "connect", set_sqlite_pragmas)
+        Base.metadata.create_all(engine)
+
+        start = time.perf_counter()
+        writer = BatchWriter(engine=engine, batch_size=1000)
+        for row in fake_rows(args.rows, rng):
+            writer.add(row)
+        writer.close()
+        print(f"{args.rows} filas insertadas en {time.perf_counter() - start:.1f} s")
+
+        start = time.perf_counter()
+        ensure_fts(engine)
+        rebuild_fts(engine)
+        print(f"índice FTS5 construido en {time.perf_counter() - start:.1f} s\n")
+
+        print(f"{'consulta':<28} {'LIKE':>10} {'FTS5':>10} {'mejora':>8}  resultados")
+        with engine.connect() as conn:
+            for fts_query, terms in QUERIES:
+                like_time, like_total = best_of(lambda: like_search(conn, terms))
+                fts_time, (fts_total, _) = best_of(lambda: search_candidates(fts_query, 20, 0, engine=engine))
+                print(f"{fts_query:<28} {like_time * 1000:8.1f}ms {fts_time * 1000:8.1f}ms "
+                      f"{like_time / fts_time:7.1f}x  {like_total}/{fts_total}")
+
+
+if __name__ == "__main__":
+    main()
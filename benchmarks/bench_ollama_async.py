@@ -0,0 +1,49 @@
+"""Compara llamadas secuenciales y concurrentes de analyze_cv_async contra el
+servidor falso de Ollama.
+
+    python benchmarks/bench_ollama_async.py --cvs 40 --concurrency 4 --latency 0.2
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ollama_client import OllamaClient, analyze_cv_async  # noqa: E402
+from stub_ollama import start_stub_server  # noqa: E402
+
+
+async def run(texts, client):
+    start = time.perf_counter()
+    results = await asyncio.gather(*(analyze_cv_async(text, None, client=client) for text in texts))
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+    errors = sum(1 for r in results if "error" in r)
+    return elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cvs", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument("--fail-every", type=int, default=0)
+    args = parser.parse_args()
+
+    server = start_stub_server(latency=args.latency, token_delay=args.token_delay, fail_every=args.fail_every)
+    texts = [f"Candidato {i}\nPython, Docker\nExperiencia: {i} años" for i in range(args.cvs)]
+
+    for concurrency in (1, args.concurrency):
+        client = OllamaClient(base_url=server.url, concurrency=concurrency)
+        elapsed, errors = asyncio.run(run(texts, client))
+        print(f"concurrencia={concurrency:<3} {elapsed:7.2f} s  {args.cvs / elapsed * 60:8.1f} CVs/min  errores={errors}")
+
+    print(f"peticiones={server.requests} cortadas al completar el JSON={server.cancelled}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Tiempo de re-ranking local por rol con el índice BM25 de NumPy.
+
+    python benchmarks/bench_ranking.py --rows 50000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event  # noqa: E402
+
+from bench_fts import fake_rows  # noqa: E402
+from db_writer import BatchWriter  # noqa: E402
+from models import Base, set_sqlite_pragmas  # noqa: E402
+from ranking import RankingIndex, rank_candidates  # noqa: E402
+
+ROLES = [
+    "desarrollador backend senior python",
+    "frontend react typescript",
+    "devops kubernetes aws",
+    "analista de datos junior",
+    "contador",
+]
+
+
+def best_of(func, repeat=5):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--new-rows", type=int, default=500)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as folder:
+        engine = create_engine(f"sqlite:///{os.path.join(folder, 'bench.db')}")
+        event.listen(engine, "connect", set_sqlite_pragmas)
+        Base.metadata.create_all(engine)
+        rows = list(fake_rows(args.rows + args.new_rows, rng))
+        writer = BatchWriter(engine=engine, batch_size=1000)
+        for row in rows[:args.rows]:
+            writer.add(row)
+        writer.close()
+
+        index = RankingIndex(path=os.path.join(folder, "rank_index.npz"), engine=engine)
+        start = time.perf_counter()
+        index.refresh()
+        print(f"índice construido para {args.rows} candidatos en {time.perf_counter() - start:.1f} s "
+              f"({len(index.vocab)} términos)")
+
+        writer = BatchWriter(engine=engine)
+        for row in rows[args.rows:]:
+            writer.add(row)
+        writer.close()
+        start = time.perf_counter()
+        added = index.refresh()
+        print(f"actualización incremental con {added} candidatos nuevos en {time.perf_counter() - start:.2f} s")
+
+        start = time.perf_counter()
+        index.save()
+        print(f"guardado del índice en {time.perf_counter() - start:.2f} s (diferido, fuera de las consultas)")
+
+        start = time.perf_counter()
+        RankingIndex(path=index.path, engine=engine).refresh()
+        print(f"carga del índice guardado en {time.perf_counter() - start:.2f} s\n")
+
+        print(f"{'rol':<40} {'tiempo':>10}  candidatos con afinidad")
+        for role in ROLES:
+            elapsed, (total, _, _) = best_of(lambda: rank_candidates(role, 50, 0, index=index))
+            print(f"{role:<40} {elapsed * 1000:8.1f}ms  {total}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Tiempo y pico de memoria de los informes CSV, JSONL y PDF.
+
+    python benchmarks/bench_reports.py --rows 50000 --pdf-rows 5000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from itertools import islice
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, event  # noqa: E402
+
+from bench_fts import fake_rows  # noqa: E402
+from db_writer import BatchWriter  # noqa: E402
+from models import Base, set_sqlite_pragmas  # noqa: E402
+from reports import iter_candidate_rows, stream_csv, stream_jsonl, write_pdf  # noqa: E402
+
+
+def measure(label, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<8} {elapsed:8.1f} s {peak / 1024 / 1024:8.1f} MB {size / 1024 / 1024:8.1f} MB")
+
+
+def drain(stream):
+    return sum(len(block) for block in stream)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--pdf-rows", type=int, default=5000)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as folder:
+        engine = create_engine(f"sqlite:///{os.path.join(folder, 'bench.db')}")
+        event.listen(engine, "connect", set_sqlite_pragmas)
+        Base.metadata.create_all(engine)
+        writer = BatchWriter(engine=engine, batch_size=1000)
+        for row in fake_rows(args.rows, rng):
+            writer.add(row)
+        writer.close()
+
+        pdf_path = os.path.join(folder, "informe.pdf")
+
+        def pdf():
+            # Solo los primeros pdf_rows candidatos: la maquetación es lo caro
+            chunks = islice(iter_candidate_rows(100, engine=engine), max(1, args.pdf_rows // 100))
+            write_pdf(pdf_path, chunks)
+            return os.path.getsize(pdf_path)
+
+        print(f"{'formato':<8} {'tiempo':>10} {'pico':>11} {'tamaño':>11}")
+        measure("csv", lambda: drain(stream_csv(iter_candidate_rows(engine=engine))))
+        measure("jsonl", lambda: drain(stream_jsonl(iter_candidate_rows(engine=engine))))
+        measure("pdf", pdf)
+        print(f"\n{args.rows} candidatos en CSV/JSONL, {min(args.pdf_rows, args.rows)} en el PDF "
+              "(el pico lo mide tracemalloc, que también ralentiza la ejecución)")
+
+
+if __name__ == "__main__":
+    main()
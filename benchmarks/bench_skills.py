@@ -0,0 +1,106 @@
+"""Facetas e intersección de habilidades frente a LIKE sobre Candidate.skills.
+
+    python benchmarks/bench_skills.py --rows 100000
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, text  # noqa: E402
+
+from db_writer import BatchWriter  # noqa: E402
+from models import Base, set_sqlite_pragmas  # noqa: E402
+from skills import candidates_with_skills, ensure_skill_triggers, skill_facets  # noqa: E402
+
+SKILLS = ["Python", "Docker", "Java", "ReactJS", "Node.js", "SQL", "Kubernetes", "AWS", "Excel",
+          "Figma", "Photoshop", "Golang", "Rust", "C++", "Django", "FastAPI", "Angular", "Vue.js",
+          "Power BI", "Tableau", "Scrum", "Git", "Linux", "TensorFlow", "PyTorch", "Postgres",
+          "MongoDB", "Inglés", "Jira", "Terraform"]
+
+# Vocabulario con cola larga, como en CVs reales: unas pocas habilidades muy
+# frecuentes y muchas que aparecen en pocos candidatos
+VOCABULARY = SKILLS + [f"Herramienta {i}" for i in range(3000)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) ** 0.9 for rank in range(len(VOCABULARY))))
+
+QUERIES = [["python"], ["python", "docker"], ["react", "node.js", "aws"], ["rust", "terraform", "go", "figma"]]
+
+
+def sample_skills(rng):
+    chosen = set()
+    size = rng.randint(4, 12)
+    while len(chosen) < size:
+        chosen.update(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=size - len(chosen)))
+    return ", ".join(chosen)
+
+
+def fake_rows(count, rng):
+    for i in range(count):
+        yield {
+            "nombre": f"Candidato {i}",
+            "skills": sample_skills(rng),
+            "match": float(rng.randint(0, 100)),
+            "cv_text": "",
+            "file_hash": f"{i:064x}",
+            "role_fingerprint": "bench"
+        }
+
+
+def like_search(conn, names, limit=50):
+    where = " AND ".join(f"skills LIKE :s{i}" for i in range(len(names)))
+    params = {f"s{i}": f"%{name}%" for i, name in enumerate(names)}
+    total = conn.execute(text(f"SELECT COUNT(*) FROM candidates WHERE {where}"), params).scalar()
+    conn.execute(text(f"SELECT id FROM candidates WHERE {where} ORDER BY match DESC LIMIT {limit}"), params).all()
+    return total
+
+
+def best_of(func, repeat=5):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as folder:
+        engine = create_engine(f"sqlite:///{os.path.join(folder, 'bench.db')}")
+        event.listen(engine, "connect", set_sqlite_pragmas)
+        Base.metadata.create_all(engine)
+        ensure_skill_triggers(engine)
+
+        rows = list(fake_rows(args.rows, rng))
+        start = time.perf_counter()
+        writer = BatchWriter(engine=engine, batch_size=1000)
+        for row in rows:
+            writer.add(row)
+        writer.close()
+        print(f"{args.rows} candidatos con habilidades insertados en {time.perf_counter() - start:.1f} s")
+
+        facet_time, facets = best_of(lambda: skill_facets(limit=50, engine=engine))
+        print(f"GET /skills (top 50 de {len(facets)}): {facet_time * 1000:.2f} ms\n")
+
+        print(f"{'habilidades':<34} {'LIKE':>10} {'índice':>10} {'mejora':>8}  resultados")
+        with engine.connect() as conn:
+            for names in QUERIES:
+                like_time, like_total = best_of(lambda: like_search(conn, names))
+                skill_time, (_, total, _) = best_of(lambda: candidates_with_skills(names, 50, 0, engine=engine))
+                print(f"{', '.join(names):<34} {like_time * 1000:8.1f}ms {skill_time * 1000:8.1f}ms "
+                      f"{like_time / skill_time:7.1f}x  {like_total}/{total}")
+
+
+if __name__ == "__main__":
+    main()
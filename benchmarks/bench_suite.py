@@ -0,0 +1,399 @@
+"""Benchmark reproducible de extracción, análisis, guardado y API.
+
+Genera CVs sintéticos en PDF, mide cada etapa (documentos por segundo y
+p50/p95/p99 por documento) con el análisis contra el Ollama falso, y los
+tiempos de respuesta de la API con 1k, 10k y 100k candidatos. El resultado se
+guarda en JSON para comparar ejecuciones.
+
+    python benchmarks/bench_suite.py --cvs 100 --latency 0.2 --sizes 1000,10000,100000
+    python benchmarks/bench_suite.py --compare antes.json despues.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+# (nombre, ruta) de los endpoints medidos; {middle} es un cursor a mitad de la tabla
+API_ENDPOINTS = [
+    ("candidates", "/candidates?limit=50"),
+    ("candidates_filtered", "/candidates?limit=50&area=" + quote("Tecnología") + "&min_match=50"),
+    ("candidates_cursor", "/candidates?limit=50&sort=id&order=asc&cursor={middle}"),
+    # Lo que pide la interfaz web: columnas de las tarjetas, validación con ETag (304) y detalle
+    ("candidates_cards", "/candidates?limit=100&fields=id,nombre,seniority,area_profesional,match"),
+    ("candidates_304", "/candidates?limit=100&fields=id,nombre,seniority,area_profesional,match", "revalidate"),
+    ("candidate_detail", "/candidates/{middle_id}"),
+    ("search", "/candidates/search?q=" + quote("python AND docker")),
+    ("skills", "/skills?limit=50"),
+    ("skills_candidates", "/skills/candidates?skills=python,docker"),
+    ("rank", "/candidates/rank?role=" + quote("desarrollador backend python")),
+]
+
+
+def latency_stats(latencies, wall=None):
+    """Conteo, media y percentiles (en segundos) y documentos por segundo si se da el tiempo total"""
+    values = np.asarray(latencies, dtype=float)
+    if not len(values):
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    result = {"count": len(values), "mean": round(float(values.mean()), 6),
+              "p50": round(float(p50), 6), "p95": round(float(p95), 6), "p99": round(float(p99), 6)}
+    if wall:
+        result["wall_seconds"] = round(wall, 3)
+        result["docs_per_sec"] = round(len(values) / wall, 2)
+    return result
+
+
+def bench_extract(paths, workers):
+    """Extracción en serie y en paralelo sin caché de texto, y de nuevo con la caché llena"""
+    import utils
+    from utils import extract_text_from_pdf, extract_texts_parallel
+
+    def sequential():
+        texts = {}
+        latencies = []
+        start = time.perf_counter()
+        for path in paths:
+            t = time.perf_counter()
+            texts[path] = extract_text_from_pdf(path)
+            latencies.append(time.perf_counter() - t)
+        return texts, latency_stats(latencies, time.perf_counter() - start)
+
+    cache_enabled = utils.TEXT_CACHE_ENABLED
+    utils.TEXT_CACHE_ENABLED = False
+    texts, serial = sequential()
+    utils.TEXT_CACHE_ENABLED = cache_enabled
+
+    # La caché está vacía (CV_TEXT_CACHE_PATH apunta a la carpeta temporal): la llena
+    start = time.perf_counter()
+    seconds = [s for _, _, error, s in extract_texts_parallel(paths, workers=workers) if not error]
+    parallel = latency_stats(seconds, time.perf_counter() - start)
+    parallel["workers"] = workers
+
+    _, cached = sequential() if cache_enabled else (None, {"count": 0})
+    return texts, serial, parallel, cached
+
+
+def bench_compact(texts):
+    """Compactación del texto para el prompt: tiempo por CV y tokens estimados antes y después"""
+    from compaction import PROMPT_TOKEN_BUDGET, compact_cv
+
+    compacted = []
+    latencies = []
+    before = after = 0
+    start = time.perf_counter()
+    for text in texts:
+        t = time.perf_counter()
+        prompt_text, info = compact_cv(text)
+        latencies.append(time.perf_counter() - t)
+        compacted.append(prompt_text)
+        before += info["tokens_before"]
+        after += info["tokens_after"]
+    result = latency_stats(latencies, time.perf_counter() - start)
+    result.update(budget=PROMPT_TOKEN_BUDGET, tokens_before=before, tokens_after=after)
+    return compacted, result
+
+
+def bench_analyze(texts, args):
+    from ollama_client import OllamaClient
+    from stub_ollama import start_stub_server
+
+    server = start_stub_server(latency=args.latency, token_delay=args.token_delay)
+    client = OllamaClient(base_url=server.url, concurrency=args.concurrency)
+    latencies = []
+
+    async def analyze(text):
+        t = time.perf_counter()
+        result = await client.analyze_cv(text)
+        latencies.append(time.perf_counter() - t)
+        return result
+
+    async def run():
+        try:
+            return await asyncio.gather(*(analyze(text) for text in texts))
+        finally:
+            await client.aclose()
+
+    start = time.perf_counter()
+    analyses = asyncio.run(run())
+    result = latency_stats(latencies, time.perf_counter() - start)
+    result.update(concurrency=args.concurrency, latency=args.latency, token_delay=args.token_delay,
+                  errors=sum(1 for a in analyses if "error" in a))
+    server.shutdown()
+    return analyses, result
+
+
+def bench_write(items, folder):
+    from sqlalchemy import create_engine, event
+
+    from db_writer import BatchWriter
+    from main import candidate_row
+    from models import Base, set_sqlite_pragmas
+    from search import ensure_fts
+    from skills import ensure_skill_triggers
+    from utils import file_sha256
+
+    engine = create_engine(f"sqlite:///{os.path.join(folder, 'write.db')}")
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    Base.metadata.create_all(engine)
+    ensure_fts(engine)
+    ensure_skill_triggers(engine)
+
+    writer = BatchWriter(engine=engine)
+    latencies = []
+
+    def on_done(added):
+        return lambda state, candidate_id, seconds, error: latencies.append(time.perf_counter() - added)
+
+    start = time.perf_counter()
+    for path, text, analysis in items:
+        row = candidate_row(analysis, text, file_sha256(path), "bench")
+        writer.add(row, on_done=on_done(time.perf_counter()))
+    writer.close()
+    result = latency_stats(latencies, time.perf_counter() - start)
+    result.update(batch_size=writer.batch_size, flushes=writer.flushes)
+    engine.dispose()
+    return result
+
+
+def candidate_rows(count, seed):
+    """Filas de candidatos con la forma de las reales (a partir de los datos del generador)"""
+    from cv_generator import cv_data
+
+    rng = random.Random(seed)
+    for index in range(count):
+        data = cv_data(index, rng)
+        experience = " ".join(task for job in data["jobs"] for task in job["tasks"])
+        yield {
+            "nombre": data["nombre"],
+            "email": data["email"],
+            "perfil": data["perfil"],
+            "skills": ", ".join(data["skills"]),
+            "experiencia": experience,
+            "seniority": "Senior" if data["anios"] >= 8 else "Mid" if data["anios"] >= 3 else "Junior",
+            "area_profesional": data["area"],
+            "match": float(rng.randint(0, 100)),
+            "cv_text": f"{data['nombre']}\n{data['perfil']}\n{experience}\n{data['formacion']}",
+            "file_hash": f"{index:064x}",
+            "role_fingerprint": "bench"
+        }
+
+
+def api_worker(rows, db_path, requests, seed):
+    """Se ejecuta en un subproceso con CV_DB_PATH apuntando a db_path; devuelve los tiempos por endpoint"""
+    from fastapi.testclient import TestClient
+
+    import api
+    from db import init_db
+    from db_writer import BatchWriter
+
+    result = {"rows": rows}
+    if not os.path.exists(db_path + ".ready"):
+        start = time.perf_counter()
+        init_db()
+        writer = BatchWriter(batch_size=1000)
+        for row in candidate_rows(rows, seed):
+            writer.add(row)
+        writer.close()
+        open(db_path + ".ready", "w").close()
+        result["load_seconds"] = round(time.perf_counter() - start, 2)
+
+    client = TestClient(api.app)  # Sin "with": no se lanzan las tareas de arranque
+    middle = api.encode_cursor([rows // 2])
+    for name, path, *options in API_ENDPOINTS:
+        url = path.format(middle=middle, middle_id=rows // 2)
+        start = time.perf_counter()
+        response = client.get(url)
+        first = time.perf_counter() - start  # Incluye cargar o construir índices
+        if response.status_code != 200 or "error" in response.json():
+            result[name] = {"error": response.text[:200]}
+            continue
+        # "revalidate": repetir con If-None-Match, como un cliente con la respuesta guardada
+        headers = {"If-None-Match": response.headers.get("etag", "")} if "revalidate" in options else {}
+        latencies = []
+        for _ in range(requests):
+            t = time.perf_counter()
+            client.get(url, headers=headers)
+            latencies.append(time.perf_counter() - t)
+        stats = latency_stats(latencies)
+        stats["first_request"] = round(first, 6)
+        result[name] = stats
+    return result
+
+
+def bench_api(sizes, data_dir, requests, seed):
+    results = {}
+    for rows in sizes:
+        db_path = os.path.abspath(os.path.join(data_dir, f"bench_{rows}_{seed}.db"))
+        env = dict(os.environ, CV_DB_PATH=db_path, CV_RANK_INDEX=db_path + ".rank.npz",
+                   CV_LLM_CACHE_PATH=db_path + ".llm_cache")
+        # Un proceso por tamaño: la API usa la base de datos configurada al importarse
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--api-worker", str(rows), "--api-db", db_path,
+             "--requests", str(requests), "--seed", str(seed)],
+            cwd=ROOT, env=env, capture_output=True, text=True
+        )
+        if output.returncode != 0:
+            print(output.stderr)
+            results[str(rows)] = {"error": output.stderr.strip().splitlines()[-1:]}
+            continue
+        results[str(rows)] = json.loads(output.stdout.strip().splitlines()[-1])
+        print_api(rows, results[str(rows)])
+    return results
+
+
+def print_stage(name, stats):
+    if not stats.get("count"):
+        print(f"  {name:<18} sin datos")
+        return
+    print(f"  {name:<18} {stats.get('docs_per_sec', 0):9.1f} docs/s   p50 {stats['p50'] * 1000:9.1f} ms"
+          f"   p95 {stats['p95'] * 1000:9.1f} ms   p99 {stats['p99'] * 1000:9.1f} ms")
+
+
+def print_api(rows, result):
+    print(f"\nAPI con {rows} candidatos" + (f" (carga {result['load_seconds']} s)" if "load_seconds" in result else ""))
+    for name, *_ in API_ENDPOINTS:
+        stats = result.get(name, {})
+        if "error" in stats:
+            print(f"  {name:<20} error: {stats['error']}")
+        elif stats:
+            print(f"  {name:<20} p50 {stats['p50'] * 1000:8.2f} ms   p95 {stats['p95'] * 1000:8.2f} ms"
+                  f"   p99 {stats['p99'] * 1000:8.2f} ms   primera {stats['first_request'] * 1000:9.1f} ms")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_path, new_path):
+    """Compara dos resultados: p50/p95 (menor es mejor) y docs/s (mayor es mejor)"""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+
+    def flatten(results):
+        flat = {}
+        for name, stats in results.get("stages", {}).items():
+            flat[f"stages.{name}"] = stats
+        for rows, endpoints in results.get("api", {}).items():
+            for name, stats in endpoints.items():
+                if isinstance(stats, dict):
+                    flat[f"api.{rows}.{name}"] = stats
+        return flat
+
+    old_flat, new_flat = flatten(old), flatten(new)
+    print(f"{'medida':<40} {'métrica':<12} {'antes':>12} {'después':>12} {'cambio':>8}")
+    for key in sorted(set(old_flat) & set(new_flat)):
+        for metric in ("docs_per_sec", "p50", "p95"):
+            before, after = old_flat[key].get(metric), new_flat[key].get(metric)
+            if not before or after is None:
+                continue
+            print(f"{key:<40} {metric:<12} {before:12.4f} {after:12.4f} {after / before:7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de extracción, análisis, guardado y API")
+    parser.add_argument("--cvs", type=int, default=100, help="CVs sintéticos para las etapas")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="procesos de extracción")
+    parser.add_argument("--latency", type=float, default=0.2, help="latencia del Ollama falso (s)")
+    parser.add_argument("--token-delay", type=float, default=0.002, help="segundos entre tokens del Ollama falso")
+    parser.add_argument("--concurrency", type=int, default=2, help="peticiones simultáneas a Ollama")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="candidatos para medir la API")
+    parser.add_argument("--requests", type=int, default=30, help="peticiones por endpoint")
+    parser.add_argument("--data-dir", default=None, help="carpeta donde reutilizar las bases de datos de la API")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-stages", action="store_true")
+    parser.add_argument("--skip-api", action="store_true")
+    parser.add_argument("--output", default=None, help="archivo JSON de resultados")
+    parser.add_argument("--compare", nargs=2, metavar=("ANTES", "DESPUES"))
+    parser.add_argument("--api-worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--api-db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.api_worker:
+        print(json.dumps(api_worker(args.api_worker, args.api_db, args.requests, args.seed)))
+        return
+
+    from cv_generator import generate_cvs
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if not k.startswith("api_") and k != "compare"},
+        },
+        "stages": {},
+        "api": {},
+    }
+
+    with tempfile.TemporaryDirectory() as folder:
+        # Cachés de texto y del LLM vacías y propias de esta ejecución
+        os.environ["CV_TEXT_CACHE_PATH"] = os.path.join(folder, "text_cache.db")
+        os.environ["CV_LLM_CACHE_PATH"] = os.path.join(folder, "llm_cache.db")
+        if not args.skip_stages:
+            start = time.perf_counter()
+            generated = generate_cvs(os.path.join(folder, "cvs"), args.cvs, args.seed)
+            print(f"{args.cvs} CVs generados en {time.perf_counter() - start:.1f} s\n\nEtapas")
+            paths = [path for path, _ in generated]
+
+            texts, sequential, parallel, cached = bench_extract(paths, args.workers)
+            results["stages"]["extract"] = sequential
+            results["stages"]["extract_parallel"] = parallel
+            results["stages"]["extract_cached"] = cached
+            print_stage("extract", sequential)
+            print_stage(f"extract ({args.workers} proc)", parallel)
+            print_stage("extract (caché)", cached)
+
+            prompts, compact = bench_compact([texts[path] for path in paths])
+            results["stages"]["compact"] = compact
+            print_stage("compact", compact)
+            print(f"  {'':<18} {compact['tokens_after']} de {compact['tokens_before']} tokens estimados")
+
+            analyses, analyze = bench_analyze(prompts, args)
+            results["stages"]["analyze"] = analyze
+            print_stage("analyze", analyze)
+
+            items = [(path, texts[path], analysis) for path, analysis in zip(paths, analyses)
+                     if "error" not in analysis]
+            results["stages"]["write"] = bench_write(items, folder)
+            print_stage("write", results["stages"]["write"])
+
+        if not args.skip_api:
+            sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+            data_dir = args.data_dir or folder
+            os.makedirs(data_dir, exist_ok=True)
+            results["api"] = bench_api(sizes, data_dir, args.requests, args.seed)
+
+    output = args.output or os.path.join(BENCH_DIR, "results", f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\n📄 Resultados guardados en {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Genera CVs en PDF sintéticos (con ReportLab) para pruebas y benchmarks.
+
+Cada CV tiene datos de contacto, perfil, entre 2 y 5 experiencias con tareas,
+formación, habilidades e idiomas, y ocupa de una a tres páginas como un CV
+real. Con la misma semilla se generan siempre los mismos archivos.
+
+    python benchmarks/cv_generator.py --count 200 --out cvs_bench
+"""
+import argparse
+import os
+import random
+import time
+from xml.sax.saxutils import escape
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+FIRST_NAMES = ["José", "María", "Lucía", "Andrés", "Camila", "Mateo", "Valentina", "Sebastián",
+               "Ana", "Diego", "Sofía", "Martín", "Daniela", "Nicolás", "Paula", "Tomás"]
+LAST_NAMES = ["García", "Rodríguez", "Martínez", "López", "González", "Pérez", "Sánchez", "Ramírez",
+              "Torres", "Flores", "Rivera", "Gómez", "Díaz", "Muñoz", "Rojas", "Castillo"]
+ROLES = {
+    "Tecnología": (["Desarrollador Backend", "Desarrolladora Frontend", "Ingeniero de Datos",
+                    "DevOps Engineer", "Analista QA", "Científica de Datos"],
+                   ["Python", "Java", "JavaScript", "TypeScript", "React", "Node.js", "Docker",
+                    "Kubernetes", "AWS", "SQL", "PostgreSQL", "MongoDB", "Git", "Linux", "FastAPI",
+                    "Django", "Spark", "TensorFlow", "Terraform", "CI/CD"]),
+    "Marketing": (["Especialista en Marketing Digital", "Community Manager", "Analista SEO"],
+                  ["Google Analytics", "SEO", "SEM", "Meta Ads", "HubSpot", "Copywriting",
+                   "Canva", "Excel", "Power BI", "Email marketing"]),
+    "Finanzas": (["Analista Financiero", "Contadora", "Controller"],
+                 ["Excel", "SAP", "Power BI", "Contabilidad", "Presupuestos", "NIIF",
+                  "Análisis financiero", "SQL", "Tesorería"]),
+    "Diseño": (["Diseñadora UX/UI", "Diseñador Gráfico"],
+               ["Figma", "Adobe XD", "Photoshop", "Illustrator", "Prototipado", "Design Thinking",
+                "HTML", "CSS", "Investigación de usuarios"]),
+}
+COMPANIES = ["Globant", "Mercado Libre", "Accenture", "BBVA", "Telefónica", "Rappi", "Falabella",
+             "Banco de Bogotá", "Indra", "Everis", "Bancolombia", "Despegar", "Nubank", "Oracle"]
+TASKS = ["Diseñé e implementé servicios para {skill} con foco en rendimiento y mantenibilidad.",
+         "Lideré la migración de sistemas heredados a {skill}, reduciendo costes un {n}%.",
+         "Coordiné un equipo de {n} personas usando metodologías ágiles (Scrum, Kanban).",
+         "Automaticé procesos manuales con {skill}, ahorrando {n} horas al mes.",
+         "Analicé métricas del negocio y presenté informes a la dirección con {skill}.",
+         "Colaboré con clientes internos para definir requisitos y priorizar el backlog.",
+         "Mejoré la cobertura de pruebas hasta el {n}% e introduje revisiones de código."]
+DEGREES = ["Ingeniería de Sistemas", "Ingeniería Informática", "Administración de Empresas",
+           "Contaduría Pública", "Diseño Gráfico", "Economía", "Publicidad y Marketing"]
+UNIVERSITIES = ["Universidad Nacional", "Universidad de los Andes", "Pontificia Universidad Javeriana",
+                "Universidad de Buenos Aires", "Universidad Complutense de Madrid", "UNAM"]
+LANGUAGES = ["Inglés (B2)", "Inglés (C1)", "Portugués (B1)", "Francés (A2)", "Alemán (A2)"]
+
+_styles = getSampleStyleSheet()
+
+
+def cv_data(index, rng):
+    """Datos de un CV (también sirven como respuesta esperada del análisis)"""
+    area = rng.choice(list(ROLES))
+    titles, skills = ROLES[area]
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    years = rng.randint(0, 18)
+    chosen = rng.sample(skills, min(len(skills), rng.randint(5, 12)))
+    jobs = []
+    year = 2025
+    for _ in range(rng.randint(2, 5)):
+        length = rng.randint(1, 4)
+        tasks = [rng.choice(TASKS).format(skill=rng.choice(chosen), n=rng.randint(2, 60))
+                 for _ in range(rng.randint(2, 6))]
+        jobs.append({"title": rng.choice(titles), "company": rng.choice(COMPANIES),
+                     "period": f"{year - length} - {year}", "tasks": tasks})
+        year -= length
+    return {
+        "nombre": f"{first} {last}",
+        "email": f"{first.lower()}.{last.lower()}{index}@example.com".encode("ascii", "ignore").decode(),
+        "telefono": f"+57 3{rng.randint(0, 99):02d} {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+        "titulo": rng.choice(titles),
+        "area": area,
+        "anios": years,
+        "perfil": (f"Profesional con {years} años de experiencia en {area.lower()}. "
+                   f"Especialista en {', '.join(chosen[:3])}. "
+                   + " ".join(rng.choice(TASKS).format(skill=rng.choice(chosen), n=rng.randint(2, 60))
+                              for _ in range(rng.randint(1, 3)))),
+        "skills": chosen,
+        "jobs": jobs,
+        "formacion": f"{rng.choice(DEGREES)} - {rng.choice(UNIVERSITIES)} ({year - 5} - {year - 1})",
+        "idiomas": ["Español (nativo)"] + rng.sample(LANGUAGES, rng.randint(0, 2)),
+    }
+
+
+def write_cv_pdf(path, data):
+    doc = SimpleDocTemplate(path, pagesize=A4, leftMargin=2 * cm, rightMargin=2 * cm,
+                            topMargin=1.5 * cm, bottomMargin=1.5 * cm, title=data["nombre"])
+    normal, heading = _styles["Normal"], _styles["Heading2"]
+    elements = [
+        Paragraph(escape(data["nombre"]), _styles["Title"]),
+        Paragraph(f"{escape(data['titulo'])} | {escape(data['email'])} | {escape(data['telefono'])}", normal),
+        Spacer(1, 0.4 * cm),
+        Paragraph("Perfil profesional", heading),
+        Paragraph(escape(data["perfil"]), normal),
+        Paragraph("Experiencia laboral", heading),
+    ]
+    for job in data["jobs"]:
+        elements.append(Paragraph(f"<b>{escape(job['title'])}</b> - {escape(job['company'])} "
+                                  f"({job['period']})", normal))
+        elements.extend(Paragraph(f"• {escape(task)}", normal) for task in job["tasks"])
+        elements.append(Spacer(1, 0.2 * cm))
+    elements += [
+        Paragraph("Formación", heading),
+        Paragraph(escape(data["formacion"]), normal),
+        Paragraph("Habilidades", heading),
+        Paragraph(escape(", ".join(data["skills"])), normal),
+        Paragraph("Idiomas", heading),
+        Paragraph(escape(", ".join(data["idiomas"])), normal),
+    ]
+    doc.build(elements)
+
+
+def generate_cvs(folder, count, seed=42):
+    """Genera count PDFs en folder; devuelve [(ruta, datos)]"""
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(seed)
+    generated = []
+    for index in range(count):
+        data = cv_data(index, rng)
+        path = os.path.join(folder, f"cv_{index:05d}.pdf")
+        write_cv_pdf(path, data)
+        generated.append((path, data))
+    return generated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera CVs sintéticos en PDF")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--out", default="cvs_bench")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    generate_cvs(args.out, args.count, args.seed)
+    print(f"✅ {args.count} CVs generados en {args.out}/ ({time.perf_counter() - start:.1f} s)")
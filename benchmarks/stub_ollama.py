@@ -0,0 +1,151 @@
+"""Servidor HTTP que imita /api/generate de Ollama para pruebas y benchmarks.
+
+Responde en streaming (NDJSON) con un bloque <think>, un objeto JSON con los
+campos del análisis y texto sobrante, como hace DeepSeek-R1.
+
+    python benchmarks/stub_ollama.py --port 11435 --latency 0.5 --token-delay 0.005 --prompt-delay 0.0005
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fake_analysis(prompt):
+    """Análisis determinista a partir del prompt"""
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return {
+        "nombre": f"Candidato {digest[:6]}",
+        "email": f"{digest[:8]}@example.com",
+        "perfil": "Desarrollador con experiencia en proyectos web",
+        "skills": ["Python", "Docker", "SQL"],
+        "experiencia": "3 años en desarrollo backend",
+        "seniority": "Mid",
+        "area_profesional": "Tecnología",
+        "match": int(digest[:2], 16) % 101
+    }
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": self.server.model}]})
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            fail = server.fail_every and server.requests % server.fail_every == 0
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            if fail:
+                self._send_json({"error": "fallo simulado"}, status=500)
+            else:
+                self._generate(request)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _generate(self, request):
+        server = self.server
+        # Coste fijo por petición más la lectura del prompt (~4 caracteres por token)
+        time.sleep(server.latency + server.prompt_delay * len(request.get("prompt", "")) / 4)
+        body = server.respond(request.get("prompt", ""))
+        tokens = ["<think>", "\nAnalizando el CV...\n", "</think>", "\n"]
+        tokens += [body[i:i + 4] for i in range(0, len(body), 4)]
+        tokens += ["\n", "Fin del análisis."]
+
+        if not request.get("stream", True):
+            time.sleep(server.token_delay * len(tokens))
+            self._send_json({"response": "".join(tokens), "done": True,
+                             "prompt_eval_count": len(request.get("prompt", "")) // 4,
+                             "eval_count": len(tokens)})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for token in tokens:
+                self._write_chunk({"model": request.get("model"), "response": token, "done": False})
+                time.sleep(server.token_delay)
+            self._write_chunk({"model": request.get("model"), "response": "", "done": True,
+                               "prompt_eval_count": len(request.get("prompt", "")) // 4,
+                               "eval_count": len(tokens)})
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # El cliente cortó el stream al recibir el JSON completo
+            with server.lock:
+                server.cancelled += 1
+
+    def _write_chunk(self, data):
+        line = (json.dumps(data, ensure_ascii=False) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_stub_server(port=0, latency=0.0, token_delay=0.0, fail_every=0,
+                      model="deepseek-r1:1.5b", respond=None, prompt_delay=0.0):
+    """Arranca el servidor en un hilo y lo devuelve; su URL está en server.url.
+
+    respond(prompt) permite cambiar el cuerpo JSON devuelto (por defecto un
+    análisis de un único CV)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubOllamaHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.token_delay = token_delay
+    server.prompt_delay = prompt_delay
+    server.fail_every = fail_every
+    server.model = model
+    server.respond = respond or (lambda prompt: json.dumps(fake_analysis(prompt), ensure_ascii=False))
+    server.requests = 0
+    server.cancelled = 0
+    # Peticiones atendiéndose a la vez (y el máximo alcanzado)
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.lock = threading.Lock()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor falso de Ollama")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.0, help="segundos antes del primer token")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="segundos entre tokens")
+    parser.add_argument("--prompt-delay", type=float, default=0.0, help="segundos por token del prompt")
+    parser.add_argument("--fail-every", type=int, default=0, help="devolver error 500 cada N peticiones")
+    args = parser.parse_args()
+    server = start_stub_server(args.port, args.latency, args.token_delay, args.fail_every,
+                               prompt_delay=args.prompt_delay)
+    print(f"🧪 Ollama falso escuchando en {server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,146 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+
+# Tamaño total de las entradas, mantenido por triggers en la propia base de
+# datos: varios procesos (el pool de extracción) escriben en la misma caché
+SIZE_SCHEMA = """
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+CREATE TRIGGER IF NOT EXISTS entries_size_ai AFTER INSERT ON entries BEGIN
+    UPDATE meta SET value = value + new.size WHERE key = 'total_bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS entries_size_au AFTER UPDATE OF size ON entries BEGIN
+    UPDATE meta SET value = value + new.size - old.size WHERE key = 'total_bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS entries_size_ad AFTER DELETE ON entries BEGIN
+    UPDATE meta SET value = value - old.size WHERE key = 'total_bytes';
+END;
+INSERT OR IGNORE INTO meta (key, value) SELECT 'total_bytes', COALESCE(SUM(size), 0) FROM entries;
+COMMIT;
+"""
+
+
+class BlobCache:
+    """Caché clave -> valor en un archivo SQLite, comprimida con zlib y con
+    expulsión LRU cuando el tamaño total supera max_bytes"""
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connect(self):
+        # Se abre en el primer uso para no crear el archivo si la caché no se usa,
+        # y de nuevo en cada proceso hijo (una conexión SQLite no sobrevive a fork)
+        if self._conn is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_last_access ON entries (last_access)")
+            self._conn.commit()
+            self._conn.executescript(SIZE_SCHEMA)
+        return self._conn
+
+    def _total_bytes(self, conn):
+        return conn.execute("SELECT value FROM meta WHERE key = 'total_bytes'").fetchone()[0]
+
+    def get(self, key, count=True):
+        """Devuelve los bytes guardados para key, o None si no están. Con
+        count=False no cuenta el acierto o fallo (quien consulta varias claves
+        para un mismo elemento lo anota después con record)"""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                if count:
+                    self.misses += 1
+                return None
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+            if count:
+                self.hits += 1
+        return zlib.decompress(row[0])
+
+    def set(self, key, value):
+        blob = zlib.compress(value, 6)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            # UPSERT y no INSERT OR REPLACE: el borrado implícito de REPLACE no dispara los triggers
+            conn.execute(
+                "INSERT INTO entries (key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                "created_at = excluded.created_at, last_access = excluded.last_access",
+                (key, blob, len(blob), now, now)
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def get_json(self, key, count=True):
+        value = self.get(key, count)
+        return json.loads(value.decode("utf-8")) if value is not None else None
+
+    def set_json(self, key, data):
+        self.set(key, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+    def _evict(self, conn):
+        # Borrar las entradas menos usadas hasta volver a estar bajo el límite; el
+        # total se lee dentro de la transacción de escritura, con lo que hayan
+        # guardado los demás procesos
+        total = self._total_bytes(conn)
+        while total > self.max_bytes:
+            rows = conn.execute("SELECT key, size FROM entries ORDER BY last_access LIMIT 100").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+    def record(self, hit):
+        """Cuenta un acierto o fallo de una consulta hecha con count=False o en
+        otro proceso (el pool de extracción)"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM entries")
+            conn.commit()
+
+    def stats(self):
+        with self._lock:
+            conn = self._connect()
+            entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "path": self.path,
+                "entries": entries,
+                "size_bytes": self._total_bytes(conn),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else None
+            }
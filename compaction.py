@@ -0,0 +1,271 @@
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+from metrics import observe
+
+try:
+    import spacy
+except ImportError:
+    spacy = None
+
+# Tokens del CV que se envían al LLM (0 = enviar el texto sin compactar)
+PROMPT_TOKEN_BUDGET = int(os.environ.get("CV_PROMPT_TOKENS", "1500"))
+# Aproximación para texto en español; el número real lo informa Ollama al terminar la
+# respuesta (cv_llm_prompt_tokens con source=ollama, o source=estimate si se cortó antes)
+CHARS_PER_TOKEN = 3.5
+
+# Palabras con las que empiezan los títulos de sección (en minúsculas y sin tildes)
+SECTION_HEADINGS = {
+    "contacto": r"datos (?:personales|de contacto)|contacto|informacion personal|contact|personal (?:details|information)",
+    "perfil": r"perfil|resumen|sobre mi|acerca de mi|objetivo|presentacion|summary|profile|about me",
+    "experiencia": r"experiencias?|historial (?:laboral|profesional)|trayectoria|experience|employment",
+    "formacion": r"formacion(?! complementaria)|educacion|estudios|titulacion(?:es)?|education|academic",
+    "habilidades": r"habilidades|competencias|conocimientos|aptitudes|herramientas|tecnologias|skills",
+    "idiomas": r"idiomas|lenguas|languages",
+    "complementos": r"cursos|formacion complementaria|certificaciones|certificados|logros|proyectos"
+                    r"|publicaciones|premios|certifications|projects|awards",
+    "otros": r"referencias|intereses|hobbies|aficiones|voluntariado|references|interests|otros|otras",
+}
+# Parte del presupuesto reservada a cada sección; lo que una no usa pasa a las
+# demás en este orden de prioridad
+SECTION_SHARES = {
+    "experiencia": 0.38, "habilidades": 0.15, "perfil": 0.12, "formacion": 0.12,
+    "contacto": 0.08, "idiomas": 0.04, "complementos": 0.08, "otros": 0.03,
+}
+
+# Título: la palabra clave sola ("Idiomas", "Mis estudios", "2. Habilidades") o con
+# un calificativo habitual ("Experiencia laboral", "Formación académica"). Con más
+# palabras solo es título en mayúsculas ("CONOCIMIENTOS DE INFORMÁTICA") o acabado en
+# dos puntos, con o sin el contenido en la misma línea ("Idiomas: inglés (B2)");
+# "Experiencia en soporte técnico" es contenido
+_HEADING_RE = re.compile(
+    r"^(?:\d+[.)]?\s*)?(?:mis?\s+|otr[oa]s\s+)?(?:"
+    + "|".join(f"(?P<{name}>{pattern})" for name, pattern in SECTION_HEADINGS.items())
+    + r")\b(?P<extra>(?:\s+[^\W\d]+\.?){0,3})\s*(?::\s*(?P<rest>.*))?$"
+)
+_QUALIFIER_RE = re.compile(
+    r"(?:\s+(?:y|e|de|laboral(?:es)?|profesional(?:es)?|academica|tecnic[oa]s?|personales|relevantes?"
+    r"|adicional(?:es)?|clave|principales|informaticos|obtenidos|realizados|professional|work|technical"
+    r"|additional|key))*"
+)
+_BOILERPLATE_RE = re.compile(
+    r"^(?:(?:pagina|page|pag\.?)\s*\d+(?:\s*(?:de|of|/)\s*\d+)?"
+    r"|-\s*\d{1,3}\s*-|\d{1,3}\s*/\s*\d{1,3}"
+    r"|curriculum(?: vitae)?|cv|hoja de vida|resume"
+    r"|referencias (?:disponibles )?(?:a|bajo|por|previa) (?:peticion|solicitud)"
+    r"|references available(?: upon| on)? request"
+    r"|[\W_]+)$"
+)
+# Número suelto en una línea: solo se toma por número de página si hay varios
+# (uno por página); uno solo puede ser un dato del CV
+_PAGE_NUMBER_RE = re.compile(r"^\d{1,3}$")
+_CONTACT_RE = re.compile(r"@|https?://|www\.|linkedin|\+?\d[\d\s().-]{7,}\d")
+_SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+")
+
+
+def estimate_tokens(text):
+    return round(len(text) / CHARS_PER_TOKEN)
+
+
+def _fold(line):
+    normalized = unicodedata.normalize("NFKD", line.lower())
+    return "".join(c for c in normalized if not unicodedata.combining(c))
+
+
+class SentenceSplitter:
+    """Frases de un párrafo con el sentencizer de spaCy (pipeline en blanco,
+    no necesita modelo) o, sin spaCy, con una expresión regular"""
+
+    def __init__(self):
+        self._nlp = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def split(self, text):
+        with self._lock:
+            if not self._loaded:
+                if spacy is not None:
+                    self._nlp = spacy.blank("es")
+                    self._nlp.add_pipe("sentencizer")
+                self._loaded = True
+            if self._nlp is not None:
+                return [sentence.text for sentence in self._nlp(text).sents]
+        return _SENTENCE_RE.split(text)
+
+
+sentence_splitter = SentenceSplitter()
+
+
+def _heading(line, folded):
+    """Match de _HEADING_RE si la línea es un título de sección, si no None"""
+    match = _HEADING_RE.match(folded) if len(line) <= 60 else None
+    if match is None:
+        return None
+    if match.group("rest") is not None and ":" in line:
+        return match
+    if _QUALIFIER_RE.fullmatch(match.group("extra")):
+        return match
+    letters = [c for c in line if c.isalpha()]
+    return match if all(c.isupper() for c in letters) else None
+
+
+def _filler(lines):
+    """Predicado para las líneas de relleno (números de página, "Curriculum
+    Vitae"...) de lines, ya sin espacios repetidos"""
+    page_numbers = sum(1 for line in lines if _PAGE_NUMBER_RE.match(line)) >= 2
+
+    def is_filler(line, folded):
+        # Teléfonos, correos y enlaces nunca son relleno
+        return not _CONTACT_RE.search(folded) and bool(
+            _BOILERPLATE_RE.match(folded) or (page_numbers and _PAGE_NUMBER_RE.match(folded)))
+    return is_filler
+
+
+def strip_boilerplate(text):
+    """El texto sin las líneas de relleno ni los encabezados y pies repetidos,
+    con el resto de líneas tal cual"""
+    raw_lines = text.splitlines()
+    lines = [" ".join(line.split()) for line in raw_lines]
+    counts = Counter(line for line in lines if line)
+    is_filler = _filler([line for line in lines if line])
+    kept = []
+    seen = set()
+    for raw, line in zip(raw_lines, lines):
+        if line:
+            folded = _fold(line)
+            if is_filler(line, folded):
+                continue
+            if line in seen and (counts[line] >= 3 or _CONTACT_RE.search(folded)):
+                continue
+            seen.add(line)
+        kept.append(raw)
+    return "\n".join(kept).strip()
+
+
+def split_sections(text):
+    """[(sección, título, líneas)] en el orden del documento, sin líneas de
+    relleno (números de página, "Curriculum Vitae"...), sin encabezados y pies
+    repetidos y con las secciones repetidas (un título por página) unidas"""
+    lines = [" ".join(line.split()) for line in text.splitlines()]
+    lines = [line for line in lines if line]
+    counts = Counter(lines)
+    is_filler = _filler(lines)
+    sections = []
+    by_name = {}
+    current = by_name["contacto"] = ["contacto", None, []]  # Lo anterior al primer título
+    sections.append(current)
+    seen = set()
+    for line in lines:
+        folded = _fold(line)
+        if is_filler(line, folded):
+            continue
+        match = _heading(line, folded)
+        if match:
+            name = next(key for key in SECTION_HEADINGS if match.group(key))
+            rest = match.group("rest")
+            current = by_name.get(name)
+            if current is None:
+                current = by_name[name] = [name, line.split(":")[0].strip() if rest is not None else line, []]
+                sections.append(current)
+            elif current[1] is None:
+                current[1] = line
+            if rest:
+                current[2].append(line.split(":", 1)[1].strip())
+            continue
+        # Encabezados y pies de página: líneas que se repiten en cada página
+        if line in seen and (counts[line] >= 3 or _CONTACT_RE.search(folded)):
+            continue
+        seen.add(line)
+        current[2].append(line)
+    return [tuple(section) for section in sections if section[2]]
+
+
+def _fit(lines, limit):
+    """Primeras líneas (o frases de la última) que caben en limit caracteres"""
+    kept = []
+    used = 0
+    for line in lines:
+        if used + len(line) + 1 <= limit:
+            kept.append(line)
+            used += len(line) + 1
+            continue
+        partial = []
+        for sentence in sentence_splitter.split(line):
+            if used + len(sentence) + 1 > limit:
+                break
+            partial.append(sentence)
+            used += len(sentence) + 1
+        if partial:
+            kept.append(" ".join(partial))
+        elif limit - used > 40:
+            kept.append(line[:limit - used - 2].rsplit(" ", 1)[0] + " …")
+        break
+    return kept
+
+
+def _fit_contact(lines, limit):
+    """Como _fit, pero conserva primero el nombre (la primera línea) y las
+    líneas con correo, teléfono o enlaces, que el LLM necesita extraer"""
+    order = [0] + [i for i, line in enumerate(lines) if i and _CONTACT_RE.search(line)]
+    order += [i for i in range(len(lines)) if i not in order]
+    kept = set()
+    used = 0
+    for index in order:
+        if used + len(lines[index]) + 1 <= limit:
+            kept.add(index)
+            used += len(lines[index]) + 1
+    return [line for i, line in enumerate(lines) if i in kept]
+
+
+def compact_cv(text, budget=None):
+    """Texto del CV para el prompt, ajustado a budget tokens (por defecto
+    CV_PROMPT_TOKENS) dando prioridad a experiencia, habilidades y perfil.
+
+    Devuelve (texto, info) con los tokens estimados antes y después, los
+    ahorrados y las secciones detectadas y recortadas.
+    """
+    budget = PROMPT_TOKEN_BUDGET if budget is None else budget
+    before = estimate_tokens(text)
+    if not budget:
+        return text, {"tokens_before": before, "tokens_after": before, "tokens_saved": 0,
+                      "sections": [], "trimmed": []}
+
+    sections = split_sections(text)
+    if before <= budget:
+        # Ya cabe: no se reordena ni se recorta nada, solo se quita el relleno
+        compacted = strip_boilerplate(text)
+        after = estimate_tokens(compacted)
+        observe("cv_prompt_tokens_saved", before - after)
+        return compacted, {"tokens_before": before, "tokens_after": after, "tokens_saved": before - after,
+                           "sections": [name for name, _, _ in sections], "trimmed": []}
+
+    needs = {name: sum(len(line) + 1 for line in lines) for name, _, lines in sections}
+    limit = int(budget * CHARS_PER_TOKEN)
+    # Sin títulos reconocibles todo el texto queda en una sola sección
+    shares = SECTION_SHARES if len(sections) > 1 else {name: 1.0 for name in needs}
+    allowed = {name: min(needs[name], int(limit * shares.get(name, 0))) for name in needs}
+    spare = limit - sum(allowed.values())
+    for name in sorted(needs, key=list(SECTION_SHARES).index):
+        extra = min(spare, needs[name] - allowed[name])
+        allowed[name] += extra
+        spare -= extra
+
+    parts = []
+    trimmed = []
+    for name, heading, lines in sections:
+        if allowed[name] < needs[name]:
+            trimmed.append(name)
+            limit = allowed[name] - (len(heading) + 1 if heading else 0)
+            lines = _fit_contact(lines, limit) if name == "contacto" else _fit(lines, limit)
+        if not lines:
+            continue
+        parts.append("\n".join([heading] + lines if heading else lines))
+    compacted = "\n\n".join(parts)
+
+    after = estimate_tokens(compacted)
+    observe("cv_prompt_tokens_saved", max(before - after, 0))
+    return compacted, {"tokens_before": before, "tokens_after": after, "tokens_saved": max(before - after, 0),
+                       "sections": [name for name, _, _ in sections], "trimmed": trimmed}
@@ -1,8 +1,48 @@
-from models import Base, engine
-
-def init_db():
-    Base.metadata.create_all(bind=engine)
-    print("✅ Base de datos creada")
-
-if __name__ == "__main__":
-    init_db()
+from sqlalchemy import inspect, text
+from documents import ensure_document_triggers, migrate_cv_text
+from models import Base, engine
+from search import ensure_fts
+from skills import backfill_skills, ensure_skill_triggers
+
+def migrate_db():
+    """Añade columnas e índices nuevos a bases de datos ya existentes"""
+    inspector = inspect(engine)
+    existing_tables = inspector.get_table_names()
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+                    print(f"🔧 Columna añadida: {table.name}.{column.name}")
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        # Los registros antiguos sin match rompen el orden de la paginación
+        conn.execute(text("UPDATE candidates SET match = 0 WHERE match IS NULL"))
+    # El texto de los CVs estaba en candidates.cv_text (recortado a 15000 caracteres)
+    moved = migrate_cv_text()
+    if moved is not None:
+        print(f"🗜️ Texto de {moved} CVs movido a candidate_documents (comprimido)")
+
+def init_db():
+    Base.metadata.create_all(bind=engine)
+    migrate_db()
+    if ensure_fts():
+        print("🔎 Índice de búsqueda de texto completo creado")
+    ensure_skill_triggers()
+    ensure_document_triggers()
+    with engine.connect() as conn:
+        missing_skills = conn.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM candidates) AND NOT EXISTS (SELECT 1 FROM candidate_skills)"
+        )).scalar()
+    if missing_skills:
+        print(f"🏷️ Habilidades normalizadas para candidatos existentes ({backfill_skills()} relaciones)")
+    print("✅ Base de datos creada")
+
+if __name__ == "__main__":
+    init_db()
@@ -0,0 +1,173 @@
+import os
+import threading
+import time
+import traceback
+
+from sqlalchemy import insert, tuple_
+from sqlalchemy.exc import IntegrityError
+
+from documents import candidate_columns, pack_document, store_documents
+from models import Candidate, engine as default_engine
+from metrics import observe, set_gauge, span
+from skills import index_candidate_skills
+
+# Candidatos por inserción y espera máxima antes de guardar un lote incompleto
+WRITE_BATCH_SIZE = int(os.environ.get("CV_WRITE_BATCH", "200"))
+WRITE_INTERVAL = float(os.environ.get("CV_WRITE_INTERVAL", "1.0"))
+
+candidates_table = Candidate.__table__
+
+
+class BatchWriter:
+    """Acumula candidatos y los inserta en bloque en una sola transacción.
+
+    Se puede usar desde varios hilos: add() solo toma un lock para añadir al
+    buffer y las inserciones se serializan. El lote se guarda al llegar a
+    batch_size filas o, desde un hilo en segundo plano, cuando la fila más
+    antigua lleva flush_interval segundos esperando.
+
+    on_done(state, candidate_id, seconds, error) se llama por fila tras el
+    commit con state "saved" o "skipped" (ya existía el mismo PDF para el mismo
+    rol), o "failed" con el error si falló la transacción.
+    """
+
+    def __init__(self, engine=None, batch_size=None, flush_interval=None):
+        self.engine = engine or default_engine
+        self.batch_size = batch_size or WRITE_BATCH_SIZE
+        self.flush_interval = flush_interval or WRITE_INTERVAL
+        self.flushes = 0
+        self.rows_written = 0
+        self.flush_seconds = 0.0
+        self.max_buffered = 0
+        self._buffer = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._timer = None
+
+    def add(self, row, on_done=None):
+        """Encola una fila (columnas de Candidate más cv_text y llm_output, como candidate_row)"""
+        # Los textos se comprimen aquí, en el hilo que produce la fila, y no en el que escribe
+        document = pack_document(row)
+        with self._lock:
+            self._buffer.append((row, document, on_done))
+            if self._oldest is None:
+                self._oldest = time.time()
+            self.max_buffered = max(self.max_buffered, len(self._buffer))
+            set_gauge("cv_pipeline_queue_depth", len(self._buffer), queue="write")
+            full = len(self._buffer) >= self.batch_size
+            if self._timer is None:
+                self._timer = threading.Thread(target=self._flush_periodically, name="cv-db-writer", daemon=True)
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def _flush_periodically(self):
+        while not self._closed.wait(min(self.flush_interval, 0.25)):
+            with self._lock:
+                due = self._oldest is not None and time.time() - self._oldest >= self.flush_interval
+            if due:
+                try:
+                    self.flush()
+                except Exception:
+                    traceback.print_exc()
+
+    def flush(self):
+        """Guarda lo acumulado; devuelve el número de filas procesadas"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+                self._oldest = None
+            if not batch:
+                return 0
+            set_gauge("cv_pipeline_queue_depth", 0, queue="write")
+            observe("cv_db_batch_rows", len(batch))
+            start = time.time()
+            try:
+                results = self._insert(batch)
+            except IntegrityError:
+                # Otro proceso guardó alguna fila a la vez: repetir de una en una, cada
+                # una en su transacción y con su propio resultado
+                results = [self._insert_one(item) for item in batch]
+            except Exception as e:
+                traceback.print_exc()
+                results = [("failed", None, str(e))] * len(batch)
+            seconds = time.time() - start
+            self.flushes += 1
+            self.flush_seconds += seconds
+            self.rows_written += sum(1 for state, _, _ in results if state == "saved")
+
+        for (row, _, on_done), (state, candidate_id, error) in zip(batch, results):
+            if on_done is not None:
+                try:
+                    on_done(state, candidate_id, seconds / len(batch), error)
+                except Exception:
+                    traceback.print_exc()
+        return len(batch)
+
+    def _insert_one(self, item):
+        try:
+            return self._insert([item])[0]
+        except IntegrityError:
+            # El mismo PDF y rol guardado por otro proceso entre la comprobación y el INSERT
+            return ("skipped", None, None)
+        except Exception as e:
+            traceback.print_exc()
+            return ("failed", None, str(e))
+
+    def _insert(self, batch):
+        rows = [row for row, _, _ in batch]
+        with span("cv_db_commit_seconds", path="batch"), self.engine.begin() as conn:
+            # Filas cuyo par (hash, rol) ya está guardado o repetido en el lote
+            keys = [(r.get("file_hash"), r.get("role_fingerprint")) for r in rows]
+            hashed = list({k for k in keys if k[0] is not None})
+            existing = set()
+            for i in range(0, len(hashed), 400):
+                chunk = hashed[i:i + 400]
+                existing.update(conn.execute(
+                    candidates_table.select()
+                    .with_only_columns(candidates_table.c.file_hash, candidates_table.c.role_fingerprint)
+                    .where(tuple_(candidates_table.c.file_hash, candidates_table.c.role_fingerprint).in_(chunk))
+                ).all())
+
+            to_insert = []
+            seen = set()
+            for index, (row, key) in enumerate(zip(rows, keys)):
+                if key[0] is not None and (key in existing or key in seen):
+                    continue
+                seen.add(key)
+                to_insert.append(index)
+
+            results = [("skipped", None, None)] * len(rows)
+            if to_insert:
+                # INSERT multi-fila con RETURNING: un solo viaje por lote y los ids en orden
+                ids = conn.execute(
+                    insert(candidates_table).returning(candidates_table.c.id, sort_by_parameter_order=True),
+                    [candidate_columns(rows[i]) for i in to_insert]
+                ).scalars().all()
+                for index, candidate_id in zip(to_insert, ids):
+                    results[index] = ("saved", candidate_id, None)
+                # Habilidades normalizadas en la misma transacción que los candidatos
+                index_candidate_skills(conn, [(candidate_id, rows[index].get("skills"))
+                                              for index, candidate_id in zip(to_insert, ids)])
+                # Y el texto del CV comprimido, en su tabla, y el índice de búsqueda
+                store_documents(conn, [(candidate_id, rows[index], batch[index][1])
+                                       for index, candidate_id in zip(to_insert, ids)])
+            return results
+
+    def close(self):
+        """Guarda lo pendiente y detiene el hilo de fondo"""
+        self._closed.set()
+        if self._timer is not None:
+            self._timer.join()
+        self.flush()
+
+    def stats(self):
+        return {
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "flush_seconds": round(self.flush_seconds, 3),
+            "buffered": len(self._buffer),
+            "max_buffered": self.max_buffered
+        }
@@ -0,0 +1,148 @@
+import json
+import sqlite3
+import sys
+
+from sqlalchemy import inspect, text
+
+from models import engine as default_engine, pack_text, unpack_text
+from search import drop_fts, index_candidates
+
+# Campos de candidate_row que se guardan comprimidos en candidate_documents
+DOCUMENT_FIELDS = ("cv_text", "llm_output")
+
+DOCUMENT_TRIGGERS = [
+    # Al borrar un candidato se borra su documento
+    """CREATE TRIGGER IF NOT EXISTS candidates_documents_ad AFTER DELETE ON candidates BEGIN
+        DELETE FROM candidate_documents WHERE candidate_id = old.id;
+    END""",
+]
+
+
+def ensure_document_triggers(engine=None):
+    engine = engine or default_engine
+    with engine.begin() as conn:
+        for statement in DOCUMENT_TRIGGERS:
+            conn.execute(text(statement))
+
+
+def llm_output(analysis):
+    """Respuesta del LLM a guardar con el candidato: el texto crudo si no se
+    pudo leer como JSON o, si no, el objeto tal como llegó (antes de
+    convertir listas y números a texto para las columnas)"""
+    if not analysis:
+        return None
+    if analysis.get("raw"):
+        return analysis["raw"]
+    return json.dumps(analysis, ensure_ascii=False)
+
+
+def candidate_columns(row):
+    """Columnas de candidates de una fila de candidate_row (sin los textos)"""
+    return {key: value for key, value in row.items() if key not in DOCUMENT_FIELDS}
+
+
+def pack_document(row):
+    """(cv_text, llm_output) comprimidos de una fila de candidate_row"""
+    return pack_text(row.get("cv_text")), pack_text(row.get("llm_output"))
+
+
+def store_documents(conn, items):
+    """Guarda [(candidate_id, row, pack_document(row))] usando la conexión dada.
+
+    Todo candidato nuevo necesita su fila (aunque no tenga texto) y entra en
+    el índice de búsqueda con el texto de row, sin comprimir.
+    """
+    params = [(candidate_id, cv_text, output) for candidate_id, _, (cv_text, output) in items]
+    if params:
+        conn.exec_driver_sql(
+            "INSERT INTO candidate_documents (candidate_id, cv_text, llm_output) VALUES (?, ?, ?)", params
+        )
+        index_candidates(conn, [(candidate_id, row) for candidate_id, row, _ in items])
+    return len(params)
+
+
+def load_document(candidate_id, engine=None):
+    """Texto del CV y respuesta del LLM de un candidato; None si no tiene documento"""
+    engine = engine or default_engine
+    with engine.connect() as conn:
+        row = conn.execute(text(
+            "SELECT cv_text, llm_output FROM candidate_documents WHERE candidate_id = :id"
+        ), {"id": candidate_id}).first()
+    if row is None:
+        return None
+    return {"cv_text": unpack_text(row[0]) or "", "llm_output": unpack_text(row[1])}
+
+
+def fetch_with_text(conn, columns, after_id=0, limit=2000):
+    """Filas de candidates con id > after_id en orden de id, con las columnas
+    dadas y el texto del CV descomprimido en "cv_text" (para los índices)"""
+    selected = ", ".join(f"c.{column}" for column in columns)
+    rows = conn.execute(text(
+        f"""SELECT {selected}, d.cv_text FROM candidates c
+            LEFT JOIN candidate_documents d ON d.candidate_id = c.id
+            WHERE c.id > :last ORDER BY c.id LIMIT :size"""
+    ), {"last": after_id, "size": limit}).mappings().all()
+    return [dict(row, cv_text=unpack_text(row["cv_text"])) for row in rows]
+
+
+def document_stats(engine=None):
+    engine = engine or default_engine
+    with engine.connect() as conn:
+        count, stored = conn.execute(text(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(cv_text)), 0) + COALESCE(SUM(LENGTH(llm_output)), 0) "
+            "FROM candidate_documents"
+        )).one()
+    return {"documents": count, "stored_bytes": stored}
+
+
+def migrate_cv_text(engine=None, chunk_size=500):
+    """Pasa la columna candidates.cv_text de bases de datos anteriores a
+    candidate_documents, la elimina y compacta el archivo con VACUUM.
+
+    Devuelve los candidatos migrados, o None si no había nada que migrar. El
+    índice FTS anterior leía esa columna: se elimina aquí y ensure_fts() lo
+    vuelve a crear a partir de los documentos.
+    """
+    engine = engine or default_engine
+    if "cv_text" not in {column["name"] for column in inspect(engine).get_columns("candidates")}:
+        return None
+    # Sin DROP COLUMN (SQLite < 3.35) la columna se queda vacía
+    can_drop = sqlite3.sqlite_version_info >= (3, 35, 0)
+    moved = 0
+    with engine.begin() as conn:
+        if not can_drop and conn.execute(text(
+            """SELECT 1 FROM candidates c WHERE NOT EXISTS
+               (SELECT 1 FROM candidate_documents d WHERE d.candidate_id = c.id) LIMIT 1"""
+        )).first() is None:
+            return None  # Ya migrada
+        drop_fts(conn)
+        last_id = 0
+        while True:
+            rows = conn.execute(text(
+                "SELECT id, cv_text FROM candidates WHERE id > :last ORDER BY id LIMIT :size"
+            ), {"last": last_id, "size": chunk_size}).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            conn.exec_driver_sql(
+                "INSERT OR IGNORE INTO candidate_documents (candidate_id, cv_text) VALUES (?, ?)",
+                [(candidate_id, pack_text(cv_text)) for candidate_id, cv_text in rows]
+            )
+            moved += len(rows)
+        if can_drop:
+            conn.execute(text("ALTER TABLE candidates DROP COLUMN cv_text"))
+        else:
+            conn.execute(text("UPDATE candidates SET cv_text = NULL"))
+    # Las páginas que ocupaba el texto quedan libres: VACUUM las devuelve al disco
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("VACUUM")
+    return moved
+
+
+if __name__ == "__main__":
+    # python documents.py <id> -> texto del CV guardado para ese candidato
+    if len(sys.argv) > 1:
+        document = load_document(int(sys.argv[1]))
+        print(document["cv_text"] if document else "Sin documento para ese candidato")
+    else:
+        print(document_stats())
@@ -0,0 +1,304 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+from documents import fetch_with_text
+from models import engine as default_engine
+from ranking import tokenize
+
+try:
+    import spacy
+except ImportError:
+    spacy = None
+
+SPACY_MODEL = os.environ.get("CV_SPACY_MODEL", "es_core_news_md")
+HASH_DIM = int(os.environ.get("CV_EMBEDDING_DIM", "256"))
+# Caracteres del CV que entran en el embedding (además de skills/perfil/experiencia)
+EMBED_TEXT_CHARS = 5000
+
+
+class Embedder:
+    """Vector por texto: vectores de palabras de spaCy o, si no hay modelo, hashing.
+
+    Con spaCy el vector es la media de los vectores de las palabras
+    (es_core_news_md incluye vectores de 300 dimensiones). Sin spaCy o sin
+    modelo se usa un bag-of-words con feature hashing (palabras y bigramas),
+    que no entiende sinónimos pero no necesita nada más que NumPy. En ambos
+    casos el vector se normaliza para que el coseno sea un producto escalar.
+    """
+
+    def __init__(self, model_name=None):
+        self.model_name = model_name or SPACY_MODEL
+        self._nlp = None
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.name = None
+        self.dim = None
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if spacy is not None:
+                try:
+                    nlp = spacy.load(self.model_name, exclude=["parser", "ner", "lemmatizer", "senter"])
+                    if nlp.vocab.vectors_length:
+                        self._nlp = nlp
+                        self.name = f"spacy:{self.model_name}"
+                        self.dim = nlp.vocab.vectors_length
+                except OSError:
+                    print(f"⚠️ Modelo spaCy {self.model_name} no instalado, se usan embeddings por hashing")
+            if self._nlp is None:
+                self.name = f"hash:{HASH_DIM}"
+                self.dim = HASH_DIM
+            self._loaded = True
+
+    def info(self):
+        self._load()
+        return self.name, self.dim
+
+    def embed(self, value):
+        self._load()
+        if self._nlp is not None:
+            with self._lock:
+                vector = np.asarray(self._nlp(value or "").vector, dtype=np.float32)
+        else:
+            vector = self._hash_vector(value)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def _hash_vector(self, value):
+        vector = np.zeros(HASH_DIM, dtype=np.float32)
+        tokens = tokenize(value)
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % HASH_DIM
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        # tf sublineal para que una palabra repetida no domine el vector
+        return np.sign(vector) * np.log1p(np.abs(vector))
+
+
+def embedding_text(row):
+    """Texto que representa a un candidato (row: diccionario de columnas de Candidate)"""
+    parts = [row.get("skills"), row.get("perfil"), row.get("experiencia"), (row.get("cv_text") or "")[:EMBED_TEXT_CHARS]]
+    return "\n".join(part for part in parts if part)
+
+
+class VectorStore:
+    """Matriz float32 de embeddings en disco, junto a candidates.db.
+
+    <base>.vec guarda un vector por fila, <base>.vec.ids el id de candidato de
+    cada fila y <base>.vec.json el modelo y la dimensión. Los vectores nuevos
+    se añaden al final de los ficheros (sin reescribirlos) y las consultas
+    usan un memmap de solo lectura que se reabre cuando crece.
+    """
+
+    def __init__(self, base_path=None, embedder=None, engine=None):
+        self.engine = engine or default_engine
+        base_path = base_path or os.path.splitext(self.engine.url.database or "candidates.db")[0]
+        self.vec_path = base_path + ".vec"
+        self.ids_path = base_path + ".vec.ids"
+        self.meta_path = base_path + ".vec.json"
+        self.embedder = embedder or Embedder()
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._rows = {}
+        self._checked = False
+
+    def _check_meta(self):
+        """Descarta los ficheros si se crearon con otro modelo o dimensión"""
+        if self._checked:
+            return
+        name, dim = self.embedder.info()
+        meta = {"model": name, "dim": dim}
+        current = None
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, encoding="utf-8") as f:
+                current = json.load(f)
+        if current != meta:
+            for path in (self.vec_path, self.ids_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            with open(self.meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+        self._checked = True
+
+    def _open(self):
+        """(Re)abre el memmap si los ficheros cambiaron de tamaño"""
+        self._check_meta()
+        dim = self.embedder.dim
+        id_rows = os.path.getsize(self.ids_path) // 8 if os.path.exists(self.ids_path) else 0
+        vec_rows = os.path.getsize(self.vec_path) // (4 * dim) if os.path.exists(self.vec_path) else 0
+        count = min(id_rows, vec_rows)
+        # Una escritura interrumpida puede dejar vectores sin id o filas a
+        # medias: se recortan para que lo siguiente quede alineado
+        for path, size in ((self.vec_path, count * 4 * dim), (self.ids_path, count * 8)):
+            if os.path.exists(path) and os.path.getsize(path) != size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+        if self._matrix is not None and len(self._ids) == count:
+            return
+        self._ids = np.fromfile(self.ids_path, dtype=np.int64, count=count) if count else np.zeros(0, dtype=np.int64)
+        self._rows = {int(candidate_id): row for row, candidate_id in enumerate(self._ids)}
+        self._map(count)
+
+    def _map(self, count):
+        if count:
+            self._matrix = np.memmap(self.vec_path, dtype=np.float32, mode="r", shape=(count, self.embedder.dim))
+        else:
+            self._matrix = np.zeros((0, self.embedder.dim), dtype=np.float32)
+
+    def add(self, items):
+        """Añade [(candidate_id, vector)] al final de la matriz"""
+        if not items:
+            return
+        with self._lock:
+            self._open()
+            # Un id ya conocido es un candidato nuevo que reutiliza el id de uno
+            # borrado: su fila se sobrescribe en su sitio
+            existing = [(cid, vec) for cid, vec in items if cid in self._rows]
+            if existing:
+                row_bytes = 4 * self.embedder.dim
+                with open(self.vec_path, "r+b") as f:
+                    for cid, vec in existing:
+                        f.seek(self._rows[cid] * row_bytes)
+                        f.write(np.asarray(vec, dtype=np.float32).tobytes())
+            items = [(cid, vec) for cid, vec in items if cid not in self._rows]
+            if not items:
+                return
+            vectors = np.vstack([vec for _, vec in items]).astype(np.float32)
+            ids = np.array([cid for cid, _ in items], dtype=np.int64)
+            # Primero los vectores: si se corta a medias sobran vectores, no ids
+            with open(self.vec_path, "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self.ids_path, "ab") as f:
+                f.write(ids.tobytes())
+            start = len(self._ids)
+            self._ids = np.concatenate([self._ids, ids])
+            self._rows.update((int(cid), start + n) for n, cid in enumerate(ids))
+            self._map(len(self._ids))
+
+    def add_candidate(self, candidate_id, row):
+        self.add([(candidate_id, self.embedder.embed(embedding_text(row)))])
+
+    def clear(self):
+        with self._lock:
+            for path in (self.vec_path, self.ids_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._matrix = None
+            self._open()
+
+    def sync(self, chunk_size=500):
+        """Calcula los embeddings de los candidatos que aún no tienen; devuelve cuántos"""
+        with self._lock:
+            self._open()
+            known = set(self._rows)
+            if len(known):
+                with self.engine.connect() as conn:
+                    db_ids = set(conn.execute(text("SELECT id FROM candidates")).scalars())
+                if known - db_ids:
+                    # Se borraron candidatos (o se vació la tabla): empezar de cero
+                    for path in (self.vec_path, self.ids_path):
+                        if os.path.exists(path):
+                            os.remove(path)
+                    self._matrix = None
+                    self._open()
+                    known = set()
+        added = 0
+        last_id = 0
+        with self.engine.connect() as conn:
+            while True:
+                rows = fetch_with_text(conn, ("id", "skills", "perfil", "experiencia"), last_id, chunk_size)
+                if not rows:
+                    break
+                last_id = rows[-1]["id"]
+                pending = [row for row in rows if row["id"] not in known]
+                self.add([(row["id"], self.embedder.embed(embedding_text(row))) for row in pending])
+                added += len(pending)
+        return added
+
+    def _top_k(self, query, k, exclude=None):
+        with self._lock:
+            self._open()
+            matrix, ids = self._matrix, self._ids
+        if not len(ids):
+            return []
+        scores = matrix @ query
+        if exclude is not None:
+            scores[self._rows[exclude]] = -np.inf
+        k = min(k, len(ids) - (exclude is not None))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(ids[i]), round(float(scores[i]), 4)) for i in top]
+
+    def similar(self, candidate_id, k=10):
+        """Candidatos más parecidos a uno dado; None si no tiene embedding"""
+        with self._lock:
+            self._open()
+            row = self._rows.get(candidate_id)
+            if row is None:
+                return None
+            query = np.array(self._matrix[row])
+        return self._top_k(query, k, exclude=candidate_id)
+
+    def semantic(self, query_text, k=10):
+        return self._top_k(self.embedder.embed(query_text), k)
+
+    def stats(self):
+        with self._lock:
+            self._open()
+            return {"model": self.embedder.name, "dim": self.embedder.dim, "vectors": len(self._ids)}
+
+
+vector_store = VectorStore()
+
+
+def load_candidates(scored, engine=None):
+    """Completa [(candidate_id, score)] con los datos del candidato, en el mismo orden"""
+    engine = engine or default_engine
+    if not scored:
+        return []
+    params = {f"i{n}": candidate_id for n, (candidate_id, _) in enumerate(scored)}
+    placeholders = ", ".join(f":i{n}" for n in range(len(scored)))
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            f"""SELECT id, nombre, email, skills, seniority, area_profesional, match
+                FROM candidates WHERE id IN ({placeholders})"""
+        ), params).mappings().all()
+    by_id = {row["id"]: dict(row) for row in rows}
+    results = []
+    for candidate_id, score in scored:
+        row = by_id.get(candidate_id)
+        if row is not None:
+            row["similarity"] = score
+            results.append(row)
+    return results
+
+
+if __name__ == "__main__":
+    if "--rebuild" in sys.argv:
+        start = time.time()
+        vector_store.clear()
+        count = vector_store.sync()
+        print(f"✅ Embeddings calculados para {count} candidatos ({vector_store.embedder.name}, {time.time() - start:.1f} s)")
+    elif "--sync" in sys.argv:
+        print(f"✅ {vector_store.sync()} embeddings nuevos")
+    elif len(sys.argv) > 1:
+        query = " ".join(sys.argv[1:])
+        for item in load_candidates(vector_store.semantic(query, 10)):
+            print(f"  [{item['similarity']:.3f}] #{item['id']} {item['nombre']} - {item['skills']}")
+    else:
+        print("Uso: python embeddings.py --rebuild | --sync | <consulta>")
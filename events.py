@@ -0,0 +1,92 @@
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+
+# Eventos que se guardan para los clientes que se reconectan
+EVENT_BUFFER = int(os.environ.get("CV_EVENT_BUFFER", "500"))
+# Un comentario cada tantos segundos mantiene viva la conexión (proxies, navegador)
+KEEPALIVE_SECONDS = 15
+# Campos del candidato que viajan en el evento (los de las tarjetas y el detalle)
+CANDIDATE_EVENT_FIELDS = ("nombre", "email", "perfil", "skills", "seniority", "area_profesional", "match")
+
+
+class EventBus:
+    """Eventos del procesamiento para los clientes de GET /events (Server-Sent Events).
+
+    publish() se puede llamar desde cualquier hilo. Los últimos eventos se
+    guardan en un buffer circular con ids crecientes: un cliente que se
+    reconecta envía Last-Event-ID y recibe lo que se perdió, o un evento
+    "reset" si ya no está en el buffer (debe volver a cargar los datos).
+    """
+
+    def __init__(self, size=None):
+        self._events = deque(maxlen=size or EVENT_BUFFER)
+        self._last_id = 0
+        self._lock = threading.Lock()
+        self._waiters = set()
+
+    def publish(self, event, data):
+        with self._lock:
+            self._last_id += 1
+            event_id = self._last_id
+            self._events.append((event_id, event, json.dumps(data, ensure_ascii=False)))
+            waiters = list(self._waiters)
+        for loop, wakeup in waiters:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                pass  # Event loop ya cerrado
+        return event_id
+
+    def last_id(self):
+        with self._lock:
+            return self._last_id
+
+    def since(self, last_id):
+        """Eventos posteriores a last_id y si la secuencia está completa"""
+        with self._lock:
+            # Un id mayor que el último es de antes de un reinicio del servidor
+            complete = last_id <= self._last_id and (not self._events or self._events[0][0] <= last_id + 1)
+            if not complete:
+                return [], False, self._last_id
+            return [e for e in self._events if e[0] > last_id], True, self._last_id
+
+    async def stream(self, last_id=None):
+        """Genera el texto SSE para un cliente; sin last_id empieza por los eventos nuevos"""
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        waiter = (loop, wakeup)
+        with self._lock:
+            self._waiters.add(waiter)
+            if last_id is None:
+                last_id = self._last_id
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                wakeup.clear()
+                events, complete, newest = self.since(last_id)
+                if not complete:
+                    last_id = newest
+                    yield f"id: {newest}\nevent: reset\ndata: {{}}\n\n"
+                for event_id, event, data in events:
+                    last_id = event_id
+                    yield f"id: {event_id}\nevent: {event}\ndata: {data}\n\n"
+                try:
+                    await asyncio.wait_for(wakeup.wait(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+
+def candidate_event(candidate_id, row, job_id=None):
+    """Datos del evento "candidate" a partir de la fila guardada"""
+    candidate = {"id": candidate_id}
+    candidate.update((field, row.get(field)) for field in CANDIDATE_EVENT_FIELDS)
+    return {"job_id": job_id, "candidate": candidate}
+
+
+event_bus = EventBus()
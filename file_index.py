@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+
+from uploads import CVS_FOLDER
+from utils import file_sha256
+
+# Segundos que se da por buena la lista de cvs/ antes de volver a recorrer la carpeta
+FILE_INDEX_TTL = float(os.environ.get("CV_FILE_INDEX_TTL", "30"))
+
+SORT_KEYS = {
+    "name": lambda entry: entry["name"].lower(),
+    "date": lambda entry: entry["mtime"],
+    "size": lambda entry: entry["size"],
+}
+
+
+def is_pdf_entry(entry):
+    # Como en la lista anterior (f.endswith(".pdf")), sin los temporales de las subidas
+    return entry.name.endswith(".pdf") and not entry.name.startswith(".") and entry.is_file()
+
+
+class FileIndex:
+    """Índice en memoria de los PDFs de cvs/ (nombre, tamaño, fecha y hash).
+
+    Se recorre la carpeta con os.scandir como mucho cada CV_FILE_INDEX_TTL
+    segundos; las subidas y los borrados de la API lo actualizan al momento
+    con add() y remove(). Los hashes se calculan en un hilo aparte y solo para
+    archivos nuevos o con tamaño o fecha distintos. version cambia con cada
+    modificación, así que sirve para el ETag de GET /pdf-files.
+    """
+
+    def __init__(self, folder=CVS_FOLDER, ttl=None):
+        self.folder = folder
+        self.ttl = FILE_INDEX_TTL if ttl is None else ttl
+        self.version = 0
+        self.scanned_at = None
+        self._entries = {}  # nombre -> {"name", "size", "mtime", "hash"}
+        self._sorted = {}  # (sort, order) -> lista ordenada para la versión actual
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._hasher = None
+
+    def _changed(self):
+        # Llamar con self._lock tomado
+        self.version += 1
+        self._sorted = {}
+
+    def refresh(self, force=False):
+        """Vuelve a recorrer la carpeta si la lista tiene más de ttl segundos"""
+        if not force and self.scanned_at is not None and time.monotonic() - self.scanned_at < self.ttl:
+            return False
+        with self._scan_lock:
+            if not force and self.scanned_at is not None and time.monotonic() - self.scanned_at < self.ttl:
+                return False  # Otro hilo acaba de recorrerla
+            os.makedirs(self.folder, exist_ok=True)
+            found = {}
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    try:
+                        if is_pdf_entry(entry):
+                            st = entry.stat()
+                            found[entry.name] = (st.st_size, st.st_mtime)
+                    except OSError:
+                        continue  # Borrado mientras se recorría
+            with self._lock:
+                changed = found.keys() != self._entries.keys()
+                entries = {}
+                for name, (size, mtime) in found.items():
+                    old = self._entries.get(name)
+                    if old is not None and (old["size"], old["mtime"]) == (size, mtime):
+                        entries[name] = old
+                    else:
+                        entries[name] = {"name": name, "size": size, "mtime": mtime, "hash": None}
+                        changed = True
+                self._entries = entries
+                if changed:
+                    self._changed()
+                self.scanned_at = time.monotonic()
+        self._start_hasher()
+        return changed
+
+    def add(self, path):
+        """Añade o actualiza un archivo recién guardado en la carpeta"""
+        name = os.path.basename(path)
+        try:
+            st = os.stat(os.path.join(self.folder, name))
+        except OSError:
+            return self.remove(name)
+        with self._lock:
+            self._entries[name] = {"name": name, "size": st.st_size, "mtime": st.st_mtime, "hash": None}
+            self._changed()
+        self._start_hasher()
+
+    def remove(self, name):
+        with self._lock:
+            if self._entries.pop(os.path.basename(name), None) is not None:
+                self._changed()
+
+    def _start_hasher(self):
+        with self._lock:
+            if self._hasher is None:
+                self._hasher = threading.Thread(target=self._hash_missing, name="cv-file-index", daemon=True)
+                self._hasher.start()
+
+    def _hash_missing(self):
+        """Calcula los hashes que faltan (en bloques para no esperar a toda la carpeta)"""
+        failed = set()
+        while True:
+            with self._lock:
+                missing = [(entry["name"], entry["size"], entry["mtime"])
+                           for entry in self._entries.values()
+                           if entry["hash"] is None and (entry["name"], entry["size"], entry["mtime"]) not in failed]
+                if not missing:
+                    self._hasher = None
+                    return
+            hashes = {}
+            for name, size, mtime in missing[:100]:
+                try:
+                    hashes[name] = (size, mtime, file_sha256(os.path.join(self.folder, name)))
+                except OSError:
+                    failed.add((name, size, mtime))
+            with self._lock:
+                updated = False
+                for name, (size, mtime, digest) in hashes.items():
+                    entry = self._entries.get(name)
+                    # Si cambió mientras se leía, el hash ya no vale
+                    if entry is not None and (entry["size"], entry["mtime"]) == (size, mtime):
+                        self._entries[name] = dict(entry, hash=digest)
+                        updated = True
+                if updated:
+                    self._changed()
+
+    def page(self, offset=0, limit=100, sort="name", order="asc"):
+        """(versión, total, entradas) de una página de la lista ordenada"""
+        self.refresh()
+        with self._lock:
+            ordered = self._sorted.get((sort, order))
+            if ordered is None:
+                ordered = sorted(self._entries.values(), key=SORT_KEYS[sort], reverse=order == "desc")
+                self._sorted[(sort, order)] = ordered
+            return self.version, len(ordered), ordered[offset:offset + limit]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "hashed": sum(1 for entry in self._entries.values() if entry["hash"] is not None),
+                "version": self.version,
+                "age": None if self.scanned_at is None else round(time.monotonic() - self.scanned_at, 1),
+            }
+
+
+file_index = FileIndex()
@@ -0,0 +1,236 @@
+import os
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import func
+
+from events import candidate_event, event_bus
+from metrics import METRICS_ENABLED, registry
+from models import Job, JobFile, SessionLocal
+from pipeline import Pipeline
+
+FINAL_STATES = ("saved", "skipped", "failed")
+
+
+class JobManager:
+    """Cola de jobs en segundo plano persistida en SQLite.
+
+    Los jobs se ejecutan de uno en uno; dentro de cada job el Pipeline reparte
+    los archivos entre sus workers de extracción y de LLM.
+    """
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cv-job")
+        self._stages = {}  # job_id -> uso por etapa de la última ejecución
+
+    def submit(self, paths, role=None, use_cache=True):
+        """Crea un job con los archivos indicados y lo encola. Devuelve el id."""
+        job_id = uuid.uuid4().hex
+        session = SessionLocal()
+        try:
+            session.add(Job(
+                id=job_id,
+                role=role,
+                status="queued",
+                use_cache=use_cache,
+                total_files=len(paths),
+                created_at=time.time()
+            ))
+            files = [JobFile(job_id=job_id, path=path, state="queued") for path in paths]
+            session.add_all(files)
+            session.commit()
+            pending = [(f.id, f.path) for f in files]
+        finally:
+            session.close()
+
+        event_bus.publish("job", {"job_id": job_id, "status": "queued", "total_files": len(paths)})
+        self.executor.submit(self._run_job, job_id, role, pending, use_cache)
+        return job_id
+
+    def resume(self):
+        """Reencola los archivos de jobs que no terminaron (p. ej. tras un reinicio)"""
+        session = SessionLocal()
+        try:
+            jobs = session.query(Job).filter(Job.status != "done").order_by(Job.created_at).all()
+            to_schedule = []
+            for job in jobs:
+                files = session.query(JobFile).filter(
+                    JobFile.job_id == job.id,
+                    JobFile.state.notin_(FINAL_STATES)
+                ).all()
+                for f in files:
+                    f.state = "queued"
+                    f.started_at = None
+                to_schedule.append((job.id, job.role, job.use_cache is not False, [(f.id, f.path) for f in files]))
+            session.commit()
+        finally:
+            session.close()
+
+        for job_id, role, use_cache, pending in to_schedule:
+            if pending:
+                print(f"🔁 Reanudando job {job_id} ({len(pending)} archivos pendientes)")
+            self.executor.submit(self._run_job, job_id, role, pending, use_cache)
+        return len(to_schedule)
+
+    def _run_job(self, job_id, role, pending, use_cache=True):
+        file_ids = {path: file_id for file_id, path in pending}
+        try:
+            if pending:
+                self._start_job(job_id)
+                pipeline = Pipeline(
+                    role,
+                    use_cache=use_cache,
+                    on_state=lambda path, state, **info: self._update_file(file_ids[path], state, **info)
+                )
+                summary = pipeline.run(list(file_ids))
+                self._stages[job_id] = summary["stages"]
+        except Exception as e:
+            traceback.print_exc()
+            for file_id in file_ids.values():
+                self._update_file(file_id, "failed", error=str(e), only_pending=True)
+        finally:
+            # Ningún archivo debe quedar a medias si el pipeline terminó
+            for file_id in file_ids.values():
+                self._update_file(file_id, "failed", error="No se completó el procesamiento", only_pending=True)
+            self._finish_job(job_id)
+
+    def _start_job(self, job_id):
+        session = SessionLocal()
+        try:
+            job = session.get(Job, job_id)
+            if job is not None and job.status == "queued":
+                job.status = "running"
+                job.started_at = time.time()
+                session.commit()
+                event_bus.publish("job", {"job_id": job_id, "status": "running", "total_files": job.total_files})
+        finally:
+            session.close()
+
+    def _finish_job(self, job_id):
+        session = SessionLocal()
+        try:
+            job = session.get(Job, job_id)
+            if job is not None:
+                job.status = "done"
+                job.finished_at = time.time()
+                session.commit()
+                event_bus.publish("job", {"job_id": job_id, "status": "done", "total_files": job.total_files})
+        finally:
+            session.close()
+
+    def _update_file(self, file_id, state, only_pending=False, **info):
+        session = SessionLocal()
+        try:
+            job_file = session.get(JobFile, file_id)
+            if job_file is None:
+                return
+            if only_pending and job_file.state in FINAL_STATES:
+                return
+            now = time.time()
+            job_file.state = state
+            if state == "extracting":
+                job_file.started_at = now
+            if state in FINAL_STATES:
+                job_file.finished_at = now
+            for key in ("error", "extract_seconds", "analyze_seconds", "save_seconds"):
+                if key in info:
+                    setattr(job_file, key, info[key])
+            job_id = job_file.job_id
+            file_event = {"job_id": job_id, "file": os.path.basename(job_file.path),
+                          "state": state, "error": job_file.error}
+            session.commit()
+            event_bus.publish("file", file_event)
+            # El BatchWriter ya hizo commit de la fila: la tarjeta se puede mostrar
+            if state == "saved" and "row" in info:
+                event_bus.publish("candidate", candidate_event(info["candidate_id"], info["row"], job_id))
+        finally:
+            session.close()
+
+    def get_job(self, job_id, include_files=True):
+        """Resumen de un job con el estado de cada archivo, o None si no existe"""
+        session = SessionLocal()
+        try:
+            job = session.get(Job, job_id)
+            if job is None:
+                return None
+            files = session.query(JobFile).filter(JobFile.job_id == job_id).order_by(JobFile.id).all()
+            summary = job_summary(job, files, include_files)
+            if job_id in self._stages:
+                summary["stages"] = self._stages[job_id]
+            return summary
+        finally:
+            session.close()
+
+    def list_jobs(self, limit=50):
+        session = SessionLocal()
+        try:
+            jobs = session.query(Job).order_by(Job.created_at.desc()).limit(limit).all()
+            result = []
+            for job in jobs:
+                files = session.query(JobFile).filter(JobFile.job_id == job.id).all()
+                result.append(job_summary(job, files, include_files=False))
+            return result
+        finally:
+            session.close()
+
+
+def _job_metrics():
+    """Jobs por estado y archivos aún sin terminar (lo que queda en la cola de jobs)"""
+    session = SessionLocal()
+    try:
+        jobs = dict(session.query(Job.status, func.count()).group_by(Job.status).all())
+        pending = session.query(func.count(JobFile.id)).filter(JobFile.state.notin_(FINAL_STATES)).scalar()
+    finally:
+        session.close()
+    samples = [("cv_jobs", "gauge", "Jobs por estado", {"status": status}, jobs.get(status, 0))
+               for status in ("queued", "running", "done")]
+    samples.append(("cv_job_files_pending", "gauge", "Archivos de jobs pendientes de terminar", {}, pending))
+    return samples
+
+
+if METRICS_ENABLED:
+    registry.add_collector(_job_metrics)
+
+
+def job_summary(job, files, include_files=True):
+    """Convierte un job y sus archivos en un diccionario para la API"""
+    counts = {state: 0 for state in ("queued", "extracting", "analyzing", "saved", "skipped", "failed")}
+    for f in files:
+        counts[f.state] = counts.get(f.state, 0) + 1
+
+    finished = counts["saved"] + counts["skipped"] + counts["failed"]
+    elapsed = None
+    throughput = None
+    if job.started_at:
+        elapsed = (job.finished_at or time.time()) - job.started_at
+        if elapsed > 0:
+            throughput = round(finished / elapsed * 60, 2)  # archivos por minuto
+
+    summary = {
+        "id": job.id,
+        "role": job.role if job.role else "detección automática",
+        "status": job.status,
+        "total_files": job.total_files,
+        "counts": counts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "elapsed_seconds": round(elapsed, 2) if elapsed is not None else None,
+        "files_per_minute": throughput
+    }
+    if include_files:
+        summary["files"] = [{
+            "name": os.path.basename(f.path),
+            "state": f.state,
+            "error": f.error,
+            "extract_seconds": f.extract_seconds,
+            "analyze_seconds": f.analyze_seconds,
+            "save_seconds": f.save_seconds,
+            "total_seconds": (f.finished_at - f.started_at) if f.started_at and f.finished_at else None
+        } for f in files]
+    return summary
+
+
+job_manager = JobManager()
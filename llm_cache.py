@@ -0,0 +1,63 @@
+import hashlib
+import os
+import time
+
+from analysis import analyze_cv, MODEL_NAME
+from cache import BlobCache
+from metrics import METRICS_ENABLED, observe, registry, span
+
+# Cambiar al modificar el prompt para que no se reutilicen respuestas antiguas
+PROMPT_VERSION = "1"
+
+LLM_CACHE_ENABLED = os.environ.get("CV_LLM_CACHE", "1") != "0"
+LLM_CACHE_PATH = os.environ.get("CV_LLM_CACHE_PATH", "llm_cache.db")
+LLM_CACHE_MAX_MB = int(os.environ.get("CV_LLM_CACHE_MAX_MB", "256"))
+
+llm_cache = BlobCache(LLM_CACHE_PATH, LLM_CACHE_MAX_MB * 1024 * 1024)
+
+
+def normalize_text(text):
+    """Normaliza espacios para que diferencias de formato no cambien la clave"""
+    return " ".join(text.split())
+
+
+def cache_key(text, role=None, prompt_version=PROMPT_VERSION):
+    normalized_role = " ".join((role or "").lower().split())
+    raw = "\0".join([prompt_version, MODEL_NAME, normalized_role, normalize_text(text)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def cached_analyze_cv(text, role=None, use_cache=True, count=True):
+    """analyze_cv con caché persistente por texto + rol + modelo + versión del prompt.
+    count=False no anota la consulta en hits/misses (ya la anotó quien llama)"""
+    if not (use_cache and LLM_CACHE_ENABLED):
+        with span("cv_analyze_seconds", cache="off"):
+            return analyze_cv(text, role)
+
+    start = time.perf_counter()
+    key = cache_key(text, role)
+    cached = llm_cache.get_json(key, count)
+    if cached is not None:
+        observe("cv_analyze_seconds", time.perf_counter() - start, cache="hit")
+        return cached
+
+    with span("cv_analyze_seconds", cache="miss"):
+        analysis = analyze_cv(text, role)
+    # Los errores no se guardan para reintentarlos en la siguiente ejecución
+    if isinstance(analysis, dict) and "error" not in analysis:
+        llm_cache.set_json(key, analysis)
+    return analysis
+
+
+def _cache_metrics():
+    total = llm_cache.hits + llm_cache.misses
+    return [
+        ("cv_llm_cache_hits_total", "counter", "Aciertos de la caché del LLM", {}, llm_cache.hits),
+        ("cv_llm_cache_misses_total", "counter", "Fallos de la caché del LLM", {}, llm_cache.misses),
+        ("cv_llm_cache_hit_ratio", "gauge", "Proporción de aciertos de la caché del LLM", {},
+         round(llm_cache.hits / total, 4) if total else None),
+    ]
+
+
+if METRICS_ENABLED:
+    registry.add_collector(_cache_metrics)
@@ -1,82 +1,190 @@
-import os
-from utils import extract_text_from_pdf
-from analysis import analyze_cv
-from models import Candidate, SessionLocal
-import traceback
-import json
-import re
-
-def convert_to_text(data):
-    """Convierte cualquier tipo de dato a texto para la base de datos"""
-    if data is None:
-        return ""
-    
-    if isinstance(data, list):
-        # Si es una lista, convertir a string separado por comas
-        return ", ".join(str(item) for item in data)
-    elif isinstance(data, dict):
-        # Si es un diccionario, convertirlo a string JSON
-        try:
-            return json.dumps(data, ensure_ascii=False)
-        except:
-            return str(data)
-    else:
-        # Para strings, números, etc.
-        return str(data)
-
-def safe_float(value):
-    """Conversión segura a float"""
-    try:
-        return float(value)
-    except:
-        return 0.0
-
-def process_cv(file_path, role=None):
-    print(f"📄 Procesando: {file_path}")
-    try:
-        text = extract_text_from_pdf(file_path)
-        if not text.strip():
-            print(f"❌ PDF vacío o no se pudo extraer texto: {file_path}")
-            return
-            
-        analysis = analyze_cv(text, role)
-
-        if analysis is not None and "error" in analysis:
-            print(f"❌ Error en análisis: {analysis['error']}")
-            if analysis.get("raw"):
-                print(f"Raw output: {analysis['raw'][:200]}...")
-            nombre = analysis.get("nombre", "Desconocido")
-            email = analysis.get("email", "")
-        else:
-            nombre = analysis.get("nombre", "Desconocido")
-            email = analysis.get("email", "")
-
-        # Guardar en DB - SIN truncamiento excesivo
-        session = SessionLocal()
-        candidato = Candidate(
-            nombre=nombre,
-            email=email,
-            perfil=analysis.get("perfil", ""),
-            skills=analysis.get("skills", ""),
-            experiencia=analysis.get("experiencia", ""),
-            seniority=analysis.get("seniority", ""),
-            area_profesional=analysis.get("area_profesional", ""),
-            match=float(analysis.get("match", 0)),
-            cv_text=text[:15000]  # Guardar más texto del CV
-        )
-        session.add(candidato)
-        session.commit()
-        session.close()
-        print(f"✅ {file_path} procesado y guardado en DB\n")
-        
-    except Exception as e:
-        print(f"🔥 Error crítico procesando {file_path}:")
-        traceback.print_exc()
-        print("")
-
-if __name__ == "__main__":
-    role = input("¿Quieres evaluar para un rol específico? (deja vacío para detectar automáticamente): ")
-    folder = "cvs"
-    for file in os.listdir(folder):
-        if file.endswith(".pdf"):
-            process_cv(os.path.join(folder, file), role if role else None)
\ No newline at end of file
+import os
+import sys
+from utils import extract_text_from_pdf, file_sha256, role_fingerprint
+from llm_cache import cached_analyze_cv
+from compaction import compact_cv
+from models import Candidate, SessionLocal
+from db import init_db
+from skills import index_candidate_skills
+from documents import candidate_columns, llm_output, pack_document, store_documents
+from embeddings import vector_store
+from metrics import registry, span
+from sqlalchemy.exc import IntegrityError
+import traceback
+import time
+import json
+import re
+
+def convert_to_text(data):
+    """Convierte cualquier tipo de dato a texto para la base de datos"""
+    if data is None:
+        return ""
+    
+    if isinstance(data, list):
+        # Si es una lista, convertir a string separado por comas
+        return ", ".join(str(item) for item in data)
+    elif isinstance(data, dict):
+        # Si es un diccionario, convertirlo a string JSON
+        try:
+            return json.dumps(data, ensure_ascii=False)
+        except:
+            return str(data)
+    else:
+        # Para strings, números, etc.
+        return str(data)
+
+def safe_float(value):
+    """Conversión segura a float"""
+    try:
+        return float(value)
+    except:
+        return 0.0
+
+def is_already_processed(file_hash, role_fp):
+    """Indica si ya existe un candidato para este PDF y este rol"""
+    session = SessionLocal()
+    try:
+        return session.query(Candidate.id).filter(
+            Candidate.file_hash == file_hash,
+            Candidate.role_fingerprint == role_fp
+        ).first() is not None
+    finally:
+        session.close()
+
+def analysis_error(analysis):
+    """Mensaje de error del análisis del LLM, o None si es válido.
+
+    Los análisis con error no se guardan: si se guardaran con file_hash y
+    role_fingerprint, la siguiente ejecución omitiría el CV como ya analizado.
+    """
+    if analysis is None or "error" not in analysis:
+        return None
+    print(f"❌ Error en análisis: {analysis['error']}")
+    if analysis.get("raw"):
+        print(f"Raw output: {analysis['raw'][:200]}...")
+    return str(analysis["error"])
+
+def candidate_row(analysis, text, file_hash=None, role_fp=None, compaction=None):
+    """Columnas del candidato a guardar a partir del análisis del LLM (y de
+    la información de compact_cv sobre el texto enviado)"""
+    # Guardar en DB - SIN truncamiento excesivo
+    return dict(
+        nombre=analysis.get("nombre", "Desconocido"),
+        email=analysis.get("email", ""),
+        perfil=convert_to_text(analysis.get("perfil", "")),
+        skills=convert_to_text(analysis.get("skills", "")),
+        experiencia=convert_to_text(analysis.get("experiencia", "")),
+        seniority=convert_to_text(analysis.get("seniority", "")),
+        area_profesional=convert_to_text(analysis.get("area_profesional", "")),
+        match=safe_float(analysis.get("match", 0)),
+        # Texto completo y respuesta del LLM: se guardan comprimidos en candidate_documents
+        cv_text=text,
+        llm_output=llm_output(analysis),
+        file_hash=file_hash,
+        role_fingerprint=role_fp,
+        prompt_tokens=compaction["tokens_after"] if compaction else None,
+        prompt_tokens_saved=compaction["tokens_saved"] if compaction else None
+    )
+
+def process_cv(file_path, role=None, on_state=None, use_cache=True, text=None):
+    """Procesa un CV y devuelve el estado final ("saved", "skipped" o "failed").
+
+    Los PDFs cuyo contenido ya se analizó para el mismo rol se omiten.
+
+    on_state(state, **info) se llama en cada cambio de fase para que los jobs
+    puedan seguir el progreso de cada archivo. Con use_cache=False se ignora la
+    caché de respuestas del LLM. Si se pasa text (ya extraído en lote) no se
+    vuelve a abrir el PDF.
+    """
+    def notify(state, **info):
+        if on_state is not None:
+            on_state(state, **info)
+
+    print(f"📄 Procesando: {file_path}")
+    try:
+        file_hash = file_sha256(file_path)
+        role_fp = role_fingerprint(role)
+        if is_already_processed(file_hash, role_fp):
+            print(f"⏭️ {file_path} sin cambios, ya analizado para este rol\n")
+            notify("skipped")
+            return "skipped"
+
+        start = time.time()
+        if text is None:
+            notify("extracting")
+            with span("cv_extract_seconds"):
+                text = extract_text_from_pdf(file_path, file_hash=file_hash)
+        if not text.strip():
+            print(f"❌ PDF vacío o no se pudo extraer texto: {file_path}")
+            notify("failed", error="PDF vacío o no se pudo extraer texto",
+                   extract_seconds=time.time() - start)
+            return "failed"
+
+        notify("analyzing", extract_seconds=time.time() - start)
+        start = time.time()
+        # Al LLM solo llega el texto compactado; en la base de datos se guarda el original
+        prompt_text, compaction = compact_cv(text)
+        analysis = cached_analyze_cv(prompt_text, role, use_cache=use_cache)
+        analyze_seconds = time.time() - start
+        error = analysis_error(analysis)
+        if error is not None:
+            print(f"❌ {file_path} no se guarda; se volverá a analizar en la siguiente ejecución\n")
+            notify("failed", error=error, analyze_seconds=analyze_seconds)
+            return "failed"
+
+        row = candidate_row(analysis, text, file_hash, role_fp, compaction)
+        candidato = Candidate(**candidate_columns(row))
+        start = time.time()
+        session = SessionLocal()
+        session.add(candidato)
+        try:
+            with span("cv_db_commit_seconds", path="single"):
+                session.flush()
+                candidate_id = candidato.id
+                index_candidate_skills(session.connection(), [(candidate_id, candidato.skills)])
+                store_documents(session.connection(), [(candidate_id, row, pack_document(row))])
+                session.commit()
+        except IntegrityError:
+            # Otro worker guardó el mismo PDF para el mismo rol mientras se analizaba
+            session.rollback()
+            print(f"⏭️ {file_path} ya fue guardado por otro proceso\n")
+            notify("skipped")
+            return "skipped"
+        finally:
+            session.close()
+        try:
+            vector_store.add_candidate(candidate_id, row)
+        except Exception:
+            # Sin embedding el candidato sigue guardado; vector_store.sync() lo recupera
+            traceback.print_exc()
+        print(f"✅ {file_path} procesado y guardado en DB\n")
+        notify("saved", analyze_seconds=analyze_seconds, save_seconds=time.time() - start)
+        return "saved"
+        
+    except Exception as e:
+        print(f"🔥 Error crítico procesando {file_path}:")
+        traceback.print_exc()
+        print("")
+        notify("failed", error=str(e))
+        return "failed"
+
+if __name__ == "__main__":
+    from pipeline import Pipeline, print_summary
+
+    init_db()
+    use_cache = "--no-cache" not in sys.argv
+    role = input("¿Quieres evaluar para un rol específico? (deja vacío para detectar automáticamente): ")
+    folder = "cvs"
+    pdf_files = [os.path.join(folder, file) for file in os.listdir(folder) if file.endswith(".pdf")]
+
+    # Extracción, análisis y guardado corren en paralelo unidos por colas
+    summary = Pipeline(role if role else None, use_cache=use_cache).run(pdf_files)
+    print_summary(summary)
+
+    # --metrics: histogramas de la ejecución en JSON (--metrics=archivo.json para guardarlos)
+    for arg in sys.argv[1:]:
+        if arg == "--metrics":
+            print(json.dumps(registry.summary(), indent=2, ensure_ascii=False))
+        elif arg.startswith("--metrics="):
+            with open(arg.split("=", 1)[1], "w", encoding="utf-8") as f:
+                json.dump(registry.summary(), f, indent=2, ensure_ascii=False)
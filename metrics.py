@@ -0,0 +1,286 @@
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+# CV_METRICS=0 desactiva las métricas: span() devuelve un contexto vacío y
+# observe()/inc()/set_gauge() retornan en la primera línea
+METRICS_ENABLED = os.environ.get("CV_METRICS", "1") != "0"
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+ROW_BUCKETS = (1, 5, 10, 25, 50, 100, 200, 500, 1000)
+
+# nombre -> (tipo, descripción, buckets)
+METRICS = {
+    "cv_extract_seconds": ("histogram", "Extracción de texto de un PDF", SECONDS_BUCKETS),
+    "cv_analyze_seconds": ("histogram", "Análisis de un CV (cache=hit|miss|off)", SECONDS_BUCKETS),
+    "cv_llm_prompt_tokens": ("histogram", "Tokens del prompt por petición a Ollama (source=ollama|estimate)", TOKEN_BUCKETS),
+    "cv_prompt_tokens_saved": ("histogram", "Tokens estimados que la compactación quita del prompt de un CV", TOKEN_BUCKETS),
+    "cv_llm_response_tokens": ("histogram", "Tokens generados por petición a Ollama", TOKEN_BUCKETS),
+    "cv_llm_batch_size": ("histogram", "CVs por petición agrupada al LLM", ROW_BUCKETS),
+    "cv_llm_batches_total": ("counter", "Peticiones agrupadas al LLM (result=ok|partial|failed)", None),
+    "cv_db_commit_seconds": ("histogram", "Transacción de guardado de candidatos (path=batch|single)", SECONDS_BUCKETS),
+    "cv_db_batch_rows": ("histogram", "Candidatos por lote del BatchWriter", ROW_BUCKETS),
+    "cv_http_request_seconds": ("histogram", "Tiempo hasta la respuesta de cada endpoint", SECONDS_BUCKETS),
+    "cv_http_requests_total": ("counter", "Peticiones HTTP por endpoint y código", None),
+    "cv_pipeline_files_total": ("counter", "Archivos terminados por el pipeline (state=saved|skipped|failed)", None),
+    "cv_pipeline_queue_depth": ("gauge", "Elementos esperando en las colas del pipeline", None),
+}
+
+
+class Histogram:
+    """Histograma de buckets fijos (acumulables al estilo Prometheus)"""
+
+    __slots__ = ("buckets", "counts", "sum", "count", "max", "_lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # el último es +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = None
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+    def quantile(self, q, counts=None, count=None):
+        """Percentil aproximado interpolando dentro del bucket (nunca mayor que el máximo visto)"""
+        if counts is None:
+            counts, _, count = self.snapshot()
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    return self.max  # Por encima del último bucket
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = min(self.buckets[index], self.max)
+                return max(lower, lower + (upper - lower) * (rank - seen) / bucket_count)
+            seen += bucket_count
+        return self.max
+
+
+class Registry:
+    """Métricas del proceso: histogramas, contadores y gauges con etiquetas"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}  # (nombre, etiquetas) -> Histogram | [valor]
+        self._collectors = []
+
+    def _get(self, name, labels, factory):
+        key = (name, tuple(sorted(labels.items())))
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(key, factory())
+        return series
+
+    def observe(self, name, value, labels):
+        self._get(name, labels, lambda: Histogram(METRICS[name][2])).observe(value)
+
+    def inc(self, name, amount, labels):
+        cell = self._get(name, labels, lambda: [0])
+        with self._lock:
+            cell[0] += amount
+
+    def set_gauge(self, name, value, labels):
+        self._get(name, labels, lambda: [0])[0] = value
+
+    def add_collector(self, func):
+        """func() devuelve [(nombre, tipo, descripción, etiquetas, valor)] en el momento de leer"""
+        self._collectors.append(func)
+
+    def _collected(self):
+        samples = []
+        for func in self._collectors:
+            try:
+                samples.extend(func())
+            except Exception as e:
+                print(f"⚠️ Error leyendo métricas: {e}")
+        return samples
+
+    def prometheus(self):
+        """Todas las métricas en el formato de texto de Prometheus"""
+        with self._lock:
+            series = sorted(self._series.items())
+        lines = []
+        described = set()
+
+        def header(name, kind, description):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in series:
+            kind, description, _ = METRICS[name]
+            header(name, kind, description)
+            if isinstance(value, Histogram):
+                counts, total_sum, count = value.snapshot()
+                cumulative = 0
+                for bucket, bucket_count in zip(value.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bucket == float("inf") else f"{bucket:g}"
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {total_sum:.6f}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+            else:
+                lines.append(f"{name}{_labels(labels)} {_number(value[0])}")
+        for name, kind, description, labels, value in self._collected():
+            header(name, kind, description)
+            lines.append(f"{name}{_labels(tuple(sorted(labels.items())))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """Resumen en JSON: conteo, media y p50/p95/p99 por histograma, y el resto de valores"""
+        with self._lock:
+            series = sorted(self._series.items())
+        result = {}
+        for (name, labels), value in series:
+            key = name + _labels(labels)
+            if isinstance(value, Histogram):
+                counts, total_sum, count = value.snapshot()
+                result[key] = {
+                    "count": count,
+                    "sum": round(total_sum, 6),
+                    "mean": round(total_sum / count, 6) if count else None,
+                    "max": _rounded(value.max),
+                    **{f"p{round(q * 100)}": _rounded(value.quantile(q, counts, count)) for q in (0.5, 0.95, 0.99)}
+                }
+            else:
+                result[key] = value[0]
+        for name, _, _, labels, value in self._collected():
+            result[name + _labels(tuple(sorted(labels.items())))] = value
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+def _number(value):
+    if value is None:
+        return "NaN"
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+
+def _rounded(value):
+    return round(value, 6) if value is not None else None
+
+
+registry = Registry()
+
+
+class _Span:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        registry.observe(self.name, time.perf_counter() - self.start, self.labels)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, **labels):
+    """with span("cv_extract_seconds"): ... guarda la duración en el histograma"""
+    if not METRICS_ENABLED:
+        return _NULL_SPAN
+    return _Span(name, labels)
+
+
+def observe(name, value, **labels):
+    if not METRICS_ENABLED or value is None:
+        return
+    registry.observe(name, value, labels)
+
+
+def inc(name, amount=1, **labels):
+    if not METRICS_ENABLED:
+        return
+    registry.inc(name, amount, labels)
+
+
+def set_gauge(name, value, **labels):
+    if not METRICS_ENABLED:
+        return
+    registry.set_gauge(name, value, labels)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que mide cada endpoint hasta el inicio de la respuesta.
+
+    En las respuestas en streaming (/events, /reports) se mide lo que tarda
+    el handler en empezar a responder, no la duración de la conexión.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start":
+                # La ruta (con sus {parámetros}) la añade el router al scope
+                route = scope.get("route")
+                labels = {"handler": getattr(route, "path", None) or "other", "method": scope["method"]}
+                registry.observe("cv_http_request_seconds", time.perf_counter() - start, labels)
+                registry.inc("cv_http_requests_total", 1, dict(labels, status=str(message["status"])))
+            await send(message)
+
+        await self.app(scope, receive, timed_send)
+
+
+if __name__ == "__main__":
+    # python metrics.py [http://localhost:8000] -> resumen JSON de un servidor en marcha
+    import httpx
+    base_url = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:8000"
+    response = httpx.get(base_url.rstrip("/") + "/metrics", params={"format": "json"}, timeout=10)
+    response.raise_for_status()
+    print(json.dumps(response.json(), indent=2, ensure_ascii=False))
@@ -1,21 +1,119 @@
-from sqlalchemy import Column, Integer, String, Float, Text, create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
-
-Base = declarative_base()
-
-class Candidate(Base):
-    __tablename__ = 'candidates'
-    id = Column(Integer, primary_key=True, index=True)
-    nombre = Column(String(100))
-    email = Column(String(100))
-    perfil = Column(Text)
-    skills = Column(Text)
-    experiencia = Column(Text)
-    seniority = Column(String(50))
-    area_profesional = Column(String(100))
-    match = Column(Float)
-    cv_text = Column(Text)
-
-# Config DB
-engine = create_engine("sqlite:///candidates.db", echo=False)
-SessionLocal = sessionmaker(bind=engine)
+import os
+import zlib
+from sqlalchemy import Column, Integer, String, Float, Text, Boolean, ForeignKey, Index, LargeBinary, create_engine, event
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+Base = declarative_base()
+
+# Nivel de zlib para el texto de los CVs: 6 comprime casi como 9 y bastante más rápido
+TEXT_COMPRESSION_LEVEL = 6
+
+class Candidate(Base):
+    __tablename__ = 'candidates'
+    id = Column(Integer, primary_key=True, index=True)
+    nombre = Column(String(100))
+    email = Column(String(100))
+    perfil = Column(Text)
+    skills = Column(Text)
+    experiencia = Column(Text)
+    seniority = Column(String(50))
+    area_profesional = Column(String(100))
+    match = Column(Float)
+    # SHA-256 del PDF y huella del rol evaluado, para no reanalizar CVs sin cambios
+    file_hash = Column(String(64))
+    role_fingerprint = Column(String(64))
+    # Tokens estimados del CV enviados al LLM y los que quitó la compactación
+    prompt_tokens = Column(Integer)
+    prompt_tokens_saved = Column(Integer)
+
+    __table_args__ = (
+        Index('ux_candidates_hash_role', 'file_hash', 'role_fingerprint', unique=True),
+        # Paginación por cursor ordenada por match y filtros de /candidates
+        Index('ix_candidates_match_id', 'match', 'id'),
+        Index('ix_candidates_area_match', 'area_profesional', 'match', 'id'),
+        Index('ix_candidates_seniority_match', 'seniority', 'match', 'id'),
+    )
+
+class CandidateDocument(Base):
+    """Texto completo del CV y respuesta del LLM, comprimidos con zlib.
+
+    Van aparte de candidates para que las filas que recorren los listados,
+    los filtros y los informes sean pequeñas; se leen solo para el detalle,
+    la búsqueda de texto y los índices (ver documents.py)"""
+    __tablename__ = 'candidate_documents'
+    candidate_id = Column(Integer, ForeignKey('candidates.id'), primary_key=True)
+    cv_text = Column(LargeBinary)
+    llm_output = Column(LargeBinary)
+
+class Skill(Base):
+    """Habilidad normalizada (nombre canónico, sin tildes y en minúsculas)"""
+    __tablename__ = 'skills'
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), unique=True, nullable=False)
+    # Mantenido por triggers sobre candidate_skills (ver skills.py)
+    candidate_count = Column(Integer, default=0, nullable=False, index=True)
+
+class CandidateSkill(Base):
+    """Relación candidato <-> habilidad (índice invertido de skills)"""
+    __tablename__ = 'candidate_skills'
+    candidate_id = Column(Integer, ForeignKey('candidates.id'), primary_key=True)
+    skill_id = Column(Integer, ForeignKey('skills.id'), primary_key=True)
+
+    __table_args__ = (
+        Index('ix_candidate_skills_skill', 'skill_id', 'candidate_id'),
+    )
+
+class Job(Base):
+    """Lote de CVs procesado en segundo plano"""
+    __tablename__ = 'jobs'
+    id = Column(String(32), primary_key=True)
+    role = Column(String(200))
+    status = Column(String(20), default="queued")  # queued, running, done
+    use_cache = Column(Boolean, default=True)
+    total_files = Column(Integer, default=0)
+    created_at = Column(Float)
+    started_at = Column(Float)
+    finished_at = Column(Float)
+
+class JobFile(Base):
+    """Estado de cada archivo dentro de un job"""
+    __tablename__ = 'job_files'
+    id = Column(Integer, primary_key=True)
+    job_id = Column(String(32), ForeignKey('jobs.id'), index=True)
+    path = Column(String(500))
+    state = Column(String(20), default="queued")  # queued, extracting, analyzing, saved, skipped, failed
+    error = Column(Text)
+    started_at = Column(Float)
+    finished_at = Column(Float)
+    extract_seconds = Column(Float)
+    analyze_seconds = Column(Float)
+    save_seconds = Column(Float)
+
+def pack_text(value):
+    """Texto comprimido para candidate_documents (None si está vacío)"""
+    if not value:
+        return None
+    return zlib.compress(value.encode("utf-8"), TEXT_COMPRESSION_LEVEL)
+
+def unpack_text(data):
+    if data is None:
+        return None
+    return zlib.decompress(data).decode("utf-8")
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL permite leer mientras se escribe y synchronous=NORMAL evita un fsync por commit"""
+    # Para llenar el índice FTS con el texto de los CVs ya guardados (ver search.py)
+    dbapi_connection.create_function("unpack_text", 1, unpack_text, deterministic=True)
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=10000")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-20000")  # ~20 MB de caché de páginas
+    cursor.close()
+
+# Config DB (CV_DB_PATH permite usar otra base de datos, p. ej. en benchmarks)
+DB_PATH = os.environ.get("CV_DB_PATH", "candidates.db")
+engine = create_engine(f"sqlite:///{DB_PATH}", echo=False)
+event.listen(engine, "connect", set_sqlite_pragmas)
+SessionLocal = sessionmaker(bind=engine)
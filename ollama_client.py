@@ -0,0 +1,227 @@
+import asyncio
+import json
+import os
+import re
+import threading
+import weakref
+
+import httpx
+
+from analysis import MODEL_NAME, MAX_RETRIES, create_honest_prompt
+from compaction import estimate_tokens
+from metrics import observe
+
+OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11434")
+# Peticiones simultáneas al servidor (conviene igualarlo a OLLAMA_NUM_PARALLEL)
+OLLAMA_CONCURRENCY = int(os.environ.get("CV_OLLAMA_CONCURRENCY", "2"))
+OLLAMA_TIMEOUT = float(os.environ.get("CV_OLLAMA_TIMEOUT", "300"))
+# Tiempo que Ollama mantiene el modelo cargado tras cada petición (y con él la
+# caché KV del prefijo común de los prompts); vacío = el valor del servidor
+OLLAMA_KEEP_ALIVE = os.environ.get("CV_OLLAMA_KEEP_ALIVE", "10m")
+RETRY_BACKOFF = 0.5  # segundos, se duplica en cada reintento
+
+EXPECTED_FIELDS = ("nombre", "email", "perfil", "skills", "experiencia", "seniority", "area_profesional", "match")
+
+
+class JSONStreamScanner:
+    """Detecta el primer objeto JSON completo en una respuesta que llega por
+    fragmentos, ignorando el bloque <think> de DeepSeek-R1"""
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._start = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._think_checked = False
+
+    def _skip_think(self):
+        """Avanza hasta después de </think>; devuelve False si aún no terminó"""
+        head = self.buffer.lstrip()
+        if not head or "<think>".startswith(head):
+            return False
+        if head.startswith("<think>"):
+            end = self.buffer.find("</think>", max(0, self._pos - len("</think>")))
+            if end == -1:
+                self._pos = len(self.buffer)
+                return False
+            self._pos = end + len("</think>")
+        else:
+            self._pos = 0
+        self._think_checked = True
+        return True
+
+    def feed(self, chunk):
+        """Añade un fragmento y devuelve el JSON completo en cuanto se cierra"""
+        self.buffer += chunk
+        if not self._think_checked and not self._skip_think():
+            return None
+        while self._pos < len(self.buffer):
+            if self._start is None:
+                brace = self.buffer.find("{", self._pos)
+                if brace == -1:
+                    self._pos = len(self.buffer)
+                    return None
+                self._start = brace
+                self._pos = brace
+
+            char = self.buffer[self._pos]
+            self._pos += 1
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    return self.buffer[self._start:self._pos]
+        return None
+
+
+def normalize_analysis(data):
+    """Lleva la respuesta del modelo al mismo formato que analyze_cv"""
+    result = {}
+    for field in EXPECTED_FIELDS:
+        value = data.get(field, "")
+        if field == "match":
+            try:
+                value = float(re.sub(r"[^\d.]", "", str(value)) or 0)
+            except ValueError:
+                value = 0.0
+        elif isinstance(value, list):
+            value = ", ".join(str(item) for item in value)
+        elif isinstance(value, dict):
+            value = json.dumps(value, ensure_ascii=False)
+        elif value is None:
+            value = ""
+        result[field] = value
+    if not result["nombre"]:
+        result["nombre"] = "Desconocido"
+    return result
+
+
+class OllamaClient:
+    """Cliente asíncrono de Ollama con conexiones reutilizadas, límite de
+    peticiones en vuelo y reintentos con backoff"""
+
+    def __init__(self, base_url=OLLAMA_URL, model=MODEL_NAME, concurrency=OLLAMA_CONCURRENCY,
+                 max_retries=MAX_RETRIES, timeout=OLLAMA_TIMEOUT, keep_alive=OLLAMA_KEEP_ALIVE):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.keep_alive = keep_alive
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._client = None
+        self._semaphore = None
+
+    def _ensure_client(self):
+        # Se crean dentro del event loop que las va a usar
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._client
+
+    async def generate_json(self, prompt, options=None):
+        """Envía el prompt en modo streaming y corta en cuanto llega un objeto
+        JSON completo. Devuelve (objeto, texto crudo, estadísticas)."""
+        client = self._ensure_client()
+        payload = {"model": self.model, "prompt": prompt, "stream": True}
+        if self.keep_alive:
+            payload["keep_alive"] = self.keep_alive
+        if options:
+            payload.update(options)
+
+        async with self._semaphore:
+            scanner = JSONStreamScanner()
+            stats = {"prompt_tokens": None, "prompt_tokens_source": "ollama", "response_tokens": 0,
+                     "early_stop": False}
+            async with client.stream("POST", "/api/generate", json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise RuntimeError(chunk["error"])
+                    stats["response_tokens"] += 1
+                    complete = scanner.feed(chunk.get("response", ""))
+                    if chunk.get("done"):
+                        stats["prompt_tokens"] = chunk.get("prompt_eval_count")
+                        stats["response_tokens"] = chunk.get("eval_count", stats["response_tokens"])
+                    if complete is not None:
+                        # Cerrar el stream cancela la generación en Ollama
+                        stats["early_stop"] = not chunk.get("done", False)
+                        # Con corte anticipado Ollama no llega a informar de los tokens
+                        # del prompt (prompt_eval_count va en el último fragmento)
+                        if stats["prompt_tokens"] is None:
+                            stats["prompt_tokens"] = estimate_tokens(prompt)
+                            stats["prompt_tokens_source"] = "estimate"
+                        observe("cv_llm_prompt_tokens", stats["prompt_tokens"], source=stats["prompt_tokens_source"])
+                        observe("cv_llm_response_tokens", stats["response_tokens"])
+                        return json.loads(complete), scanner.buffer, stats
+                    if chunk.get("done"):
+                        break
+        error = ValueError("La respuesta no contiene un objeto JSON completo")
+        error.raw = scanner.buffer  # Para devolverla en el error de analyze_cv
+        raise error
+
+    async def analyze_cv(self, text, role=None):
+        """Versión asíncrona de analyze_cv: devuelve el mismo diccionario"""
+        prompt = create_honest_prompt(text, role)
+        last_error = None
+        raw = ""
+        for attempt in range(self.max_retries + 1):
+            try:
+                data, raw, _ = await self.generate_json(prompt)
+                return normalize_analysis(data)
+            except (httpx.HTTPError, ValueError, RuntimeError) as e:
+                last_error = e
+                raw = getattr(e, "raw", raw)
+                if attempt < self.max_retries:
+                    await asyncio.sleep(RETRY_BACKOFF * (2 ** attempt))
+        return {"error": f"Ollama no devolvió un JSON válido: {last_error}", "raw": raw}
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._semaphore = None
+
+
+# Un cliente compartido por event loop: el AsyncClient y el semáforo quedan ligados
+# al loop en el que se crean y no sirven en otro (asyncio.run en la CLI, las pruebas,
+# el loop propio de cada BatchAnalyzer)
+_default_clients = weakref.WeakKeyDictionary()
+_default_clients_lock = threading.Lock()
+
+
+def default_client():
+    """Cliente compartido del event loop en curso"""
+    loop = asyncio.get_running_loop()
+    with _default_clients_lock:
+        client = _default_clients.get(loop)
+        if client is None:
+            # Las conexiones abiertas de un loop cerrado lo mantendrían vivo en el diccionario
+            for closed in [other for other in _default_clients if other.is_closed()]:
+                del _default_clients[closed]
+            client = _default_clients[loop] = OllamaClient()
+    return client
+
+
+async def analyze_cv_async(text, role=None, client=None):
+    """Analiza un CV con el cliente compartido del event loop (o el indicado)"""
+    client = client or default_client()
+    return await client.analyze_cv(text, role)
@@ -0,0 +1,285 @@
+import os
+import queue
+import threading
+import time
+import traceback
+
+from batching import BATCH_MAX, AdaptiveBatching, BatchAnalyzer
+from llm_cache import cached_analyze_cv
+from db_writer import BatchWriter
+from embeddings import embedding_text, vector_store
+from compaction import compact_cv
+from main import analysis_error, candidate_row, is_already_processed
+from metrics import inc, set_gauge
+from utils import EXTRACT_WORKERS, extract_texts_parallel, file_sha256, role_fingerprint
+
+# Llamadas simultáneas al LLM (Ollama atiende varias con OLLAMA_NUM_PARALLEL)
+LLM_WORKERS = int(os.environ.get("CV_LLM_WORKERS", "2"))
+# Capacidad de la cola entre extracción y análisis: si se llena, la extracción espera
+QUEUE_SIZE = int(os.environ.get("CV_PIPELINE_QUEUE", "8"))
+
+_DONE = object()
+
+
+class StageStats:
+    """Tiempo ocupado y elementos procesados por una etapa"""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, seconds, items=1):
+        with self._lock:
+            self.items += items
+            self.busy_seconds += seconds
+
+    def summary(self, wall_seconds):
+        capacity = wall_seconds * self.workers
+        return {
+            "workers": self.workers,
+            "items": self.items,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "utilization": round(self.busy_seconds / capacity, 3) if capacity > 0 else None
+        }
+
+
+class Pipeline:
+    """Procesa CVs en etapas extracción -> análisis -> guardado unidas por colas
+    acotadas, para que la CPU extraiga mientras el LLM analiza.
+
+    on_state(file_path, state, **info) recibe los cambios de estado de cada
+    archivo (extracting, analyzing, saved, skipped, failed); con "saved" info
+    incluye candidate_id y la fila guardada (row).
+    """
+
+    def __init__(self, role=None, use_cache=True, on_state=None,
+                 extract_workers=None, llm_workers=None,
+                 queue_size=None, writer=None, batch_size=None):
+        self.role = role
+        self.role_fp = role_fingerprint(role)
+        self.use_cache = use_cache
+        self.on_state = on_state
+        self.extract_workers = extract_workers or EXTRACT_WORKERS
+        self.llm_workers = llm_workers or LLM_WORKERS
+        # Con CV_LLM_BATCH > 1 cada worker del LLM toma varios CVs cortos de la cola a la vez
+        batch_size = BATCH_MAX if batch_size is None else batch_size
+        self.batching = AdaptiveBatching(batch_size) if batch_size > 1 else None
+        self.analyze_queue = queue.Queue(maxsize=queue_size or max(QUEUE_SIZE, 2 * batch_size * self.llm_workers))
+        # Los workers del LLM entregan los candidatos a un escritor por lotes
+        self.writer = writer or BatchWriter()
+        self.stats = {
+            "extract": StageStats("extract", self.extract_workers),
+            "analyze": StageStats("analyze", self.llm_workers),
+            "write": StageStats("write", 1)
+        }
+        self.counts = {"saved": 0, "skipped": 0, "failed": 0}
+        self.tokens = {"before": 0, "after": 0}
+        self._counts_lock = threading.Lock()
+        self._max_depth = {"analyze": 0}
+
+    def _notify(self, file_path, state, **info):
+        if state in self.counts:
+            with self._counts_lock:
+                self.counts[state] += 1
+            inc("cv_pipeline_files_total", state=state)
+        if self.on_state is not None:
+            try:
+                self.on_state(file_path, state, **info)
+            except Exception:
+                traceback.print_exc()
+
+    def _put(self, q, name, item):
+        q.put(item)  # Bloquea si la etapa siguiente va atrasada (backpressure)
+        depth = q.qsize()
+        self._max_depth[name] = max(self._max_depth[name], depth)
+        set_gauge("cv_pipeline_queue_depth", depth, queue=name)
+
+    def run(self, file_paths):
+        """Procesa los archivos y devuelve un resumen con conteos y uso por etapa"""
+        start = time.time()
+        workers = [threading.Thread(target=self._extract_stage, args=(list(file_paths),), name="cv-extract")]
+        workers += [threading.Thread(target=self._analyze_stage, name=f"cv-llm-{i}") for i in range(self.llm_workers)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        self.writer.close()
+
+        wall = time.time() - start
+        writer_stats = self.writer.stats()
+        self.stats["write"].busy_seconds = writer_stats["flush_seconds"]
+        self.stats["write"].items = writer_stats["rows_written"]
+        return {
+            "counts": dict(self.counts),
+            "wall_seconds": round(wall, 3),
+            "files_per_minute": round(sum(self.counts.values()) / wall * 60, 2) if wall > 0 else None,
+            "stages": {name: stage.summary(wall) for name, stage in self.stats.items()},
+            "max_queue_depth": dict(self._max_depth, write=writer_stats["max_buffered"]),
+            "prompt_tokens": {"before": self.tokens["before"], "after": self.tokens["after"],
+                              "saved": self.tokens["before"] - self.tokens["after"]},
+            "batching": self.batching.stats() if self.batching is not None else None
+        }
+
+    def _extract_stage(self, file_paths):
+        try:
+            pending = {}
+            for file_path in file_paths:
+                try:
+                    file_hash = file_sha256(file_path)
+                except Exception as e:
+                    self._notify(file_path, "failed", error=str(e))
+                    continue
+                if is_already_processed(file_hash, self.role_fp):
+                    print(f"⏭️ {file_path} sin cambios, ya analizado para este rol")
+                    self._notify(file_path, "skipped")
+                    continue
+                pending[file_path] = file_hash
+
+            on_start = lambda file_path: self._notify(file_path, "extracting")
+            for file_path, text, error, seconds in extract_texts_parallel(
+                    list(pending), workers=self.extract_workers, on_start=on_start, file_hashes=pending):
+                self.stats["extract"].add(seconds or 0.0)
+                if error or not text.strip():
+                    print(f"❌ PDF vacío o no se pudo extraer texto: {file_path}")
+                    self._notify(file_path, "failed", error=error or "PDF vacío o no se pudo extraer texto",
+                                 extract_seconds=seconds)
+                    continue
+                self._put(self.analyze_queue, "analyze", (file_path, pending[file_path], text, seconds))
+        except Exception:
+            traceback.print_exc()
+        finally:
+            for _ in range(self.llm_workers):
+                self.analyze_queue.put(_DONE)
+
+    def _analyze_stage(self):
+        analyzer = BatchAnalyzer(self.role, self.use_cache, self.batching) if self.batching is not None else None
+        try:
+            while True:
+                item = self.analyze_queue.get()
+                set_gauge("cv_pipeline_queue_depth", self.analyze_queue.qsize(), queue="analyze")
+                if item is _DONE:
+                    return
+                # Los que ya esperan en la cola van en el mismo lote (sin esperar a más)
+                items = [item]
+                done = False
+                size = self.batching.next_size() if analyzer is not None else 1
+                while len(items) < size:
+                    try:
+                        item = self.analyze_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _DONE:
+                        done = True
+                        break
+                    items.append(item)
+                self._analyze_items(items, analyzer, size)
+                if done:
+                    return
+        finally:
+            if analyzer is not None:
+                analyzer.close()
+
+    def _analyze_items(self, items, analyzer=None, size=1):
+        prepared = []
+        for file_path, file_hash, text, extract_seconds in items:
+            self._notify(file_path, "analyzing", extract_seconds=extract_seconds)
+            try:
+                prompt_text, compaction = compact_cv(text)
+            except Exception as e:
+                print(f"🔥 Error crítico analizando {file_path}:")
+                traceback.print_exc()
+                self._notify(file_path, "failed", error=str(e))
+                continue
+            with self._counts_lock:
+                self.tokens["before"] += compaction["tokens_before"]
+                self.tokens["after"] += compaction["tokens_after"]
+            prepared.append((file_path, file_hash, text, prompt_text, compaction))
+        if not prepared:
+            return
+
+        start = time.time()
+        error = None
+        try:
+            if analyzer is None:
+                analyses = [cached_analyze_cv(prepared[0][3], self.role, use_cache=self.use_cache)]
+            else:
+                analyses = analyzer.analyze([p[3] for p in prepared], [p[4]["tokens_after"] for p in prepared], size)
+        except Exception as e:
+            print(f"🔥 Error crítico analizando {', '.join(p[0] for p in prepared)}:")
+            traceback.print_exc()
+            analyses = [None] * len(prepared)
+            error = str(e)
+        analyze_seconds = (time.time() - start) / len(prepared)
+
+        for (file_path, file_hash, text, _, compaction), analysis in zip(prepared, analyses):
+            start = time.time()
+            try:
+                if analysis is None:
+                    raise RuntimeError(error)
+                failure = analysis_error(analysis)
+                if failure is not None:
+                    # Sin guardar: la siguiente ejecución lo vuelve a analizar
+                    self._notify(file_path, "failed", error=failure)
+                    continue
+                row = candidate_row(analysis, text, file_hash, self.role_fp, compaction)
+                vector = self._embed(row)
+            except Exception as e:
+                if analysis is not None:
+                    print(f"🔥 Error crítico analizando {file_path}:")
+                    traceback.print_exc()
+                self._notify(file_path, "failed", error=str(e))
+                continue
+            finally:
+                seconds = analyze_seconds + time.time() - start
+                self.stats["analyze"].add(seconds)
+            self.writer.add(row, on_done=self._on_written(file_path, seconds, vector, row))
+
+    def _embed(self, row):
+        """Embedding del candidato, o None si falla: el candidato se guarda
+        igual y vector_store.sync() lo recupera después"""
+        try:
+            return vector_store.embedder.embed(embedding_text(row))
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def _on_written(self, file_path, analyze_seconds, vector=None, row=None):
+        def on_done(state, candidate_id, seconds, error):
+            if state == "saved":
+                if vector is not None:
+                    try:
+                        vector_store.add([(candidate_id, vector)])
+                    except Exception:
+                        # El candidato ya está guardado; vector_store.sync() añade el vector
+                        traceback.print_exc()
+                print(f"✅ {file_path} procesado y guardado en DB")
+                self._notify(file_path, "saved", analyze_seconds=analyze_seconds, save_seconds=seconds,
+                             candidate_id=candidate_id, row=row)
+            elif state == "skipped":
+                print(f"⏭️ {file_path} ya fue guardado por otro proceso")
+                self._notify(file_path, "skipped")
+            else:
+                self._notify(file_path, "failed", error=error)
+        return on_done
+
+
+def print_summary(summary):
+    """Muestra por consola el resumen de una ejecución del pipeline"""
+    counts = summary["counts"]
+    print(f"\n📊 Guardados: {counts['saved']} | Sin cambios: {counts['skipped']} | Fallidos: {counts['failed']}")
+    print(f"⏱️ {summary['wall_seconds']} s ({summary['files_per_minute']} CVs/min)")
+    tokens = summary["prompt_tokens"]
+    if tokens["before"]:
+        print(f"✂️ Prompt: {tokens['after']} de {tokens['before']} tokens estimados "
+              f"({tokens['saved'] / tokens['before'] * 100:.0f}% menos)")
+    batching = summary.get("batching")
+    if batching and batching["requests"]:
+        print(f"📦 {batching['batched']} CVs analizados en {batching['requests']} peticiones agrupadas "
+              f"({batching['fallbacks']} repetidos de uno en uno, lote actual {batching['size']})")
+    for name, stage in summary["stages"].items():
+        utilization = stage["utilization"]
+        utilization = f"{utilization * 100:.0f}%" if utilization is not None else "-"
+        print(f"   {name:<8} {stage['items']:>5} elementos, {stage['workers']} workers, uso {utilization}")
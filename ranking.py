@@ -0,0 +1,491 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+from sqlalchemy import text
+
+from documents import fetch_with_text
+from models import engine as default_engine
+from search import BM25_WEIGHTS, FTS_COLUMNS
+from skills import normalize_skill, split_skills, strip_accents
+
+RANK_INDEX_PATH = os.environ.get("CV_RANK_INDEX", "rank_index.npz")
+# Segundos entre un cambio del índice y su escritura en disco: las consultas lo
+# actualizan en memoria y varios cambios seguidos se guardan de una vez
+RANK_SAVE_DELAY = float(os.environ.get("CV_RANK_SAVE_DELAY", "30"))
+
+# Parámetros BM25 y pesos del ranking por rol
+BM25_K1 = 1.2
+BM25_B = 0.75
+SKILL_TERM_WEIGHT = 3.0      # una habilidad normalizada vale como 3 menciones en skills
+PROFILE_SKILL_WEIGHT = 2.0   # peso en la consulta de las habilidades del perfil del rol
+PROFILE_WORD_WEIGHT = 0.5    # peso de las palabras sueltas del perfil
+SENIORITY_BONUS = 0.15
+AREA_BONUS = 0.10
+MAX_SEGMENTS = 8
+
+# Perfiles de habilidades por rol: si todas las palabras de una clave aparecen
+# en el rol pedido se añaden sus habilidades y palabras a la consulta
+ROLE_PROFILES = {
+    "backend": {
+        "skills": ["python", "java", "node.js", "sql", "postgresql", "docker", "django", "fastapi", "spring", "git"],
+        "words": ["api", "rest", "microservicios", "servidor", "backend"],
+        "areas": ["tecnologia", "sistemas", "software", "informatica"],
+    },
+    "frontend": {
+        "skills": ["javascript", "typescript", "react", "vue", "angular", "html", "css", "git"],
+        "words": ["frontend", "interfaz", "web", "responsive"],
+        "areas": ["tecnologia", "sistemas", "software", "informatica"],
+    },
+    "full stack": {
+        "skills": ["javascript", "typescript", "react", "node.js", "python", "sql", "html", "css", "docker", "git"],
+        "words": ["frontend", "backend", "api", "web"],
+        "areas": ["tecnologia", "sistemas", "software", "informatica"],
+    },
+    "desarrollador": {
+        "skills": ["git", "sql", "python", "java", "javascript"],
+        "words": ["desarrollo", "software", "programacion"],
+        "areas": ["tecnologia", "sistemas", "software", "informatica"],
+    },
+    "datos": {
+        "skills": ["python", "sql", "pandas", "machine learning", "power bi", "tableau", "excel", "scikit-learn"],
+        "words": ["datos", "analisis", "estadistica", "modelos", "data"],
+        "areas": ["datos", "tecnologia", "analitica"],
+    },
+    "data": {
+        "skills": ["python", "sql", "pandas", "machine learning", "spark", "tableau", "power bi", "scikit-learn"],
+        "words": ["data", "datos", "analytics", "estadistica"],
+        "areas": ["datos", "tecnologia", "analitica"],
+    },
+    "devops": {
+        "skills": ["docker", "kubernetes", "aws", "terraform", "linux", "jenkins", "git", "azure", "gcp"],
+        "words": ["ci/cd", "infraestructura", "despliegue", "cloud", "automatizacion"],
+        "areas": ["tecnologia", "sistemas", "infraestructura"],
+    },
+    "disenador": {
+        "skills": ["figma", "photoshop", "illustrator", "adobe xd", "sketch"],
+        "words": ["diseno", "ux", "ui", "grafico", "prototipos"],
+        "areas": ["diseno", "creatividad", "marketing"],
+    },
+    "contador": {
+        "skills": ["excel", "sap", "contabilidad", "office"],
+        "words": ["contabilidad", "finanzas", "impuestos", "auditoria", "balances", "facturacion"],
+        "areas": ["finanzas", "contabilidad", "administracion"],
+    },
+    "marketing": {
+        "skills": ["seo", "google analytics", "redes sociales", "excel", "canva"],
+        "words": ["marketing", "campanas", "contenido", "marca", "digital"],
+        "areas": ["marketing", "comunicacion", "ventas"],
+    },
+    "ventas": {
+        "skills": ["crm", "salesforce", "negociacion", "excel"],
+        "words": ["ventas", "clientes", "comercial", "objetivos", "negociacion"],
+        "areas": ["ventas", "comercial"],
+    },
+    "recursos humanos": {
+        "skills": ["reclutamiento", "seleccion", "excel", "office"],
+        "words": ["seleccion", "reclutamiento", "nomina", "talento", "capacitacion", "personal"],
+        "areas": ["recursos humanos", "administracion"],
+    },
+}
+
+SENIORITY_LEVELS = [
+    (re.compile(r"\b(lead|lider|principal|staff|jefe|head)\b"), 4),
+    (re.compile(r"\b(semi ?senior|ssr|mid|intermedio|semisenior)\b"), 2),
+    (re.compile(r"\b(senior|sr)\b"), 3),
+    (re.compile(r"\b(junior|jr|trainee|practicante|becario|pasante)\b"), 1),
+]
+
+STOPWORDS = set("""
+a al algo algunas algunos ante antes como con contra cual cuando de del desde donde durante e el ella ellas
+ellos en entre era es esta estas este esto estos fue ha hasta hay la las le les lo los mas me mi muy no nos
+o otra otro para pero por que se segun ser si sin sobre su sus tambien te tiene tu un una uno unos y ya yo
+an and are as at be by for from has have in is it of on or that the this to was with will you your
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+
+
+def tokenize(value):
+    """Palabras normalizadas (sin tildes, minúsculas, sin stopwords)"""
+    if not value:
+        return []
+    tokens = _TOKEN_RE.findall(strip_accents(value).lower())
+    return [t for t in tokens if t not in STOPWORDS and (len(t) > 1 or t in ("c", "r"))]
+
+
+def seniority_level(value):
+    normalized = strip_accents(value or "").lower()
+    for pattern, level in SENIORITY_LEVELS:
+        if pattern.search(normalized):
+            return level
+    return 0
+
+
+class _Segment:
+    """Postings en formato CSR por término: docs[offsets[t]:offsets[t + 1]]"""
+
+    def __init__(self, offsets, docs, weights):
+        self.offsets = offsets
+        self.docs = docs
+        self.weights = weights
+
+    def df(self, vocab_size):
+        counts = np.diff(self.offsets)
+        if len(counts) < vocab_size:
+            counts = np.concatenate([counts, np.zeros(vocab_size - len(counts), dtype=counts.dtype)])
+        return counts
+
+    def postings(self, term_id):
+        if term_id + 1 >= len(self.offsets):
+            return None, None
+        start, end = self.offsets[term_id], self.offsets[term_id + 1]
+        return self.docs[start:end], self.weights[start:end]
+
+
+class RankingIndex:
+    """Índice BM25 de los candidatos en arrays de NumPy para puntuar roles sin el LLM.
+
+    Cada documento combina las columnas de texto con los pesos del índice FTS
+    y las habilidades normalizadas como términos "skill:<nombre>". Se guarda en
+    RANK_INDEX_PATH y se actualiza de forma incremental con los candidatos
+    nuevos (segmentos que se fusionan al pasar de MAX_SEGMENTS); si se borraron
+    candidatos se reconstruye entero. Los cambios se hacen en memoria y se
+    escriben en disco save_delay segundos después (o con save(), al parar la API).
+    """
+
+    def __init__(self, path=None, engine=None, save_delay=None):
+        self.path = path or RANK_INDEX_PATH
+        self.engine = engine or default_engine
+        self.save_delay = RANK_SAVE_DELAY if save_delay is None else save_delay
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._timer = None
+        self._reset()
+        self._loaded = False
+
+    def _reset(self):
+        self.vocab = {}
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.lengths = np.zeros(0, dtype=np.float32)
+        self.seniority = np.zeros(0, dtype=np.int8)
+        self.area_codes = np.zeros(0, dtype=np.int32)
+        self.areas = []
+        self.segments = []
+        self.last_hash = ""
+
+    # --- construcción -----------------------------------------------------
+
+    def _document_terms(self, row):
+        counts = Counter()
+        for column, weight in zip(FTS_COLUMNS, BM25_WEIGHTS):
+            for token, tf in Counter(tokenize(row[column])).items():
+                counts[token] += tf * weight
+        for skill in split_skills(row["skills"]):
+            counts["skill:" + skill] += SKILL_TERM_WEIGHT
+        return counts
+
+    def _add_documents(self, rows):
+        """Crea un segmento con las filas dadas (ya ordenadas por id)"""
+        if not rows:
+            return
+        area_index = {area: i for i, area in enumerate(self.areas)}
+        base = len(self.ids)
+        term_ids, doc_ids, tfs, lengths, seniority, area_codes, ids = [], [], [], [], [], [], []
+        for position, row in enumerate(rows):
+            counts = self._document_terms(row)
+            for term, tf in counts.items():
+                term_id = self.vocab.setdefault(term, len(self.vocab))
+                term_ids.append(term_id)
+                doc_ids.append(base + position)
+                tfs.append(tf)
+            lengths.append(sum(counts.values()))
+            seniority.append(seniority_level(row["seniority"]))
+            area = strip_accents(row["area_profesional"] or "").lower().strip()
+            area_codes.append(area_index.setdefault(area, len(area_index)))
+            ids.append(row["id"])
+        self.last_hash = rows[-1]["file_hash"] or ""
+        self.areas = sorted(area_index, key=area_index.get)
+
+        self.ids = np.concatenate([self.ids, np.array(ids, dtype=np.int64)])
+        self.lengths = np.concatenate([self.lengths, np.array(lengths, dtype=np.float32)])
+        self.seniority = np.concatenate([self.seniority, np.array(seniority, dtype=np.int8)])
+        self.area_codes = np.concatenate([self.area_codes, np.array(area_codes, dtype=np.int32)])
+        self.segments.append(self._build_segment(
+            np.array(term_ids, dtype=np.int32), np.array(doc_ids, dtype=np.int32), np.array(tfs, dtype=np.float32)
+        ))
+        if len(self.segments) > MAX_SEGMENTS:
+            self._merge_segments()
+
+    def _build_segment(self, term_ids, doc_ids, tfs):
+        order = np.argsort(term_ids, kind="stable")
+        offsets = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(self.vocab)), out=offsets[1:])
+        return _Segment(offsets, doc_ids[order], tfs[order])
+
+    def _merge_segments(self):
+        term_ids, doc_ids, tfs = [], [], []
+        for segment in self.segments:
+            df = np.diff(segment.offsets)
+            term_ids.append(np.repeat(np.arange(len(df), dtype=np.int32), df))
+            doc_ids.append(segment.docs)
+            tfs.append(segment.weights)
+        self.segments = [self._build_segment(np.concatenate(term_ids), np.concatenate(doc_ids), np.concatenate(tfs))]
+
+    def _fetch_rows(self, conn, after_id, chunk_size=2000):
+        columns = ("id", "file_hash", "seniority", "area_profesional") + tuple(c for c in FTS_COLUMNS if c != "cv_text")
+        last_id = after_id
+        while True:
+            rows = fetch_with_text(conn, columns, last_id, chunk_size)
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1]["id"]
+
+    def refresh(self):
+        """Sincroniza el índice con la base de datos; devuelve los documentos añadidos"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+            with self.engine.connect() as conn:
+                db_count, db_max = conn.execute(text("SELECT COUNT(*), MAX(id) FROM candidates")).one()
+                last_id = int(self.ids[-1]) if len(self.ids) else 0
+                stale = (db_max or 0) < last_id or db_count < len(self.ids)
+                if not stale and last_id:
+                    # Si se vació la tabla y se volvió a llenar los ids se reutilizan
+                    last_hash = conn.execute(
+                        text("SELECT file_hash FROM candidates WHERE id = :last"), {"last": last_id}
+                    ).scalar()
+                    stale = (last_hash or "") != self.last_hash
+                if not stale and db_count == len(self.ids):
+                    return 0
+                if not stale:
+                    # Candidatos borrados y otros nuevos pueden dejar el mismo total
+                    indexed = conn.execute(
+                        text("SELECT COUNT(*) FROM candidates WHERE id <= :last"), {"last": last_id}
+                    ).scalar()
+                    stale = indexed != len(self.ids)
+                if stale:
+                    self._reset()
+                    last_id = 0
+
+                before = len(self.ids)
+                for rows in self._fetch_rows(conn, last_id):
+                    self._add_documents(rows)
+            self._schedule_save()
+            return len(self.ids) - before
+
+    def invalidate(self):
+        """Descarta el índice (p. ej. tras vaciar la tabla candidates)"""
+        with self._lock:
+            self._reset()
+            self._loaded = True
+
+    def rebuild(self):
+        self.invalidate()
+        return self.refresh()
+
+    # --- persistencia -----------------------------------------------------
+
+    def _schedule_save(self):
+        # Con el lock tomado: un solo guardado pendiente para todos los cambios
+        self._dirty = True
+        if self._timer is None:
+            self._timer = threading.Timer(self.save_delay, self.save)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def save(self):
+        """Escribe el índice en disco si cambió desde el último guardado"""
+        with self._save_lock:
+            with self._lock:
+                timer, self._timer = self._timer, None
+                if timer is not None and timer is not threading.current_thread():
+                    timer.cancel()
+                if not self._dirty:
+                    return False
+                self._dirty = False
+                # Los arrays se sustituyen, no se modifican: basta con copiar las listas
+                vocab = sorted(self.vocab, key=self.vocab.get)
+                arrays = {"areas": np.array(self.areas, dtype=str), "ids": self.ids, "lengths": self.lengths,
+                          "seniority": self.seniority, "area_codes": self.area_codes,
+                          "last_hash": np.array(self.last_hash), "segments": np.array(len(self.segments))}
+                for n, segment in enumerate(self.segments):
+                    arrays[f"offsets_{n}"] = segment.offsets
+                    arrays[f"docs_{n}"] = segment.docs
+                    arrays[f"weights_{n}"] = segment.weights
+            tmp_path = self.path + ".tmp.npz"
+            try:
+                np.savez(tmp_path, vocab=np.array(vocab, dtype=str), **arrays)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"⚠️ No se pudo guardar el índice de ranking: {e}")
+                with self._lock:
+                    self._dirty = True
+                return False
+            return True
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                self.vocab = {term: i for i, term in enumerate(data["vocab"].tolist())}
+                self.areas = data["areas"].tolist()
+                self.ids = data["ids"]
+                self.lengths = data["lengths"]
+                self.seniority = data["seniority"]
+                self.area_codes = data["area_codes"]
+                self.last_hash = str(data["last_hash"])
+                self.segments = [
+                    _Segment(data[f"offsets_{n}"], data[f"docs_{n}"], data[f"weights_{n}"])
+                    for n in range(int(data["segments"]))
+                ]
+        except Exception as e:
+            print(f"⚠️ Índice de ranking ilegible, se reconstruye: {e}")
+            self._reset()
+
+    # --- consulta ---------------------------------------------------------
+
+    def build_query(self, role):
+        """Términos ponderados, nivel de seniority y áreas objetivo para un rol"""
+        normalized_role = " ".join(tokenize(role))
+        weights = Counter()
+        for token in tokenize(role):
+            weights[token] += 1.0
+        # Habilidades escritas en el propio rol ("react, node" -> skill:react, skill:node.js)
+        for part in re.split(r"[,;/]| y | and ", strip_accents(role).lower()):
+            skill = normalize_skill(part.strip()) if part.strip() else None
+            if skill and "skill:" + skill in self.vocab:
+                weights["skill:" + skill] += PROFILE_SKILL_WEIGHT
+        for token in tokenize(role):
+            skill = normalize_skill(token)
+            if skill and "skill:" + skill in self.vocab:
+                weights["skill:" + skill] += PROFILE_SKILL_WEIGHT
+
+        profiles = []
+        areas = set()
+        role_tokens = set(normalized_role.split())
+        for name, profile in ROLE_PROFILES.items():
+            if set(name.split()) <= role_tokens:
+                profiles.append(name)
+                areas.update(profile["areas"])
+                for skill in profile["skills"]:
+                    weights["skill:" + skill] += PROFILE_SKILL_WEIGHT
+                    for token in tokenize(skill):
+                        weights[token] += PROFILE_WORD_WEIGHT
+                for word in profile["words"]:
+                    for token in tokenize(word):
+                        weights[token] += PROFILE_WORD_WEIGHT
+        return weights, seniority_level(role), areas, profiles
+
+    def score(self, role):
+        """Puntuación 0-100 de todos los candidatos indexados para el rol"""
+        weights, level, areas, profiles = self.build_query(role)
+        n_docs = len(self.ids)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        if not n_docs:
+            return scores, profiles, weights
+
+        avg_length = float(self.lengths.mean()) or 1.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths / avg_length)
+        vocab_size = len(self.vocab)
+        df = sum(segment.df(vocab_size) for segment in self.segments)
+        best_possible = 0.0
+        for term, query_weight in weights.items():
+            term_id = self.vocab.get(term)
+            term_df = df[term_id] if term_id is not None else 0
+            idf = np.log(1 + (n_docs - term_df + 0.5) / (term_df + 0.5))
+            # Los términos que ningún candidato tiene también cuentan en el máximo
+            best_possible += query_weight * idf * (BM25_K1 + 1)
+            if term_id is None:
+                continue
+            for segment in self.segments:
+                docs, tfs = segment.postings(term_id)
+                if docs is None or not len(docs):
+                    continue
+                # Cada documento aparece una vez por término y segmento: la suma indexada es segura
+                scores[docs] += query_weight * idf * tfs * (BM25_K1 + 1) / (tfs + norm[docs])
+        if best_possible:
+            scores *= 100.0 / best_possible
+
+        bonus = np.ones(n_docs, dtype=np.float32)
+        if level:
+            bonus[self.seniority == level] += SENIORITY_BONUS
+            bonus[(self.seniority > 0) & (np.abs(self.seniority.astype(np.int16) - level) >= 2)] -= SENIORITY_BONUS
+        if areas and self.areas:
+            matching_areas = np.array([any(a in area for a in areas) for area in self.areas])
+            bonus[matching_areas[self.area_codes]] += AREA_BONUS
+        scores *= bonus
+        return np.minimum(scores, 100.0), profiles, weights
+
+    def rank(self, role, limit=50, offset=0):
+        """Devuelve (total, [(candidate_id, score)], perfiles usados) ordenados por score"""
+        self.refresh()
+        with self._lock:
+            scores, profiles, _ = self.score(role)
+            ids = self.ids
+        positive = int(np.count_nonzero(scores > 0))
+        wanted = min(offset + limit, positive)
+        if wanted <= 0:
+            return positive, [], profiles
+        # argpartition para no ordenar los 50k candidatos completos
+        top = np.argpartition(-scores, wanted - 1)[:wanted]
+        top = top[np.lexsort((-ids[top], -scores[top]))][offset:]
+        return positive, [(int(ids[i]), round(float(scores[i]), 2)) for i in top], profiles
+
+
+ranking_index = RankingIndex()
+
+
+def rank_candidates(role, limit=50, offset=0, index=None):
+    """Candidatos ordenados por afinidad local con el rol (sin llamar al LLM)"""
+    index = index or ranking_index
+    total, ranked, profiles = index.rank(role, limit, offset)
+    if not ranked:
+        return total, [], profiles
+    engine = index.engine
+
+    params = {f"i{n}": candidate_id for n, (candidate_id, _) in enumerate(ranked)}
+    placeholders = ", ".join(f":i{n}" for n in range(len(ranked)))
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            f"""SELECT id, nombre, email, skills, seniority, area_profesional, match
+                FROM candidates WHERE id IN ({placeholders})"""
+        ), params).mappings().all()
+    by_id = {row["id"]: dict(row) for row in rows}
+
+    weights, _, _, _ = index.build_query(role)
+    wanted_skills = {term[6:] for term in weights if term.startswith("skill:")}
+    results = []
+    for candidate_id, score in ranked:
+        row = by_id.get(candidate_id)
+        if row is None:
+            continue
+        row["rank_score"] = score
+        row["matched_skills"] = [s for s in split_skills(row["skills"]) if s in wanted_skills]
+        results.append(row)
+    return total, results, profiles
+
+
+if __name__ == "__main__":
+    if "--rebuild" in sys.argv:
+        start = time.time()
+        count = ranking_index.rebuild()
+        ranking_index.save()
+        print(f"✅ Índice de ranking reconstruido ({count} candidatos, {time.time() - start:.1f} s)")
+    elif len(sys.argv) > 1:
+        role = " ".join(sys.argv[1:])
+        start = time.time()
+        total, results, profiles = rank_candidates(role, limit=20)
+        print(f"🏆 {total} candidatos con afinidad en {time.time() - start:.3f} s (perfiles: {', '.join(profiles) or '-'})")
+        for item in results:
+            print(f"  [{item['rank_score']:6.2f}] #{item['id']} {item['nombre']} - {', '.join(item['matched_skills'])}")
+    else:
+        print("Uso: python ranking.py --rebuild | python ranking.py <rol>")
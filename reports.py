@@ -0,0 +1,322 @@
+import csv
+import io
+import json
+import os
+import re
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A3, landscape, letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import KeepTogether, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from sqlalchemy import text
+
+from models import engine as default_engine
+
+REPORT_COLUMNS = ["id", "nombre", "email", "perfil", "skills", "experiencia", "seniority", "area_profesional", "match"]
+REPORT_HEADERS = ["ID", "Nombre", "Email", "Perfil", "Habilidades", "Experiencia", "Nivel", "Área", "Match %"]
+REPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+    "pdf": "application/pdf",
+}
+# Filas leídas por consulta y filas por tabla del PDF
+REPORT_CHUNK = int(os.environ.get("CV_REPORT_CHUNK", "500"))
+PDF_TABLE_ROWS = 100
+FILE_CHUNK = 64 * 1024
+
+# Textos por defecto de las celdas vacías del PDF (por índice de columna)
+EMPTY_CELLS = {3: "Perfil análisis", 4: "Habilidades análisis", 5: "Experiencia análisis",
+               6: "Por determinar", 7: "Área análisis", 8: "0"}
+
+CORRECTIONS = [(re.compile(wrong, re.IGNORECASE), correct) for wrong, correct in [
+    (r'\bTechnología\b', 'Tecnología'),
+    (r'\bElectrons\b', 'Electrónica'),
+    (r'\bMicrocenter\b', 'Micro Center'),
+    (r'\bPower Point\b', 'PowerPoint'),
+    (r'\bSeniority\b', 'Nivel'),
+    (r'\bAnálisis de perfil en proceso\b', 'Perfil análisis'),
+    (r'\bAnálisis de experiencia en proceso\b', 'Experiencia análisis'),
+    (r'\bÁrea profesional en análisis\b', 'Área análisis'),
+    (r'\bNo especificado\b', 'Por analizar'),
+    (r'\bHabilidades no especificadas\b', 'Habilidades análisis'),
+    (r'\bExperiencia no especificada\b', 'Experiencia análisis'),
+]]
+
+
+def iter_candidate_rows(chunk_size=REPORT_CHUNK, area=None, seniority=None, min_match=None, engine=None):
+    """Lee los candidatos por bloques de chunk_size filas (listas de tuplas en el orden de REPORT_COLUMNS).
+
+    Cada bloque es una consulta corta que continúa desde el último id visto:
+    no se cargan todas las filas ni se mantiene abierta una transacción de
+    lectura mientras se genera el informe.
+    """
+    engine = engine or default_engine
+    filters = ["id > :last"]
+    params = {"size": chunk_size}
+    if area:
+        filters.append("area_profesional = :area")
+        params["area"] = area
+    if seniority:
+        filters.append("seniority = :seniority")
+        params["seniority"] = seniority
+    if min_match is not None:
+        filters.append("match >= :min_match")
+        params["min_match"] = min_match
+    query = text(f"SELECT {', '.join(REPORT_COLUMNS)} FROM candidates "
+                 f"WHERE {' AND '.join(filters)} ORDER BY id LIMIT :size")
+    last_id = 0
+    while True:
+        with engine.connect() as conn:
+            rows = [tuple(row) for row in conn.execute(query, dict(params, last=last_id))]
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def stream_csv(chunks):
+    """CSV en UTF-8 con BOM (Excel detecta así los acentos), un bloque de bytes por bloque de filas"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(REPORT_HEADERS)
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+    for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def stream_jsonl(chunks):
+    """Un objeto JSON por candidato y línea"""
+    for rows in chunks:
+        yield "".join(json.dumps(dict(zip(REPORT_COLUMNS, row)), ensure_ascii=False) + "\n"
+                      for row in rows).encode("utf-8")
+
+
+def iter_file(path, delete=False):
+    """Devuelve un fichero por bloques (y lo borra al terminar si delete=True)"""
+    try:
+        with open(path, "rb") as f:
+            while True:
+                block = f.read(FILE_CHUNK)
+                if not block:
+                    break
+                yield block
+    finally:
+        if delete:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def clean_text(value):
+    """Texto legible para el informe: listas/objetos JSON aplanados y términos corregidos"""
+    if value is None:
+        return ""
+    value = str(value).strip()
+    if not value:
+        return ""
+
+    # Limpiar JSON y listas
+    if value.startswith('[') or value.startswith('{'):
+        try:
+            data = json.loads(value)
+            if isinstance(data, list):
+                value = ", ".join(str(item) for item in data if str(item).strip())
+            elif isinstance(data, dict):
+                value = ", ".join(f"{k}: {v}" for k, v in data.items() if str(v).strip())
+        except ValueError:
+            value = re.sub(r'[\[\]\{\}\'\"]', '', value)
+
+    for wrong, correct in CORRECTIONS:
+        value = wrong.sub(correct, value)
+    return value
+
+
+def _cut(value, limit, sentence_from=None):
+    if len(value) <= limit:
+        return value
+    # Buscar un punto natural para cortar
+    if sentence_from is not None:
+        cut_point = value.find('.', sentence_from)
+        if cut_point > 0:
+            return value[:cut_point + 1]
+    return value[:limit] + "..."
+
+
+def pdf_cells(row):
+    """Celdas de texto de una fila para la tabla del PDF (con truncamiento por columna)"""
+    cells = []
+    for i, item in enumerate(row):
+        if i == 8 and isinstance(item, (int, float)):
+            value = f"{item:g}"
+        else:
+            value = clean_text(item) or EMPTY_CELLS.get(i, "")
+        if i == 3:  # Perfil
+            value = _cut(value, 120, 80)
+        elif i == 4:  # Habilidades
+            value = _cut(value, 100)
+        elif i == 5:  # Experiencia
+            value = _cut(value, 150, 120)
+        cells.append(value)
+    return cells
+
+
+def match_color(value):
+    if not isinstance(value, (int, float)) or value == 0:
+        return colors.HexColor("#ffebee")
+    if value < 50:
+        return colors.HexColor("#fff3e0")
+    if value < 80:
+        return colors.HexColor("#e3f2fd")
+    return colors.HexColor("#e8f5e8")
+
+
+class _StreamingDocTemplate(SimpleDocTemplate):
+    """SimpleDocTemplate que pide los flowables a un generador.
+
+    build() maqueta la lista con handle_flowable(), que consume el primero;
+    antes de cada llamada se añade el siguiente del generador, así solo existen
+    los flowables de la tabla que se está maquetando y las páginas ya
+    dibujadas no retienen sus Paragraph.
+    """
+
+    def build_from(self, source):
+        self._source = iter(source)
+        self._story = []
+        self._refill()
+        self.build(self._story)
+
+    def _refill(self):
+        while self._source is not None and len(self._story) < 2:
+            flowable = next(self._source, None)
+            if flowable is None:
+                self._source = None
+            else:
+                self._story.append(flowable)
+
+    def handle_flowable(self, flowables):
+        # También se llama con la lista interna de elementos pendientes de página
+        if flowables is getattr(self, "_story", None):
+            self._refill()
+        super().handle_flowable(flowables)
+
+
+def _styles(title_size):
+    styles = getSampleStyleSheet()
+    title = ParagraphStyle("TitleStyle", parent=styles["Title"], fontSize=title_size, spaceAfter=10,
+                           alignment=1, textColor=colors.HexColor("#2c3e50"))
+    cell = ParagraphStyle("WrapStyle", parent=styles["Normal"], fontSize=7, leading=8,
+                          spaceAfter=1, spaceBefore=1)
+    footer = ParagraphStyle("FooterStyle", parent=styles["Normal"], fontSize=8, alignment=1,
+                            textColor=colors.HexColor("#666666"))
+    return styles, title, cell, footer
+
+
+def _document(target, pagesize):
+    return _StreamingDocTemplate(target, pagesize=pagesize, leftMargin=0.3 * inch, rightMargin=0.3 * inch,
+                             topMargin=0.4 * inch, bottomMargin=0.4 * inch,
+                             title="Informe de análisis de CVs", pageCompression=1)
+
+
+def write_pdf(target, chunks):
+    """Informe A3 horizontal con una tabla por cada PDF_TABLE_ROWS candidatos.
+
+    target es una ruta o un fichero abierto en binario; chunks, bloques de
+    filas como los de iter_candidate_rows. Devuelve cuántos candidatos se
+    incluyeron. Las tablas pequeñas se maquetan en tiempo lineal (una sola
+    tabla con miles de filas se parte en páginas una y otra vez) y se crean
+    solo cuando la maquetación llega a ellas.
+    """
+    doc = _document(target, landscape(A3))
+    _, title_style, cell_style, footer_style = _styles(14)
+
+    col_widths = [w * inch for w in (0.4, 1.2, 1.6, 3.0, 2.5, 3.5, 0.8, 1.5, 0.7)]
+    available_width = doc.pagesize[0] - doc.leftMargin - doc.rightMargin
+    if sum(col_widths) > available_width:
+        scale_factor = available_width / sum(col_widths)
+        col_widths = [w * scale_factor * 0.95 for w in col_widths]
+    header = [Paragraph(f"<b>{escape(h)}</b>", cell_style) for h in REPORT_HEADERS]
+    base_style = [
+        # Encabezado
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#f1f2f3")),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
+        ('TOPPADDING', (0, 0), (-1, 0), 4),
+        # Filas de datos
+        ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
+        ('VALIGN', (0, 1), (-1, -1), 'TOP'),
+        ('FONTSIZE', (0, 0), (-1, -1), 7),
+        ('LEFTPADDING', (0, 0), (-1, -1), 3),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 3),
+        ('TOPPADDING', (0, 1), (-1, -1), 2),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 2),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor("#dddddd")),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor("#f8f9fa")]),
+        ('ALIGN', (0, 1), (0, -1), 'CENTER'),
+        ('ALIGN', (6, 1), (6, -1), 'CENTER'),
+        ('ALIGN', (8, 1), (8, -1), 'CENTER'),
+    ]
+    total = 0
+
+    def flowables():
+        nonlocal total
+        yield Paragraph("<b>INFORME DE ANÁLISIS DE CVs</b>", title_style)
+        yield Spacer(1, 0.2 * inch)
+        for rows in chunks:
+            for start in range(0, len(rows), PDF_TABLE_ROWS):
+                part = rows[start:start + PDF_TABLE_ROWS]
+                data = [header] + [[Paragraph(escape(cell), cell_style) for cell in pdf_cells(row)]
+                                   for row in part]
+                style = TableStyle(base_style)
+                for i, row in enumerate(part, start=1):
+                    style.add('BACKGROUND', (8, i), (8, i), match_color(row[8]))
+                table = Table(data, colWidths=col_widths, repeatRows=1)
+                table.setStyle(style)
+                total += len(part)
+                yield table
+        yield Spacer(1, 0.3 * inch)
+        yield Paragraph(f"<b>Total de CVs analizados:</b> {total}", footer_style)
+
+    doc.build_from(flowables())
+    return total
+
+
+def write_pdf_vertical(target, chunks):
+    """Informe alternativo en carta vertical: una ficha por candidato con todos sus campos"""
+    doc = _document(target, letter)
+    styles, title_style, _, footer_style = _styles(12)
+    total = 0
+
+    def flowables():
+        nonlocal total
+        yield Paragraph("<b>INFORME DE CVs (Formato Vertical)</b>", title_style)
+        yield Spacer(1, 0.2 * inch)
+        for rows in chunks:
+            for row in rows:
+                card = [Paragraph(f"<b>CV {row[0]}: {escape(clean_text(row[1]))}</b>", styles["Normal"])]
+                for label, value in zip(REPORT_HEADERS[2:], row[2:]):
+                    card.append(Paragraph(f"<b>{escape(label)}:</b> {escape(clean_text(value))}", styles["Normal"]))
+                card.append(Spacer(1, 0.1 * inch))
+                total += 1
+                yield KeepTogether(card)
+        yield Paragraph(f"<b>Total de CVs analizados:</b> {total}", footer_style)
+
+    doc.build_from(flowables())
+    return total
+
+
+def export_pdf(path, chunk_size=PDF_TABLE_ROWS, engine=None, **filters):
+    """Genera el PDF en path; si la maquetación en tabla falla usa el formato vertical.
+
+    Devuelve (candidatos incluidos, "table" o "vertical").
+    """
+    try:
+        return write_pdf(path, iter_candidate_rows(chunk_size, engine=engine, **filters)), "table"
+    except Exception as e:
+        print(f"❌ Error generando PDF: {e}")
+        print("🔄 Intentando con formato vertical...")
+        return write_pdf_vertical(path, iter_candidate_rows(chunk_size, engine=engine, **filters)), "vertical"
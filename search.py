@@ -0,0 +1,269 @@
+import re
+import sqlite3
+import sys
+import unicodedata
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from models import engine as default_engine, unpack_text
+
+FTS_COLUMNS = ("skills", "perfil", "experiencia", "cv_text")
+# Peso de cada columna en el ranking BM25 (mismo orden que FTS_COLUMNS)
+BM25_WEIGHTS = (3.0, 1.5, 1.0, 0.5)
+
+# Con contentless_delete (SQLite 3.43+) el índice solo guarda los términos: no
+# copia el texto del CV, que está comprimido en candidate_documents. En versiones
+# anteriores la tabla guarda su propia copia sin comprimir. En los dos casos el
+# índice se mantiene desde la aplicación, que descomprime el texto en Python:
+# BatchWriter y process_cv añaden cada candidato (index_candidates) y quien
+# modifique los textos indexados llama a reindex_candidates. En SQL solo queda el
+# trigger de borrado, por rowid, así que ninguna conexión necesita unpack_text()
+# y borrar candidatos funciona desde cualquiera (sqlite3, un navegador de SQLite...)
+FTS_CONTENTLESS = sqlite3.sqlite_version_info >= (3, 43, 0)
+FTS_OPTIONS = "content='', contentless_delete=1," if FTS_CONTENTLESS else ""
+
+FTS_INSERT = "INSERT INTO candidates_fts(rowid, skills, perfil, experiencia, cv_text) VALUES (?, ?, ?, ?, ?)"
+FTS_SOURCE = """SELECT c.id, c.skills, c.perfil, c.experiencia, d.cv_text
+    FROM candidates c JOIN candidate_documents d ON d.candidate_id = c.id"""
+
+FTS_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS candidates_fts USING fts5(
+        skills, perfil, experiencia, cv_text, {FTS_OPTIONS}
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    # Al borrar un candidato también se borra su documento (documents.DOCUMENT_TRIGGERS)
+    """CREATE TRIGGER IF NOT EXISTS candidates_fts_ad AFTER DELETE ON candidates BEGIN
+        DELETE FROM candidates_fts WHERE rowid = old.id;
+    END""",
+]
+# Triggers de versiones anteriores que reindexaban con unpack_text() al editar los
+# textos: fallaban ("no such function") en conexiones sin la función registrada
+LEGACY_TRIGGERS = ("candidates_fts_au", "candidate_documents_fts_au")
+
+
+def _fts_exists(conn):
+    return conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'candidates_fts'"
+    ).first() is not None
+
+
+def index_candidates(conn, rows):
+    """Añade al índice [(candidate_id, fila de candidate_row)] con el texto sin
+    comprimir, en la transacción de conn. Si el índice aún no existe no hace
+    nada: ensure_fts() lo llena al crearlo."""
+    if not rows or not _fts_exists(conn):
+        return 0
+    conn.exec_driver_sql(FTS_INSERT, [
+        (candidate_id, row.get("skills"), row.get("perfil"), row.get("experiencia"), row.get("cv_text"))
+        for candidate_id, row in rows
+    ])
+    return len(rows)
+
+
+def _fill_fts(conn, chunk_size=2000):
+    """Añade al índice todos los candidatos con documento, descomprimiendo el texto en Python"""
+    last_id = 0
+    while True:
+        rows = conn.exec_driver_sql(
+            FTS_SOURCE + " WHERE c.id > ? ORDER BY c.id LIMIT ?", (last_id, chunk_size)
+        ).all()
+        if not rows:
+            return
+        conn.exec_driver_sql(FTS_INSERT, [
+            (candidate_id, skills, perfil, experiencia, unpack_text(cv_text))
+            for candidate_id, skills, perfil, experiencia, cv_text in rows
+        ])
+        last_id = rows[-1][0]
+
+
+def reindex_candidates(conn, candidate_ids):
+    """Vuelve a indexar los candidatos dados con sus textos actuales, en la
+    transacción de conn. Lo necesita cualquier UPDATE de skills, perfil,
+    experiencia o candidate_documents.cv_text (la aplicación no hace ninguno);
+    desde fuera de la aplicación, python search.py --rebuild."""
+    candidate_ids = [int(candidate_id) for candidate_id in candidate_ids]
+    if not candidate_ids or not _fts_exists(conn):
+        return 0
+    conn.exec_driver_sql("DELETE FROM candidates_fts WHERE rowid = ?", [(i,) for i in candidate_ids])
+    placeholders = ", ".join("?" for _ in candidate_ids)
+    rows = conn.exec_driver_sql(FTS_SOURCE + f" WHERE c.id IN ({placeholders})", tuple(candidate_ids)).all()
+    if rows:
+        conn.exec_driver_sql(FTS_INSERT, [
+            (candidate_id, skills, perfil, experiencia, unpack_text(cv_text))
+            for candidate_id, skills, perfil, experiencia, cv_text in rows
+        ])
+    return len(rows)
+
+
+def drop_fts(conn):
+    """Elimina el índice y sus triggers (para recrearlos con otro esquema)"""
+    triggers = conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND sql LIKE '%candidates_fts%'"
+    )).scalars().all()
+    for name in triggers:
+        conn.execute(text(f'DROP TRIGGER IF EXISTS "{name}"'))
+    conn.execute(text("DROP TABLE IF EXISTS candidates_fts"))
+    # Vista de la que leía el índice de la versión anterior
+    conn.execute(text("DROP VIEW IF EXISTS candidates_fts_content"))
+
+
+def _create_fts(conn):
+    for statement in FTS_SCHEMA:
+        conn.execute(text(statement))
+    _fill_fts(conn)
+
+
+def ensure_fts(engine=None):
+    """Crea el índice FTS5 y sus triggers; si es nuevo lo llena con los datos existentes"""
+    engine = engine or default_engine
+    with engine.begin() as conn:
+        sql = conn.execute(text(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'candidates_fts'"
+        )).scalar()
+        if sql is not None and "content='candidates" in sql:
+            # Índice de una versión anterior (contenido externo en candidates o en una vista)
+            drop_fts(conn)
+            sql = None
+        if sql is None:
+            _create_fts(conn)
+            return True
+        for name in LEGACY_TRIGGERS:
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        for statement in FTS_SCHEMA:
+            conn.execute(text(statement))
+    return False
+
+
+def rebuild_fts(engine=None):
+    """Reconstruye el índice completo a partir de candidates y candidate_documents"""
+    engine = engine or default_engine
+    with engine.begin() as conn:
+        drop_fts(conn)
+        _create_fts(conn)
+        conn.execute(text("INSERT INTO candidates_fts(candidates_fts) VALUES ('optimize')"))
+        return conn.execute(text("SELECT COUNT(*) FROM candidates")).scalar()
+
+
+def quote_terms(query):
+    """Convierte una búsqueda libre en términos literales (para 'c++', 'node.js'...)"""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+# Primero los ids de la página por BM25; solo de esos se leen los textos para el fragmento
+SEARCH_SQL = f"""
+    SELECT c.id, c.nombre, c.email, c.seniority, c.area_profesional, c.match, r.score,
+           c.skills, c.perfil, c.experiencia, d.cv_text
+    FROM (
+        SELECT rowid, bm25(candidates_fts, {", ".join(str(w) for w in BM25_WEIGHTS)}) AS score
+        FROM candidates_fts
+        WHERE candidates_fts MATCH :query
+        ORDER BY score
+        LIMIT :limit OFFSET :offset
+    ) r
+    JOIN candidates c ON c.id = r.rowid
+    LEFT JOIN candidate_documents d ON d.candidate_id = c.id
+    ORDER BY r.score
+"""
+
+COUNT_SQL = "SELECT COUNT(*) FROM candidates_fts WHERE candidates_fts MATCH :query"
+
+SNIPPET_WORDS = 16
+_WORD_RE = re.compile(r"\w+")
+_OPERATORS = {"AND", "OR", "NOT", "NEAR"}
+# Variantes con tilde de cada letra (el índice las ignora: remove_diacritics 2)
+_ACCENTS = {"a": "aáàäâã", "e": "eéèëê", "i": "iíìïî", "o": "oóòöôõ", "u": "uúùüû", "n": "nñ", "c": "cç"}
+
+
+def _fold(word):
+    normalized = unicodedata.normalize("NFKD", word.lower())
+    return "".join(c for c in normalized if not unicodedata.combining(c))
+
+
+def match_pattern(query):
+    """Expresión regular con las palabras de la consulta (sin operadores ni
+    filtros de columna), para marcarlas en el fragmento; None si no hay"""
+    query = re.sub(r"\b\w+\s*:", " ", query)
+    parts = set()
+    for word, star in re.findall(r"(\w+)(\*?)", query):
+        if word in _OPERATORS:
+            continue
+        letters = "".join(f"[{_ACCENTS[c]}]" if c in _ACCENTS else re.escape(c) for c in _fold(word))
+        parts.add(letters + (r"\w*" if star else ""))
+    if not parts:
+        return None
+    return re.compile(r"(?<!\w)(?:" + "|".join(sorted(parts)) + r")(?!\w)", re.IGNORECASE)
+
+
+def make_snippet(texts, pattern, size=SNIPPET_WORDS):
+    """Fragmento de size palabras del texto con más coincidencias, con ellas
+    entre <mark> (como snippet() de FTS5, que no funciona sin el texto en el índice)"""
+    best = None
+    for value in texts:
+        hits = [m.span() for m in pattern.finditer(value)] if value and pattern else []
+        if hits and (best is None or len(hits) > len(best[1])):
+            best = (value, hits)
+    if best is None:
+        return ""
+    value, hits = best
+    words = [m.span() for m in _WORD_RE.finditer(value)]
+    positions = {start: index for index, (start, _) in enumerate(words)}
+    marked = [positions[hit[0]] for hit in hits if hit[0] in positions]
+    # La ventana que empieza en la coincidencia con más coincidencias detrás
+    first = max(marked, key=lambda i: sum(1 for j in marked if i <= j < i + size)) if marked else 0
+    first = max(0, min(first - 2, len(words) - size))
+    last = min(len(words), first + size)
+    begin, end = words[first][0], words[last - 1][1]
+    parts = []
+    position = begin
+    for hit_start, hit_end in hits:
+        if begin <= hit_start and hit_end <= end:
+            parts += [value[position:hit_start], "<mark>", value[hit_start:hit_end], "</mark>"]
+            position = hit_end
+    parts.append(value[position:end])
+    return ("…" if first else "") + "".join(parts) + ("…" if last < len(words) else "")
+
+
+def search_candidates(query, limit=20, offset=0, engine=None):
+    """Busca con la sintaxis de FTS5 (python AND docker, "machine learning", react OR vue).
+
+    Si la consulta no es válida para FTS5 se repite tratando cada palabra como
+    texto literal. Devuelve (total, resultados ordenados por BM25).
+    """
+    engine = engine or default_engine
+    params = {"limit": limit, "offset": offset}
+    with engine.connect() as conn:
+        try:
+            return _run_search(conn, dict(params, query=query))
+        except OperationalError:
+            conn.rollback()
+            return _run_search(conn, dict(params, query=quote_terms(query)))
+
+
+def _run_search(conn, params):
+    total = conn.execute(text(COUNT_SQL), params).scalar()
+    rows = conn.execute(text(SEARCH_SQL), params).mappings().all()
+    pattern = match_pattern(params["query"])
+    results = []
+    for row in rows:
+        item = dict(row)
+        texts = [item.pop(column) for column in FTS_COLUMNS]
+        texts[-1] = unpack_text(texts[-1])
+        item["snippet"] = make_snippet(texts, pattern)
+        # bm25() es menor cuanto más relevante: se invierte para la API
+        item["score"] = round(-item["score"], 4)
+        results.append(item)
+    return total, results
+
+
+if __name__ == "__main__":
+    if "--rebuild" in sys.argv:
+        count = rebuild_fts()
+        print(f"✅ Índice de búsqueda reconstruido ({count} candidatos)")
+    elif len(sys.argv) > 1:
+        total, results = search_candidates(" ".join(sys.argv[1:]))
+        print(f"🔎 {total} resultados")
+        for item in results:
+            print(f"  [{item['score']:.2f}] #{item['id']} {item['nombre']}: {item['snippet']}")
+    else:
+        print("Uso: python search.py --rebuild | python search.py <consulta>")
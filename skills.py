@@ -0,0 +1,240 @@
+import json
+import os
+import re
+import sys
+import unicodedata
+from functools import lru_cache
+
+from sqlalchemy import text
+
+from models import engine as default_engine
+
+# Variantes habituales -> nombre canónico (ambos ya normalizados)
+SKILL_ALIASES = {
+    "reactjs": "react", "react.js": "react", "react js": "react",
+    "node": "node.js", "nodejs": "node.js", "node js": "node.js",
+    "vuejs": "vue", "vue.js": "vue", "angularjs": "angular", "angular.js": "angular",
+    "js": "javascript", "java script": "javascript", "ecmascript": "javascript",
+    "ts": "typescript",
+    "py": "python", "python3": "python", "python 3": "python",
+    "golang": "go",
+    "c sharp": "c#", "csharp": "c#",
+    "cpp": "c++",
+    "postgres": "postgresql", "postgre": "postgresql", "postgre sql": "postgresql",
+    "mongo": "mongodb", "mongo db": "mongodb",
+    "ms sql": "sql server", "mssql": "sql server", "microsoft sql server": "sql server",
+    "k8s": "kubernetes",
+    "amazon web services": "aws", "google cloud": "gcp", "google cloud platform": "gcp",
+    "microsoft azure": "azure",
+    "html5": "html", "css3": "css",
+    "sklearn": "scikit-learn", "scikit learn": "scikit-learn",
+    "ml": "machine learning", "aprendizaje automatico": "machine learning",
+    "ms excel": "excel", "microsoft excel": "excel",
+    "ms word": "word", "microsoft word": "word",
+    "power point": "powerpoint", "ms powerpoint": "powerpoint", "microsoft powerpoint": "powerpoint",
+    "ms office": "office", "microsoft office": "office", "paquete office": "office",
+    "powerbi": "power bi", "git hub": "github",
+    "ingles": "ingles", "english": "ingles",
+}
+
+# A partir de cuántos resultados compensa recorrer candidates por match y
+# parar al completar la página en vez de ordenar todos los resultados
+DENSE_RESULT_COUNT = int(os.environ.get("CV_DENSE_SKILL_RESULTS", "2000"))
+
+_SPLIT_RE = re.compile(r"[,;\n|•·]|\s/\s")
+_PARENS_RE = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+_EDGE_RE = re.compile(r"^[\s\-–*:.\"']+|[\s\-–*:.\"']+$")
+_COMBINING_RE = re.compile(r"[\u0300-\u036f]")
+
+
+def strip_accents(value):
+    if value.isascii():
+        return value
+    return _COMBINING_RE.sub("", unicodedata.normalize("NFKD", value))
+
+
+@lru_cache(maxsize=50000)
+def normalize_skill(raw):
+    """Nombre canónico de una habilidad, o None si no parece una habilidad"""
+    value = strip_accents(str(raw)).lower()
+    value = _PARENS_RE.sub(" ", value)
+    value = value.split(":")[0]  # "Python : Seniority Intermedio" -> "python"
+    value = _EDGE_RE.sub("", " ".join(value.split()))
+    if not value or len(value) > 60 or not any(c.isalnum() for c in value):
+        return None
+    return SKILL_ALIASES.get(value, value)
+
+
+def split_skills(skills_text):
+    """Separa el texto libre de Candidate.skills en habilidades normalizadas"""
+    if not skills_text:
+        return []
+    items = None
+    stripped = skills_text.strip()
+    if stripped.startswith("["):
+        try:
+            items = [str(item) for item in json.loads(stripped)]
+        except ValueError:
+            items = None
+    if items is None:
+        items = _SPLIT_RE.split(skills_text)
+    names = []
+    for item in items:
+        name = normalize_skill(item.strip())
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+SKILL_TRIGGERS = [
+    # Contadores por habilidad para que las facetas no tengan que agrupar la tabla de relación
+    """CREATE TRIGGER IF NOT EXISTS candidate_skills_ai AFTER INSERT ON candidate_skills BEGIN
+        UPDATE skills SET candidate_count = candidate_count + 1 WHERE id = new.skill_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS candidate_skills_ad AFTER DELETE ON candidate_skills BEGIN
+        UPDATE skills SET candidate_count = candidate_count - 1 WHERE id = old.skill_id;
+    END""",
+    # Al borrar un candidato se borran sus habilidades
+    """CREATE TRIGGER IF NOT EXISTS candidates_skills_ad AFTER DELETE ON candidates BEGIN
+        DELETE FROM candidate_skills WHERE candidate_id = old.id;
+    END""",
+]
+
+
+def ensure_skill_triggers(engine=None):
+    engine = engine or default_engine
+    with engine.begin() as conn:
+        for statement in SKILL_TRIGGERS:
+            conn.execute(text(statement))
+
+
+def index_candidate_skills(conn, items):
+    """Guarda las habilidades de [(candidate_id, skills_text)] usando la conexión dada"""
+    links = []
+    for candidate_id, skills_text in items:
+        for name in split_skills(skills_text):
+            links.append((candidate_id, name))
+    if not links:
+        return 0
+
+    names = sorted({name for _, name in links})
+    conn.execute(text("INSERT OR IGNORE INTO skills (name, candidate_count) VALUES (:name, 0)"),
+                 [{"name": name} for name in names])
+    skill_ids = {}
+    for i in range(0, len(names), 500):
+        chunk = names[i:i + 500]
+        placeholders = ", ".join(f":n{j}" for j in range(len(chunk)))
+        rows = conn.execute(text(f"SELECT name, id FROM skills WHERE name IN ({placeholders})"),
+                            {f"n{j}": name for j, name in enumerate(chunk)})
+        skill_ids.update(rows.all())
+    # Parámetros posicionales directos al driver: son muchas filas y compilar
+    # un diccionario por fila costaba más que la propia inserción
+    conn.exec_driver_sql(
+        "INSERT OR IGNORE INTO candidate_skills (candidate_id, skill_id) VALUES (?, ?)",
+        [(candidate_id, skill_ids[name]) for candidate_id, name in links]
+    )
+    return len(links)
+
+
+def backfill_skills(engine=None, chunk_size=2000):
+    """Reconstruye la tabla de relación a partir de Candidate.skills"""
+    engine = engine or default_engine
+    ensure_skill_triggers(engine)
+    total = 0
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM candidate_skills"))
+        conn.execute(text("UPDATE skills SET candidate_count = 0"))
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                text("SELECT id, skills FROM candidates WHERE id > :last ORDER BY id LIMIT :size"),
+                {"last": last_id, "size": chunk_size}
+            ).all()
+            if not rows:
+                break
+            total += index_candidate_skills(conn, rows)
+            last_id = rows[-1][0]
+    return total
+
+
+def skill_facets(prefix=None, limit=50, engine=None):
+    """Habilidades con su número de candidatos, de más a menos frecuente"""
+    engine = engine or default_engine
+    params = {"limit": limit}
+    where = "candidate_count > 0"
+    if prefix:
+        normalized = normalize_skill(prefix) or ""
+        where += " AND name LIKE :prefix ESCAPE '\\'"
+        params["prefix"] = normalized.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(f"SELECT name, candidate_count FROM skills WHERE {where} ORDER BY candidate_count DESC, name LIMIT :limit"),
+            params
+        ).all()
+    return [{"skill": name, "count": count} for name, count in rows]
+
+
+def candidates_with_skills(names, limit=50, offset=0, engine=None):
+    """Candidatos que tienen todas las habilidades indicadas, por match descendente.
+
+    Se recorre la lista de la habilidad más rara en el índice (skill_id,
+    candidate_id) y el resto se comprueba por clave primaria, así el coste
+    depende de esa lista y no del número de candidatos. Si hay muchos
+    resultados se recorre candidates en orden de match y la página se
+    completa enseguida. Devuelve (habilidades normalizadas, total, candidatos).
+    """
+    engine = engine or default_engine
+    normalized = []
+    for name in names:
+        skill = normalize_skill(name)
+        if skill and skill not in normalized:
+            normalized.append(skill)
+    if not normalized:
+        return normalized, 0, []
+
+    with engine.connect() as conn:
+        params = {f"n{i}": name for i, name in enumerate(normalized)}
+        placeholders = ", ".join(f":n{i}" for i in range(len(normalized)))
+        found = conn.execute(
+            text(f"SELECT id, candidate_count FROM skills WHERE name IN ({placeholders})"), params
+        ).all()
+        if len(found) < len(normalized):
+            return normalized, 0, []
+
+        found = sorted(found, key=lambda row: row[1])
+        params = {f"s{i}": skill_id for i, (skill_id, _) in enumerate(found)}
+        has_skill = ("EXISTS (SELECT 1 FROM candidate_skills s{i} "
+                     "WHERE s{i}.candidate_id = {owner} AND s{i}.skill_id = :s{i})")
+        matching = "FROM candidate_skills s0 WHERE s0.skill_id = :s0" + "".join(
+            " AND " + has_skill.format(i=i, owner="s0.candidate_id") for i in range(1, len(found))
+        )
+        if len(found) == 1:
+            total = found[0][1]
+        else:
+            total = conn.execute(text(f"SELECT COUNT(*) {matching}"), params).scalar()
+        if not total:
+            return normalized, 0, []
+
+        columns = "c.id, c.nombre, c.email, c.skills, c.seniority, c.area_profesional, c.match"
+        if total >= DENSE_RESULT_COUNT:
+            source = "candidates c WHERE " + " AND ".join(
+                has_skill.format(i=i, owner="c.id") for i in range(len(found))
+            )
+        else:
+            source = f"(SELECT s0.candidate_id {matching}) m JOIN candidates c ON c.id = m.candidate_id"
+        rows = conn.execute(
+            text(f"SELECT {columns} FROM {source} ORDER BY c.match DESC, c.id DESC LIMIT :limit OFFSET :offset"),
+            dict(params, limit=limit, offset=offset)
+        ).mappings().all()
+    return normalized, total, [dict(row) for row in rows]
+
+
+if __name__ == "__main__":
+    if "--backfill" in sys.argv:
+        from db import init_db
+        init_db()
+        links = backfill_skills()
+        print(f"✅ Habilidades indexadas ({links} relaciones candidato-habilidad)")
+    else:
+        for facet in skill_facets(limit=30):
+            print(f"{facet['count']:>6}  {facet['skill']}")
@@ -1,529 +1,1014 @@
-
-async function processCVs() {
-    const roleInput = document.getElementById('role');
-    const processBtn = document.getElementById('processBtn');
-    const loadingDiv = document.getElementById('loading');
-    const resultsDiv = document.getElementById('results');
-    
-    // Deshabilitar botón y mostrar loading
-    processBtn.disabled = true;
-    loadingDiv.style.display = 'block';
-    resultsDiv.innerHTML = '';
-    
-    try {
-        const role = roleInput.value.trim();
-        const url = role 
-            ? `/process-cvs?role=${encodeURIComponent(role)}`
-            : `/process-cvs`;
-            
-        const response = await fetch(url, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            }
-        });
-        
-        const data = await response.json();
-        
-        if (response.ok) {
-            displaySuccess(data);
-            // Cargar candidatos después del procesamiento
-            setTimeout(loadCandidates, 1000);
-        } else {
-            displayError(data.error || 'Error desconocido');
-        }
-        
-    } catch (error) {
-        displayError(`Error de conexión: ${error.message}`);
-    } finally {
-        // Rehabilitar botón y ocultar loading
-        processBtn.disabled = false;
-        loadingDiv.style.display = 'none';
-    }
-}
-
-function displaySuccess(data) {
-    const resultsDiv = document.getElementById('results');
-    
-    const html = `
-        <div class="success">
-            <h3>✅ Procesamiento completado</h3>
-            <p><strong>Mensaje:</strong> ${data.message}</p>
-            <p><strong>Rol:</strong> ${data.role || 'No especificado'}</p>
-            
-            ${data.files && data.files.length > 0 ? `
-                <div class="files-processed">
-                    <h4>Archivos procesados:</h4>
-                    <ul>
-                        ${data.files.map(file => `<li>${file}</li>`).join('')}
-                    </ul>
-                </div>
-            ` : ''}
-        </div>
-    `;
-    
-    resultsDiv.innerHTML = html;
-}
-
-function displayError(errorMessage) {
-    const resultsDiv = document.getElementById('results');
-    
-    const html = `
-        <div class="error">
-            <h3>❌ Error</h3>
-            <p>${errorMessage}</p>
-        </div>
-    `;
-    
-    resultsDiv.innerHTML = html;
-}
-
-async function checkAPIStatus() {
-    const statusDiv = document.getElementById('apiStatus');
-    
-    try {
-        const response = await fetch(`/api`);
-        const data = await response.json();
-        
-        if (response.ok) {
-            statusDiv.innerHTML = `
-                <span class="status-online">🟢 API Online</span>
-                <small>${data.message}</small>
-            `;
-        } else {
-            throw new Error('API no disponible');
-        }
-    } catch (error) {
-        statusDiv.innerHTML = `
-            <span class="status-offline">🔴 API Offline</span>
-            <small>Error de conexión con el servidor</small>
-        `;
-    }
-}
-
-async function loadCandidates() {
-    const candidatesDiv = document.getElementById('candidates');
-    
-    try {
-        const response = await fetch('/candidates');
-        const data = await response.json();
-        
-        if (response.ok && data.candidates) {
-            // Guardar los datos globalmente para el modal
-            window.candidatesData = data.candidates;
-            displayCandidates(data.candidates);
-        } else {
-            candidatesDiv.innerHTML = `
-                <div class="error">
-                    <p>Error al cargar candidatos: ${data.error || 'Error desconocido'}</p>
-                </div>
-            `;
-        }
-    } catch (error) {
-        candidatesDiv.innerHTML = `
-            <div class="error">
-                <p>Error de conexión al cargar candidatos: ${error.message}</p>
-            </div>
-        `;
-    }
-}
-
-function displayCandidates(candidates) {
-    const candidatesDiv = document.getElementById('candidates');
-    
-    if (candidates.length === 0) {
-        candidatesDiv.innerHTML = `
-            <div class="no-data">
-                <p>No hay candidatos en la base de datos</p>
-            </div>
-        `;
-        return;
-    }
-    
-    const cardsHTML = `
-        <div class="candidates-section">
-            <h3>📊 Candidatos Procesados (${candidates.length})</h3>
-            <div class="cards-container">
-                ${candidates.map(candidate => `
-                    <div class="candidate-card">
-                        <div class="card-header">
-                            <h4 class="candidate-name">${candidate.nombre || 'Nombre no disponible'}</h4>
-                            <div class="match-badge ${getMatchClass(candidate.match)}">
-                                ${candidate.match ? candidate.match.toFixed(1) + '%' : 'N/A'}
-                            </div>
-                        </div>
-                        <div class="card-body">
-                            <p class="candidate-area"><strong>Área:</strong> ${candidate.area_profesional || 'No especificada'}</p>
-                            <p class="candidate-seniority"><strong>Nivel:</strong> ${candidate.seniority || 'No especificado'}</p>
-                        </div>
-                        <div class="card-footer">
-                            <button class="btn-details" onclick="showCandidateDetails(${candidate.id})">
-                                Ver Detalles
-                            </button>
-                        </div>
-                    </div>
-                `).join('')}
-            </div>
-        </div>
-    `;
-    
-    candidatesDiv.innerHTML = cardsHTML;
-}
-
-function getMatchClass(match) {
-    if (!match) return 'match-na';
-    if (match >= 80) return 'match-high';
-    if (match >= 60) return 'match-medium';
-    return 'match-low';
-}
-
-function showCandidateDetails(candidateId) {
-    // Buscar el candidato en los datos ya cargados
-    const candidatesDiv = document.getElementById('candidates');
-    // Necesitamos acceder a los datos, así que los guardaremos globalmente
-    const candidate = window.candidatesData?.find(c => c.id === candidateId);
-    
-    if (!candidate) {
-        showToast('No se pudieron cargar los detalles del candidato', 'error');
-        return;
-    }
-    
-    const modalHTML = `
-        <div class="modal-overlay" onclick="closeModal()">
-            <div class="modal-content" onclick="event.stopPropagation()">
-                <div class="modal-header">
-                    <h3>${candidate.nombre || 'Candidato'}</h3>
-                    <button class="modal-close" onclick="closeModal()">&times;</button>
-                </div>
-                <div class="modal-body">
-                    <div class="detail-section">
-                        <h4>Información Personal</h4>
-                        <p><strong>Nombre:</strong> ${candidate.nombre || 'No disponible'}</p>
-                        <p><strong>Email:</strong> ${candidate.email || 'No disponible'}</p>
-                    </div>
-                    
-                    <div class="detail-section">
-                        <h4>Perfil Profesional</h4>
-                        <p><strong>Área Profesional:</strong> ${candidate.area_profesional || 'No especificada'}</p>
-                        <p><strong>Nivel de Seniority:</strong> ${candidate.seniority || 'No especificado'}</p>
-                        <p><strong>Compatibilidad:</strong> 
-                            <span class="match-score ${getMatchClass(candidate.match)}">
-                                ${candidate.match ? candidate.match.toFixed(1) + '%' : 'N/A'}
-                            </span>
-                        </p>
-                    </div>
-                    
-                    <div class="detail-section">
-                        <h4>Perfil Detallado</h4>
-                        <p>${candidate.perfil || 'No disponible'}</p>
-                    </div>
-                    
-                    <div class="detail-section">
-                        <h4>Habilidades y Competencias</h4>
-                        <p>${candidate.skills || 'No especificadas'}</p>
-                    </div>
-                </div>
-            </div>
-        </div>
-    `;
-    
-    document.body.insertAdjacentHTML('beforeend', modalHTML);
-}
-
-function closeModal() {
-    const modal = document.querySelector('.modal-overlay');
-    if (modal) {
-        modal.remove();
-    }
-}
-
-async function loadPDFFiles() {
-    const pdfFilesDiv = document.getElementById('pdfFiles');
-    
-    try {
-        const response = await fetch('/pdf-files');
-        const data = await response.json();
-        
-        if (response.ok && data.files) {
-            displayPDFFiles(data.files);
-        } else {
-            pdfFilesDiv.innerHTML = `
-                <div class="error">
-                    <p>Error al cargar archivos PDF: ${data.error || 'Error desconocido'}</p>
-                </div>
-            `;
-        }
-    } catch (error) {
-        pdfFilesDiv.innerHTML = `
-            <div class="error">
-                <p>Error de conexión al cargar archivos PDF: ${error.message}</p>
-            </div>
-        `;
-    }
-}
-
-function displayPDFFiles(files) {
-    const pdfFilesDiv = document.getElementById('pdfFiles');
-    
-    if (files.length === 0) {
-        pdfFilesDiv.innerHTML = `
-            <div class="no-data">
-                <p>No hay archivos PDF en la carpeta cvs/</p>
-            </div>
-        `;
-        return;
-    }
-    
-    const filesHTML = `
-        <div class="files-grid">
-            ${files.map(file => `
-                <div class="file-item">
-                    <div class="file-info">
-                        <span class="file-name">📄 ${file.name}</span>
-                        <span class="file-size">${file.size_mb} MB</span>
-                    </div>
-                    <button class="btn-delete" onclick="deletePDF('${file.name}')">
-                        🗑️ Eliminar
-                    </button>
-                </div>
-            `).join('')}
-        </div>
-    `;
-    
-    pdfFilesDiv.innerHTML = filesHTML;
-}
-
-async function uploadPDFs() {
-    const fileInput = document.getElementById('pdfFile');
-    const files = fileInput.files;
-    
-    if (files.length === 0) {
-        showToast('Por favor selecciona al menos un archivo PDF', 'warning');
-        return;
-    }
-    
-    for (let file of files) {
-        if (!file.name.endsWith('.pdf')) {
-            showToast(`El archivo ${file.name} no es un PDF válido`, 'warning');
-            continue;
-        }
-        
-        try {
-            const formData = new FormData();
-            formData.append('file', file);
-            
-            const response = await fetch('/pdf-files', {
-                method: 'POST',
-                body: formData
-            });
-            
-            const data = await response.json();
-            
-            if (response.ok) {
-                console.log(`Archivo ${file.name} subido correctamente`);
-            } else {
-                if (response.status === 409) {
-                    showToast(`El archivo ${file.name} ya existe`, 'warning');
-                } else {
-                    showToast(`Error al subir ${file.name}: ${data.error || data.detail || 'Error desconocido'}`, 'error');
-                }
-            }
-        } catch (error) {
-            showToast(`Error al subir ${file.name}: ${error.message}`, 'error');
-        }
-    }
-    
-    // Limpiar el input y recargar la lista
-    fileInput.value = '';
-    updateFileCount(); // Actualizar contador
-    loadPDFFiles();
-    
-    showToast('Proceso de subida completado', 'success');
-}
-
-async function deletePDF(filename) {
-    const confirmed = await showConfirm({
-        title: 'Eliminar archivo',
-        message: `¿Estás seguro de que quieres eliminar el archivo "${filename}"?`,
-        icon: '🗑️',
-        confirmText: 'Eliminar',
-        cancelText: 'Cancelar',
-        type: 'danger'
-    });
-
-    if (!confirmed) return;
-    
-    try {
-        const response = await fetch(`/pdf-files/${encodeURIComponent(filename)}`, {
-            method: 'DELETE'
-        });
-        
-        const data = await response.json();
-        
-        if (response.ok) {
-            showToast(`Archivo ${filename} eliminado correctamente`, 'success');
-            loadPDFFiles(); // Recargar la lista
-        } else {
-            showToast(`Error al eliminar archivo: ${data.error || data.detail || 'Error desconocido'}`, 'error');
-        }
-    } catch (error) {
-        showToast(`Error de conexión al eliminar archivo: ${error.message}`, 'error');
-    }
-}
-
-async function clearDatabase() {
-    const confirmed = await showConfirm({
-        title: 'Limpiar Base de Datos',
-        message: '¿Estás seguro de que quieres eliminar todos los registros de candidatos? Esta acción no se puede deshacer.',
-        icon: '🗑️',
-        confirmText: 'Limpiar',
-        cancelText: 'Cancelar',
-        type: 'danger'
-    });
-
-    if (!confirmed) return;
-    
-    try {
-        const response = await fetch('/database', {
-            method: 'DELETE'
-        });
-        
-        const data = await response.json();
-        
-        if (response.ok) {
-            showToast(data.message, 'success');
-            // Recargar candidatos para mostrar que está vacía
-            loadCandidates();
-        } else {
-            showToast(`Error al limpiar base de datos: ${data.error || 'Error desconocido'}`, 'error');
-        }
-    } catch (error) {
-        showToast(`Error de conexión al limpiar base de datos: ${error.message}`, 'error');
-    }
-}
-
-// Sistema de notificaciones toast
-function showToast(message, type = 'info', duration = 5000) {
-    const toastContainer = document.getElementById('toast-container');
-    
-    // Crear el toast
-    const toast = document.createElement('div');
-    toast.className = `toast toast-${type}`;
-    
-    // Icono según el tipo
-    const icons = {
-        success: '✅',
-        error: '❌', 
-        info: 'ℹ️',
-        warning: '⚠️'
-    };
-    
-    toast.innerHTML = `
-        <span class="toast-icon">${icons[type] || icons.info}</span>
-        <span class="toast-content">${message}</span>
-        <button class="toast-close" onclick="hideToast(this.parentElement)">×</button>
-    `;
-    
-    // Añadir al contenedor
-    toastContainer.appendChild(toast);
-    
-    // Auto-ocultar después de la duración especificada
-    setTimeout(() => {
-        hideToast(toast);
-    }, duration);
-    
-    return toast;
-}
-
-function hideToast(toast) {
-    if (toast && !toast.classList.contains('toast-hiding')) {
-        toast.classList.add('toast-hiding');
-        setTimeout(() => {
-            if (toast.parentNode) {
-                toast.parentNode.removeChild(toast);
-            }
-        }, 300);
-    }
-}
-
-// Sistema de confirmación modal
-function showConfirm(options) {
-    return new Promise((resolve) => {
-        const {
-            title = '¿Estás seguro?',
-            message = '¿Deseas continuar con esta acción?',
-            icon = '⚠️',
-            confirmText = 'Confirmar',
-            cancelText = 'Cancelar',
-            type = 'danger'
-        } = options;
-
-        // Crear el modal
-        const modalOverlay = document.createElement('div');
-        modalOverlay.className = 'confirm-modal-overlay';
-        
-        modalOverlay.innerHTML = `
-            <div class="confirm-modal">
-                <span class="confirm-modal-icon">${icon}</span>
-                <div class="confirm-modal-title">${title}</div>
-                <div class="confirm-modal-message">${message}</div>
-                <div class="confirm-modal-buttons">
-                    <button class="confirm-btn confirm-btn-cancel" onclick="closeConfirmModal(false)">${cancelText}</button>
-                    <button class="confirm-btn confirm-btn-${type}" onclick="closeConfirmModal(true)">${confirmText}</button>
-                </div>
-            </div>
-        `;
-
-        // Función para cerrar el modal
-        window.closeConfirmModal = (result) => {
-            modalOverlay.remove();
-            resolve(result);
-            delete window.closeConfirmModal;
-        };
-
-        // Cerrar con click fuera del modal
-        modalOverlay.addEventListener('click', (e) => {
-            if (e.target === modalOverlay) {
-                window.closeConfirmModal(false);
-            }
-        });
-
-        // Cerrar con Escape
-        const handleEscape = (e) => {
-            if (e.key === 'Escape') {
-                window.closeConfirmModal(false);
-                document.removeEventListener('keydown', handleEscape);
-            }
-        };
-        document.addEventListener('keydown', handleEscape);
-
-        // Añadir al DOM
-        document.body.appendChild(modalOverlay);
-    });
-}
-
-// Función para actualizar el contador de archivos
-function updateFileCount() {
-    const fileInput = document.getElementById('pdfFile');
-    const fileCount = document.getElementById('fileCount');
-    
-    if (fileInput.files.length > 0) {
-        fileCount.textContent = `${fileInput.files.length} archivo${fileInput.files.length > 1 ? 's' : ''} seleccionado${fileInput.files.length > 1 ? 's' : ''}`;
-    } else {
-        fileCount.textContent = '';
-    }
-}
-
-// Verificar estado de la API al cargar la página
-document.addEventListener('DOMContentLoaded', function() {
-    checkAPIStatus();
-    loadCandidates(); // Cargar candidatos al inicio
-    loadPDFFiles(); // Cargar archivos PDF al inicio
-    
-    // Agregar evento al input de archivos para actualizar el contador
-    const fileInput = document.getElementById('pdfFile');
-    fileInput.addEventListener('change', updateFileCount);
-    
-    // Verificar estado cada 30 segundos
-    setInterval(checkAPIStatus, 30000);
+
+async function processCVs() {
+    const roleInput = document.getElementById('role');
+    const processBtn = document.getElementById('processBtn');
+    const loadingDiv = document.getElementById('loading');
+    const resultsDiv = document.getElementById('results');
+    
+    // Deshabilitar botón y mostrar loading
+    processBtn.disabled = true;
+    loadingDiv.style.display = 'block';
+    resultsDiv.innerHTML = '';
+    
+    try {
+        const role = roleInput.value.trim();
+        const url = role 
+            ? `/process-cvs?role=${encodeURIComponent(role)}`
+            : `/process-cvs`;
+            
+        const response = await fetch(url, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            }
+        });
+        
+        const data = await response.json();
+        
+        if (response.ok && !data.error) {
+            if (data.job_id) {
+                // El procesamiento corre en segundo plano: consultar el job hasta que termine
+                const job = await waitForJob(data.job_id);
+                displaySuccess(data, job);
+            } else {
+                displaySuccess(data);
+            }
+            // Las tarjetas nuevas llegan por /events; sin el stream, recargar la lista
+            if (!eventsConnected()) {
+                setTimeout(loadCandidates, 1000);
+            }
+        } else {
+            displayError(data.error || 'Error desconocido');
+        }
+        
+    } catch (error) {
+        displayError(`Error de conexión: ${error.message}`);
+    } finally {
+        // Rehabilitar botón y ocultar loading
+        processBtn.disabled = false;
+        loadingDiv.style.display = 'none';
+    }
+}
+
+async function waitForJob(jobId, interval = 2000) {
+    const loadingText = document.querySelector('#loading p');
+    let finished = 0;
+    let total = 0;
+    const showProgress = () => {
+        if (loadingText) {
+            loadingText.textContent = `Procesando CVs: ${finished} de ${total}...`;
+        }
+    };
+    
+    // Con el stream de eventos el progreso llega archivo a archivo y la
+    // consulta al job queda como respaldo poco frecuente
+    const done = new Promise(resolve => {
+        jobWaiters[jobId] = {
+            onFile: (event) => {
+                if (['saved', 'skipped', 'failed'].includes(event.state)) {
+                    finished++;
+                    showProgress();
+                }
+            },
+            onDone: resolve
+        };
+    });
+    
+    try {
+        while (true) {
+            const response = await fetch(`/jobs/${jobId}`);
+            const job = await response.json();
+            
+            if (!response.ok) {
+                throw new Error(job.detail || 'No se pudo consultar el job');
+            }
+            
+            finished = job.counts.saved + job.counts.skipped + job.counts.failed;
+            total = job.total_files;
+            showProgress();
+            
+            if (job.status === 'done') {
+                if (loadingText) {
+                    loadingText.textContent = 'Procesando CVs, por favor espera...';
+                }
+                return job;
+            }
+            
+            const wait = eventsConnected() ? 15000 : interval;
+            await Promise.race([done, new Promise(resolve => setTimeout(resolve, wait))]);
+        }
+    } finally {
+        delete jobWaiters[jobId];
+    }
+}
+
+function displaySuccess(data, job = null) {
+    const resultsDiv = document.getElementById('results');
+    
+    const stateLabels = {
+        saved: '✅',
+        skipped: '⏭️',
+        failed: '❌'
+    };
+    
+    const html = `
+        <div class="success">
+            <h3>✅ Procesamiento completado</h3>
+            <p><strong>Mensaje:</strong> ${data.message}</p>
+            <p><strong>Rol:</strong> ${data.role || 'No especificado'}</p>
+            
+            ${job ? `
+                <p><strong>Guardados:</strong> ${job.counts.saved} &middot; <strong>Sin cambios:</strong> ${job.counts.skipped} &middot; <strong>Fallidos:</strong> ${job.counts.failed}
+                ${job.files_per_minute ? ` &middot; <strong>Velocidad:</strong> ${job.files_per_minute} CVs/min` : ''}</p>
+                <div class="files-processed">
+                    <h4>Archivos procesados:</h4>
+                    <ul>
+                        ${job.files.map(file => `<li>${stateLabels[file.state] || ''} ${file.name}${file.error ? ` - ${file.error}` : ''}</li>`).join('')}
+                    </ul>
+                </div>
+            ` : data.files && data.files.length > 0 ? `
+                <div class="files-processed">
+                    <h4>Archivos procesados:</h4>
+                    <ul>
+                        ${data.files.map(file => `<li>${file}</li>`).join('')}
+                    </ul>
+                </div>
+            ` : ''}
+        </div>
+    `;
+    
+    resultsDiv.innerHTML = html;
+}
+
+function displayError(errorMessage) {
+    const resultsDiv = document.getElementById('results');
+    
+    const html = `
+        <div class="error">
+            <h3>❌ Error</h3>
+            <p>${errorMessage}</p>
+        </div>
+    `;
+    
+    resultsDiv.innerHTML = html;
+}
+
+async function checkAPIStatus() {
+    const statusDiv = document.getElementById('apiStatus');
+    
+    try {
+        const response = await fetch(`/api`);
+        const data = await response.json();
+        
+        if (response.ok) {
+            statusDiv.innerHTML = `
+                <span class="status-online">🟢 API Online</span>
+                <small>${data.message}</small>
+            `;
+        } else {
+            throw new Error('API no disponible');
+        }
+    } catch (error) {
+        statusDiv.innerHTML = `
+            <span class="status-offline">🔴 API Offline</span>
+            <small>Error de conexión con el servidor</small>
+        `;
+    }
+}
+
+// Lista de candidatos: rejilla virtualizada (solo se pintan las filas visibles),
+// páginas pedidas a medida que se baja y copia en IndexedDB validada con ETag
+const CANDIDATES_PAGE_SIZE = 100;
+const CANDIDATE_LIST_FIELDS = 'id,nombre,seniority,area_profesional,match';
+// Más candidatos nuevos que esto desde la última visita: volver a empezar
+const CANDIDATES_MERGE_MAX = 2000;
+// Deben coincidir con .cards-viewport en style.css
+const CARD_MIN_WIDTH = 300;
+const CARD_GAP = 20;
+const CARD_ROW_HEIGHT = 250;
+const GRID_OVERSCAN = 2;
+
+const candidateList = {
+    items: [],        // Resúmenes en el orden de /candidates: match desc, id desc
+    ids: new Set(),
+    nextCursor: null,
+    total: 0,
+    maxId: 0,         // Para pedir solo los nuevos con since=
+    etag: null,       // ETag de la primera página
+    version: 0,       // Cambia con items: la rejilla se vuelve a pintar
+    loading: null,
+    failedAt: 0
+};
+const candidateDetails = new Map();
+
+// Caché en IndexedDB: "lists" guarda la lista cargada y "details" los detalles
+let cacheDbPromise = null;
+
+function openCacheDb() {
+    if (!window.indexedDB) return Promise.resolve(null);
+    if (!cacheDbPromise) {
+        cacheDbPromise = new Promise(resolve => {
+            const request = indexedDB.open('cv-processor', 1);
+            request.onupgradeneeded = () => {
+                request.result.createObjectStore('lists');
+                request.result.createObjectStore('details');
+            };
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => resolve(null); // Sin caché (navegación privada, cuota...)
+        });
+    }
+    return cacheDbPromise;
+}
+
+async function cacheGet(store, key) {
+    const db = await openCacheDb();
+    if (!db) return undefined;
+    return new Promise(resolve => {
+        const request = db.transaction(store).objectStore(store).get(key);
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => resolve(undefined);
+    });
+}
+
+async function cachePut(store, key, value) {
+    const db = await openCacheDb();
+    if (!db) return;
+    try {
+        db.transaction(store, 'readwrite').objectStore(store).put(value, key);
+    } catch (error) {
+        console.warn('No se pudo guardar en la caché local', error);
+    }
+}
+
+async function clearCandidateDetails() {
+    candidateDetails.clear();
+    const db = await openCacheDb();
+    if (db) {
+        db.transaction('details', 'readwrite').objectStore('details').clear();
+    }
+}
+
+let saveListTimer = null;
+
+function saveCandidateList() {
+    // Varios cambios seguidos (eventos, páginas) se guardan una sola vez
+    clearTimeout(saveListTimer);
+    saveListTimer = setTimeout(() => {
+        const { items, nextCursor, total, maxId, etag } = candidateList;
+        cachePut('lists', 'candidates', { items, nextCursor, total, maxId, etag });
+    }, 1000);
+}
+
+async function restoreCandidateList() {
+    const cached = await cacheGet('lists', 'candidates');
+    if (!cached || candidateList.etag) return;
+    Object.assign(candidateList, cached, { ids: new Set(cached.items.map(c => c.id)) });
+    candidateList.version++;
+    renderCandidateGrid();
+}
+
+function candidatesParams(extra = {}) {
+    return new URLSearchParams({ limit: CANDIDATES_PAGE_SIZE, fields: CANDIDATE_LIST_FIELDS, ...extra });
+}
+
+async function loadCandidates() {
+    const candidatesDiv = document.getElementById('candidates');
+    
+    try {
+        // Si nada cambió desde la última vez la API responde 304 y vale lo guardado
+        const headers = candidateList.etag ? { 'If-None-Match': candidateList.etag } : {};
+        const response = await fetch(`/candidates?${candidatesParams()}`, { headers });
+        if (response.status === 304) {
+            renderCandidateGrid();
+            return;
+        }
+        const data = await response.json();
+        
+        if (response.ok && data.candidates) {
+            const etag = response.headers.get('ETag');
+            const added = data.total - candidateList.total;
+            // Los candidatos solo se añaden: basta con pedir los guardados después de maxId
+            if (!candidateList.etag || added < 0 || added > CANDIDATES_MERGE_MAX
+                    || !await mergeNewCandidates(data.total)) {
+                resetCandidateList(data);
+            }
+            candidateList.etag = etag;
+            candidateList.version++;
+            renderCandidateGrid();
+            saveCandidateList();
+        } else if (candidateList.items.length) {
+            showToast(`Error al cargar candidatos: ${data.error || data.detail || 'Error desconocido'}`, 'error');
+        } else {
+            candidatesDiv.innerHTML = `
+                <div class="error">
+                    <p>Error al cargar candidatos: ${data.error || data.detail || 'Error desconocido'}</p>
+                </div>
+            `;
+        }
+    } catch (error) {
+        if (candidateList.items.length) {
+            showToast(`Error de conexión al cargar candidatos: ${error.message}`, 'error');
+            return;
+        }
+        candidatesDiv.innerHTML = `
+            <div class="error">
+                <p>Error de conexión al cargar candidatos: ${error.message}</p>
+            </div>
+        `;
+    }
+}
+
+function resetCandidateList(data) {
+    Object.assign(candidateList, {
+        items: data.candidates,
+        ids: new Set(data.candidates.map(c => c.id)),
+        nextCursor: data.next_cursor,
+        total: data.total ?? data.candidates.length,
+        maxId: data.max_id ?? 0
+    });
+    // Tras vaciar la base de datos los ids se reutilizan
+    clearCandidateDetails();
+}
+
+async function mergeNewCandidates(expectedTotal) {
+    let cursor = null;
+    do {
+        const params = candidatesParams({ since: candidateList.maxId, limit: 500 });
+        if (cursor) params.set('cursor', cursor);
+        const response = await fetch(`/candidates?${params}`);
+        const data = await response.json();
+        if (!response.ok || !data.candidates) return false;
+        data.candidates.forEach(insertCandidate);
+        cursor = data.next_cursor;
+    } while (cursor);
+    // Si no cuadra se perdió algo (p. ej. la base de datos se vació y se volvió a llenar)
+    return candidateList.total === expectedTotal;
+}
+
+function insertCandidate(candidate) {
+    if (candidateList.ids.has(candidate.id)) return false;
+    candidateList.total++;
+    candidateList.maxId = Math.max(candidateList.maxId, candidate.id);
+    
+    // Mismo orden que /candidates: match descendente y, a igual match, id descendente
+    const match = candidate.match ?? -1;
+    const items = candidateList.items;
+    let low = 0;
+    let high = items.length;
+    while (low < high) {
+        const mid = (low + high) >> 1;
+        const midMatch = items[mid].match ?? -1;
+        if (midMatch > match || (midMatch === match && items[mid].id > candidate.id)) {
+            low = mid + 1;
+        } else {
+            high = mid;
+        }
+    }
+    // Va después de lo cargado: llegará con la página siguiente
+    if (low === items.length && candidateList.nextCursor) return false;
+    items.splice(low, 0, candidate);
+    candidateList.ids.add(candidate.id);
+    candidateList.version++;
+    return true;
+}
+
+function loadMoreCandidates() {
+    if (!candidateList.nextCursor || candidateList.loading) return;
+    if (Date.now() - candidateList.failedAt < 5000) return; // Reintentar al seguir bajando
+    candidateList.loading = (async () => {
+        try {
+            const response = await fetch(`/candidates?${candidatesParams({ cursor: candidateList.nextCursor })}`);
+            const data = await response.json();
+            if (!response.ok || !data.candidates) {
+                throw new Error(data.error || data.detail || 'Error desconocido');
+            }
+            for (const candidate of data.candidates) {
+                if (!candidateList.ids.has(candidate.id)) {
+                    candidateList.items.push(candidate);
+                    candidateList.ids.add(candidate.id);
+                }
+            }
+            candidateList.nextCursor = data.next_cursor;
+            candidateList.version++;
+            saveCandidateList();
+        } catch (error) {
+            candidateList.failedAt = Date.now();
+            showToast(`Error al cargar más candidatos: ${error.message}`, 'error');
+        } finally {
+            candidateList.loading = null;
+            renderCandidateGrid();
+        }
+    })();
+}
+
+function renderCandidateCard(candidate) {
+    return `
+        <div class="candidate-card" data-id="${candidate.id}" data-match="${candidate.match ?? ''}">
+            <div class="card-header">
+                <h4 class="candidate-name">${candidate.nombre || 'Nombre no disponible'}</h4>
+                <div class="match-badge ${getMatchClass(candidate.match)}">
+                    ${candidate.match ? candidate.match.toFixed(1) + '%' : 'N/A'}
+                </div>
+            </div>
+            <div class="card-body">
+                <p class="candidate-area"><strong>Área:</strong> ${candidate.area_profesional || 'No especificada'}</p>
+                <p class="candidate-seniority"><strong>Nivel:</strong> ${candidate.seniority || 'No especificado'}</p>
+            </div>
+            <div class="card-footer">
+                <button class="btn-details" onclick="showCandidateDetails(${candidate.id})">
+                    Ver Detalles
+                </button>
+            </div>
+        </div>
+    `;
+}
+
+let gridFrame = null;
+let gridRange = null;
+
+function scheduleGridRender() {
+    if (gridFrame) return;
+    gridFrame = requestAnimationFrame(() => {
+        gridFrame = null;
+        renderCandidateGrid();
+    });
+}
+
+function renderCandidateGrid() {
+    const candidatesDiv = document.getElementById('candidates');
+    const { items, nextCursor } = candidateList;
+    
+    if (items.length === 0 && !nextCursor) {
+        gridRange = null;
+        candidatesDiv.innerHTML = `
+            <div class="no-data">
+                <p>No hay candidatos en la base de datos</p>
+            </div>
+        `;
+        return;
+    }
+    
+    let viewport = document.getElementById('cardsViewport');
+    if (!viewport) {
+        candidatesDiv.innerHTML = `
+            <div class="candidates-section">
+                <h3 id="candidatesTitle"></h3>
+                <div class="cards-viewport" id="cardsViewport">
+                    <div class="cards-spacer" id="cardsSpacer">
+                        <div class="cards-container" id="cardsContainer"></div>
+                    </div>
+                </div>
+            </div>
+        `;
+        viewport = document.getElementById('cardsViewport');
+        viewport.addEventListener('scroll', scheduleGridRender, { passive: true });
+        gridRange = null;
+    }
+    
+    // Filas completas de tarjetas; la última fila vacía es la de "cargando"
+    const columns = Math.max(1, Math.floor((viewport.clientWidth + CARD_GAP) / (CARD_MIN_WIDTH + CARD_GAP)));
+    const rows = Math.ceil(items.length / columns) + (nextCursor ? 1 : 0);
+    const firstRow = Math.max(0, Math.floor(viewport.scrollTop / CARD_ROW_HEIGHT) - GRID_OVERSCAN);
+    const lastRow = Math.min(rows, Math.ceil((viewport.scrollTop + viewport.clientHeight) / CARD_ROW_HEIGHT) + GRID_OVERSCAN);
+    const start = firstRow * columns;
+    const end = Math.min(items.length, lastRow * columns);
+    
+    const range = `${candidateList.version}:${candidateList.total}:${columns}:${start}:${end}`;
+    if (range !== gridRange) {
+        gridRange = range;
+        document.getElementById('cardsSpacer').style.height = `${rows * CARD_ROW_HEIGHT}px`;
+        const container = document.getElementById('cardsContainer');
+        container.style.gridTemplateColumns = `repeat(${columns}, minmax(0, 1fr))`;
+        container.style.transform = `translateY(${firstRow * CARD_ROW_HEIGHT}px)`;
+        const loadingCard = end === items.length && nextCursor
+            ? '<div class="candidate-card card-loading">Cargando candidatos...</div>'
+            : '';
+        container.innerHTML = items.slice(start, end).map(renderCandidateCard).join('') + loadingCard;
+        updateCandidatesTitle();
+    }
+    
+    // Cerca del final de lo cargado: pedir la página siguiente
+    if (nextCursor && lastRow * columns >= items.length) {
+        loadMoreCandidates();
+    }
+}
+
+function updateCandidatesTitle() {
+    document.getElementById('candidatesTitle').textContent =
+        `📊 Candidatos Procesados (${candidateList.items.length} de ${candidateList.total})`;
+}
+
+// Eventos del servidor (/events): progreso de los jobs y candidatos recién guardados
+let eventSource = null;
+const jobWaiters = {};
+
+function connectEvents() {
+    if (!window.EventSource) return;
+    // EventSource se reconecta solo y envía Last-Event-ID para recibir lo perdido
+    eventSource = new EventSource('/events');
+    eventSource.addEventListener('candidate', (e) => addCandidate(JSON.parse(e.data).candidate));
+    eventSource.addEventListener('file', (e) => {
+        const data = JSON.parse(e.data);
+        jobWaiters[data.job_id]?.onFile(data);
+    });
+    eventSource.addEventListener('job', (e) => {
+        const data = JSON.parse(e.data);
+        if (data.status === 'done') {
+            jobWaiters[data.job_id]?.onDone();
+            loadPDFFiles(); // Marcar los archivos procesados (304 si nada cambió)
+        }
+    });
+    // Eventos perdidos (buffer superado o servidor reiniciado) o base de datos vaciada
+    eventSource.addEventListener('reset', scheduleReload);
+    eventSource.addEventListener('cleared', () => {
+        candidateList.etag = null; // Los ids se reutilizan: no mezclar con lo guardado
+        scheduleReload();
+    });
+}
+
+let reloadTimer = null;
+
+function scheduleReload() {
+    // Varios eventos seguidos provocan una sola recarga
+    if (reloadTimer) return;
+    reloadTimer = setTimeout(() => {
+        reloadTimer = null;
+        loadCandidates();
+        loadPDFFiles();
+    }, 300);
+}
+
+function eventsConnected() {
+    return eventSource !== null && eventSource.readyState === EventSource.OPEN;
+}
+
+function addCandidate(candidate) {
+    if (!candidateList.etag) {
+        // Aún no hay lista cargada: pedirla a la API
+        scheduleReload();
+        return;
+    }
+    // El evento trae todos los campos del detalle salvo el texto del CV
+    candidateDetails.set(candidate.id, candidate);
+    const { id, nombre, seniority, area_profesional, match } = candidate;
+    insertCandidate({ id, nombre, seniority, area_profesional, match });
+    renderCandidateGrid();
+    saveCandidateList();
+}
+
+function getMatchClass(match) {
+    if (!match) return 'match-na';
+    if (match >= 80) return 'match-high';
+    if (match >= 60) return 'match-medium';
+    return 'match-low';
+}
+
+async function fetchCandidateDetails(candidateId) {
+    // Memoria, luego IndexedDB y por último GET /candidates/{id}
+    let candidate = candidateDetails.get(candidateId) ?? await cacheGet('details', candidateId);
+    if (!candidate) {
+        const response = await fetch(`/candidates/${candidateId}`);
+        const data = await response.json();
+        if (!response.ok || data.error) {
+            throw new Error(data.error || data.detail || 'Error desconocido');
+        }
+        candidate = data;
+        cachePut('details', candidateId, candidate);
+    }
+    candidateDetails.set(candidateId, candidate);
+    return candidate;
+}
+
+async function showCandidateDetails(candidateId) {
+    let candidate;
+    try {
+        candidate = await fetchCandidateDetails(candidateId);
+    } catch (error) {
+        showToast(`No se pudieron cargar los detalles del candidato: ${error.message}`, 'error');
+        return;
+    }
+    
+    const modalHTML = `
+        <div class="modal-overlay" onclick="closeModal()">
+            <div class="modal-content" onclick="event.stopPropagation()">
+                <div class="modal-header">
+                    <h3>${candidate.nombre || 'Candidato'}</h3>
+                    <button class="modal-close" onclick="closeModal()">&times;</button>
+                </div>
+                <div class="modal-body">
+                    <div class="detail-section">
+                        <h4>Información Personal</h4>
+                        <p><strong>Nombre:</strong> ${candidate.nombre || 'No disponible'}</p>
+                        <p><strong>Email:</strong> ${candidate.email || 'No disponible'}</p>
+                    </div>
+                    
+                    <div class="detail-section">
+                        <h4>Perfil Profesional</h4>
+                        <p><strong>Área Profesional:</strong> ${candidate.area_profesional || 'No especificada'}</p>
+                        <p><strong>Nivel de Seniority:</strong> ${candidate.seniority || 'No especificado'}</p>
+                        <p><strong>Compatibilidad:</strong> 
+                            <span class="match-score ${getMatchClass(candidate.match)}">
+                                ${candidate.match ? candidate.match.toFixed(1) + '%' : 'N/A'}
+                            </span>
+                        </p>
+                    </div>
+                    
+                    <div class="detail-section">
+                        <h4>Perfil Detallado</h4>
+                        <p>${candidate.perfil || 'No disponible'}</p>
+                    </div>
+                    
+                    <div class="detail-section">
+                        <h4>Habilidades y Competencias</h4>
+                        <p>${candidate.skills || 'No especificadas'}</p>
+                    </div>
+                    
+                    <div class="detail-section">
+                        <h4>Texto del CV</h4>
+                        <button class="btn-details" onclick="showCandidateText(${candidateId}, this)">Mostrar texto completo</button>
+                        <pre class="cv-text" hidden></pre>
+                    </div>
+                </div>
+            </div>
+        </div>
+    `;
+    
+    document.body.insertAdjacentHTML('beforeend', modalHTML);
+}
+
+async function showCandidateText(candidateId, button) {
+    // El texto del CV solo se descarga al pedirlo (GET /candidates/{id}/document)
+    const pre = button.nextElementSibling;
+    button.disabled = true;
+    try {
+        const response = await fetch(`/candidates/${candidateId}/document`);
+        const data = await response.json();
+        if (!response.ok || data.error) {
+            throw new Error(data.error || data.detail || 'Error desconocido');
+        }
+        pre.textContent = data.cv_text || 'Sin texto';
+        pre.hidden = false;
+        button.remove();
+    } catch (error) {
+        button.disabled = false;
+        showToast(`No se pudo cargar el texto del CV: ${error.message}`, 'error');
+    }
+}
+
+function closeModal() {
+    const modal = document.querySelector('.modal-overlay');
+    if (modal) {
+        modal.remove();
+    }
+}
+
+const PDF_FILES_PAGE_SIZE = 100;
+let pdfFilesNextOffset = null;
+let pdfFilesETag = null;
+
+async function loadPDFFiles(append = false) {
+    const pdfFilesDiv = document.getElementById('pdfFiles');
+    const [sort, order] = document.getElementById('pdfSort').value.split(':');
+    
+    try {
+        // La API sirve la lista por páginas; si la primera no ha cambiado responde 304
+        const params = new URLSearchParams({ limit: PDF_FILES_PAGE_SIZE, sort, order });
+        const headers = {};
+        if (append) {
+            params.set('offset', pdfFilesNextOffset);
+        } else if (pdfFilesETag) {
+            headers['If-None-Match'] = pdfFilesETag;
+        }
+        const response = await fetch(`/pdf-files?${params}`, { headers });
+        if (response.status === 304) {
+            return;
+        }
+        const data = await response.json();
+        
+        if (response.ok && data.files) {
+            if (!append) {
+                pdfFilesETag = response.headers.get('ETag');
+            }
+            pdfFilesNextOffset = data.next_offset;
+            displayPDFFiles(data.files, data.total, append);
+        } else {
+            pdfFilesETag = null;
+            pdfFilesDiv.innerHTML = `
+                <div class="error">
+                    <p>Error al cargar archivos PDF: ${data.error || data.detail || 'Error desconocido'}</p>
+                </div>
+            `;
+        }
+    } catch (error) {
+        pdfFilesETag = null;
+        pdfFilesDiv.innerHTML = `
+            <div class="error">
+                <p>Error de conexión al cargar archivos PDF: ${error.message}</p>
+            </div>
+        `;
+    }
+}
+
+function changePDFSort() {
+    pdfFilesETag = null;
+    loadPDFFiles();
+}
+
+function renderPDFFile(file) {
+    const modified = new Date(file.modified * 1000).toLocaleString();
+    return `
+        <div class="file-item">
+            <div class="file-info">
+                <span class="file-name">📄 ${file.name}</span>
+                <span class="file-size">${file.size_mb} MB · ${modified}</span>
+            </div>
+            <div class="file-actions">
+                ${file.processed ? '<span class="file-processed">✅ Procesado</span>' : ''}
+                <button class="btn-delete" onclick="deletePDF('${file.name}')">
+                    🗑️ Eliminar
+                </button>
+            </div>
+        </div>
+    `;
+}
+
+function displayPDFFiles(files, total, append = false) {
+    const pdfFilesDiv = document.getElementById('pdfFiles');
+    
+    if (!append && files.length === 0) {
+        pdfFilesDiv.innerHTML = `
+            <div class="no-data">
+                <p>No hay archivos PDF en la carpeta cvs/</p>
+            </div>
+        `;
+        return;
+    }
+    
+    if (!append) {
+        pdfFilesDiv.innerHTML = `
+            <p class="files-total" id="pdfFilesTotal"></p>
+            <div class="files-grid" id="pdfFilesGrid"></div>
+            <button id="pdfFilesMoreBtn" class="btn btn-load-more" onclick="loadPDFFiles(true)">
+                Cargar más archivos
+            </button>
+        `;
+    }
+    
+    const grid = document.getElementById('pdfFilesGrid');
+    grid.insertAdjacentHTML('beforeend', files.map(renderPDFFile).join(''));
+    document.getElementById('pdfFilesTotal').textContent =
+        `${grid.children.length} de ${total} archivos`;
+    document.getElementById('pdfFilesMoreBtn').style.display = pdfFilesNextOffset !== null ? 'block' : 'none';
+}
+
+async function uploadPDFs() {
+    const fileInput = document.getElementById('pdfFile');
+    const files = fileInput.files;
+    
+    if (files.length === 0) {
+        showToast('Por favor selecciona al menos un archivo PDF', 'warning');
+        return;
+    }
+    
+    // Todos los PDFs y zips en una sola petición
+    const formData = new FormData();
+    let added = 0;
+    for (let file of files) {
+        const name = file.name.toLowerCase();
+        if (!name.endsWith('.pdf') && !name.endsWith('.zip')) {
+            showToast(`El archivo ${file.name} no es un PDF ni un zip`, 'warning');
+            continue;
+        }
+        formData.append('files', file);
+        added++;
+    }
+    if (added === 0) return;
+    
+    try {
+        const response = await fetch('/pdf-files/batch', {
+            method: 'POST',
+            body: formData
+        });
+        
+        const data = await response.json();
+        
+        if (!response.ok || data.error) {
+            showToast(`Error al subir archivos: ${data.error || data.detail || 'Error desconocido'}`, 'error');
+        } else {
+            for (const result of data.files) {
+                if (result.status === 'exists') {
+                    showToast(`El archivo ${result.filename} ya existe`, 'warning');
+                } else if (result.status === 'rejected') {
+                    showToast(`Error al subir ${result.filename}: ${result.error}`, 'error');
+                }
+            }
+            showToast(`Subida completada: ${data.message}`, 'success');
+        }
+    } catch (error) {
+        showToast(`Error al subir archivos: ${error.message}`, 'error');
+    }
+    
+    // Limpiar el input y recargar la lista
+    fileInput.value = '';
+    updateFileCount(); // Actualizar contador
+    loadPDFFiles();
+}
+
+async function deletePDF(filename) {
+    const confirmed = await showConfirm({
+        title: 'Eliminar archivo',
+        message: `¿Estás seguro de que quieres eliminar el archivo "${filename}"?`,
+        icon: '🗑️',
+        confirmText: 'Eliminar',
+        cancelText: 'Cancelar',
+        type: 'danger'
+    });
+
+    if (!confirmed) return;
+    
+    try {
+        const response = await fetch(`/pdf-files/${encodeURIComponent(filename)}`, {
+            method: 'DELETE'
+        });
+        
+        const data = await response.json();
+        
+        if (response.ok) {
+            showToast(`Archivo ${filename} eliminado correctamente`, 'success');
+            loadPDFFiles(); // Recargar la lista
+        } else {
+            showToast(`Error al eliminar archivo: ${data.error || data.detail || 'Error desconocido'}`, 'error');
+        }
+    } catch (error) {
+        showToast(`Error de conexión al eliminar archivo: ${error.message}`, 'error');
+    }
+}
+
+async function clearDatabase() {
+    const confirmed = await showConfirm({
+        title: 'Limpiar Base de Datos',
+        message: '¿Estás seguro de que quieres eliminar todos los registros de candidatos? Esta acción no se puede deshacer.',
+        icon: '🗑️',
+        confirmText: 'Limpiar',
+        cancelText: 'Cancelar',
+        type: 'danger'
+    });
+
+    if (!confirmed) return;
+    
+    try {
+        const response = await fetch('/database', {
+            method: 'DELETE'
+        });
+        
+        const data = await response.json();
+        
+        if (response.ok) {
+            showToast(data.message, 'success');
+            // Recargar candidatos para mostrar que está vacía (con el stream lo hace el evento cleared)
+            if (!eventsConnected()) {
+                candidateList.etag = null;
+                loadCandidates();
+            }
+        } else {
+            showToast(`Error al limpiar base de datos: ${data.error || 'Error desconocido'}`, 'error');
+        }
+    } catch (error) {
+        showToast(`Error de conexión al limpiar base de datos: ${error.message}`, 'error');
+    }
+}
+
+// Sistema de notificaciones toast
+function showToast(message, type = 'info', duration = 5000) {
+    const toastContainer = document.getElementById('toast-container');
+    
+    // Crear el toast
+    const toast = document.createElement('div');
+    toast.className = `toast toast-${type}`;
+    
+    // Icono según el tipo
+    const icons = {
+        success: '✅',
+        error: '❌', 
+        info: 'ℹ️',
+        warning: '⚠️'
+    };
+    
+    toast.innerHTML = `
+        <span class="toast-icon">${icons[type] || icons.info}</span>
+        <span class="toast-content">${message}</span>
+        <button class="toast-close" onclick="hideToast(this.parentElement)">×</button>
+    `;
+    
+    // Añadir al contenedor
+    toastContainer.appendChild(toast);
+    
+    // Auto-ocultar después de la duración especificada
+    setTimeout(() => {
+        hideToast(toast);
+    }, duration);
+    
+    return toast;
+}
+
+function hideToast(toast) {
+    if (toast && !toast.classList.contains('toast-hiding')) {
+        toast.classList.add('toast-hiding');
+        setTimeout(() => {
+            if (toast.parentNode) {
+                toast.parentNode.removeChild(toast);
+            }
+        }, 300);
+    }
+}
+
+// Sistema de confirmación modal
+function showConfirm(options) {
+    return new Promise((resolve) => {
+        const {
+            title = '¿Estás seguro?',
+            message = '¿Deseas continuar con esta acción?',
+            icon = '⚠️',
+            confirmText = 'Confirmar',
+            cancelText = 'Cancelar',
+            type = 'danger'
+        } = options;
+
+        // Crear el modal
+        const modalOverlay = document.createElement('div');
+        modalOverlay.className = 'confirm-modal-overlay';
+        
+        modalOverlay.innerHTML = `
+            <div class="confirm-modal">
+                <span class="confirm-modal-icon">${icon}</span>
+                <div class="confirm-modal-title">${title}</div>
+                <div class="confirm-modal-message">${message}</div>
+                <div class="confirm-modal-buttons">
+                    <button class="confirm-btn confirm-btn-cancel" onclick="closeConfirmModal(false)">${cancelText}</button>
+                    <button class="confirm-btn confirm-btn-${type}" onclick="closeConfirmModal(true)">${confirmText}</button>
+                </div>
+            </div>
+        `;
+
+        // Función para cerrar el modal
+        window.closeConfirmModal = (result) => {
+            modalOverlay.remove();
+            resolve(result);
+            delete window.closeConfirmModal;
+        };
+
+        // Cerrar con click fuera del modal
+        modalOverlay.addEventListener('click', (e) => {
+            if (e.target === modalOverlay) {
+                window.closeConfirmModal(false);
+            }
+        });
+
+        // Cerrar con Escape
+        const handleEscape = (e) => {
+            if (e.key === 'Escape') {
+                window.closeConfirmModal(false);
+                document.removeEventListener('keydown', handleEscape);
+            }
+        };
+        document.addEventListener('keydown', handleEscape);
+
+        // Añadir al DOM
+        document.body.appendChild(modalOverlay);
+    });
+}
+
+// Función para actualizar el contador de archivos
+function updateFileCount() {
+    const fileInput = document.getElementById('pdfFile');
+    const fileCount = document.getElementById('fileCount');
+    
+    if (fileInput.files.length > 0) {
+        fileCount.textContent = `${fileInput.files.length} archivo${fileInput.files.length > 1 ? 's' : ''} seleccionado${fileInput.files.length > 1 ? 's' : ''}`;
+    } else {
+        fileCount.textContent = '';
+    }
+}
+
+// Verificar estado de la API al cargar la página
+document.addEventListener('DOMContentLoaded', function() {
+    checkAPIStatus();
+    // Mostrar lo guardado en el navegador y validarlo con la API
+    restoreCandidateList().finally(loadCandidates);
+    connectEvents(); // Progreso y candidatos nuevos en tiempo real
+    loadPDFFiles(); // Cargar archivos PDF al inicio
+    
+    // Agregar evento al input de archivos para actualizar el contador
+    const fileInput = document.getElementById('pdfFile');
+    fileInput.addEventListener('change', updateFileCount);
+    
+    window.addEventListener('resize', scheduleGridRender);
+    
+    // Verificar estado cada 30 segundos, salvo con la pestaña oculta o con el
+    // stream de eventos abierto (entonces la API está respondiendo)
+    setInterval(() => {
+        if (!document.hidden && !eventsConnected()) {
+            checkAPIStatus();
+        }
+    }, 30000);
 });
\ No newline at end of file
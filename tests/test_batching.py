@@ -0,0 +1,53 @@
+"""Pruebas del recuento de la caché del LLM en el análisis agrupado (batching.py).
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batching  # noqa: E402
+import llm_cache  # noqa: E402
+from batching import BATCH_PROMPT_VERSION, BatchAnalyzer  # noqa: E402
+from cache import BlobCache  # noqa: E402
+from llm_cache import cache_key  # noqa: E402
+
+
+class CacheCountTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = BlobCache(os.path.join(directory.name, "llm.db"), 1024 * 1024)
+        self.addCleanup(lambda: self.cache._conn and self.cache._conn.close())
+        for module in (batching, llm_cache):
+            patcher = mock.patch.object(module, "llm_cache", self.cache)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(llm_cache, "analyze_cv", lambda text, role=None: {"nombre": text})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.analyzer = BatchAnalyzer(client=mock.Mock())
+        self.addCleanup(self.analyzer.close)
+
+    def test_one_hit_or_miss_per_cv(self):
+        self.cache.set_json(cache_key("individual"), {"nombre": "individual"})
+        self.cache.set_json(cache_key("agrupado", None, BATCH_PROMPT_VERSION), {"nombre": "agrupado"})
+        # El lote solo separa el primero de los dos CVs nuevos; el otro va por cached_analyze_cv
+        with mock.patch.object(BatchAnalyzer, "_analyze_group", lambda self, texts: [{"nombre": texts[0]}, None]):
+            results = self.analyzer.analyze(["individual", "agrupado", "nuevo 1", "nuevo 2"], size=4)
+
+        self.assertEqual([result["nombre"] for result in results], ["individual", "agrupado", "nuevo 1", "nuevo 2"])
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 2))
+
+    def test_single_requests_still_count(self):
+        llm_cache.cached_analyze_cv("suelto")
+        llm_cache.cached_analyze_cv("suelto")
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""Pruebas de la detección de secciones y el recorte del CV (compaction.py).
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compaction import compact_cv, split_sections, strip_boilerplate  # noqa: E402
+
+CV = """Ana García López
+ana.garcia@example.com | 612345678
+Perfil
+Técnica de sistemas con cinco años de experiencia.
+Experiencia laboral
+Experiencia en soporte técnico a usuarios
+Administración de servidores Linux (2019 - 2023)
+Conocimientos avanzados de Docker
+HABILIDADES TÉCNICAS
+Python, SQL
+Idiomas: inglés (B2)
+Otros datos de interés
+Carnet de conducir
+Página 1 de 2
+"""
+
+
+def section_lines(text):
+    return {name: (heading, lines) for name, heading, lines in split_sections(text)}
+
+
+class HeadingTest(unittest.TestCase):
+    def setUp(self):
+        self.sections = section_lines(CV)
+
+    def test_real_headings(self):
+        self.assertEqual(list(self.sections), ["contacto", "perfil", "experiencia", "habilidades", "idiomas"])
+        self.assertEqual(self.sections["experiencia"][0], "Experiencia laboral")
+        self.assertEqual(self.sections["habilidades"][0], "HABILIDADES TÉCNICAS")
+        self.assertEqual(self.sections["idiomas"][0], "Idiomas")
+        self.assertEqual(self.sections["idiomas"][1][0], "inglés (B2)")
+
+    def test_content_lines_starting_with_keywords_are_kept(self):
+        experiencia = self.sections["experiencia"][1]
+        self.assertIn("Experiencia en soporte técnico a usuarios", experiencia)
+        self.assertIn("Conocimientos avanzados de Docker", experiencia)
+        self.assertIn("Otros datos de interés", self.sections["idiomas"][1])
+
+    def test_heading_with_colon(self):
+        sections = section_lines("Ana\nConocimientos de informática:\nExcel, Word")
+        self.assertEqual(sections["habilidades"], ("Conocimientos de informática", ["Excel, Word"]))
+
+
+class CompactTest(unittest.TestCase):
+    def test_text_within_budget_is_unchanged_except_boilerplate(self):
+        text, info = compact_cv(CV, budget=1000)
+        self.assertEqual(text, CV.replace("Página 1 de 2\n", "").strip())
+        self.assertEqual(info["trimmed"], [])
+        self.assertEqual(info["tokens_after"], info["tokens_before"] - info["tokens_saved"])
+
+    def test_boilerplate_keeps_numbers_that_are_data(self):
+        text = "Ana\n612345678\n2019\nCurriculum Vitae\n- 2 -"
+        self.assertEqual(strip_boilerplate(text), "Ana\n612345678\n2019")
+
+    def test_over_budget_keeps_content_lines(self):
+        text, info = compact_cv(CV + "Referencias\n" + "Texto de relleno. " * 200, budget=150)
+        self.assertIn("otros", info["trimmed"])
+        self.assertIn("Experiencia en soporte técnico a usuarios", text)
+        self.assertIn("Conocimientos avanzados de Docker", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+"""Pruebas del cliente asíncrono de Ollama contra el servidor falso de benchmarks/stub_ollama.py.
+
+    python -m unittest discover tests
+"""
+import asyncio
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import ollama_client  # noqa: E402
+from ollama_client import JSONStreamScanner, OllamaClient  # noqa: E402
+from stub_ollama import fake_analysis, start_stub_server  # noqa: E402
+
+
+def run_with_client(url, work, **options):
+    """Ejecuta work(client) en un event loop nuevo y cierra el cliente"""
+    async def main():
+        client = OllamaClient(base_url=url, **options)
+        try:
+            return await work(client)
+        finally:
+            await client.aclose()
+    return asyncio.run(main())
+
+
+class StubServerTestCase(unittest.TestCase):
+    server_options = {}
+
+    def setUp(self):
+        self.server = start_stub_server(**self.server_options)
+        # Sin esperas entre reintentos
+        patcher = mock.patch.object(ollama_client, "RETRY_BACKOFF", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class JSONStreamScannerTest(unittest.TestCase):
+    def feed_all(self, chunks):
+        scanner = JSONStreamScanner()
+        for chunk in chunks:
+            complete = scanner.feed(chunk)
+            if complete is not None:
+                return complete
+        return None
+
+    def test_skips_think_block_with_braces(self):
+        chunks = ["<thi", 'nk>Quizá {"nombre": "otro"}', "...</thi", 'nk>\n{"nombre": "Ana", ', '"skills": ["{x}"]}', " resto"]
+        self.assertEqual(json.loads(self.feed_all(chunks)), {"nombre": "Ana", "skills": ["{x}"]})
+
+    def test_without_think_block(self):
+        self.assertEqual(json.loads(self.feed_all(['Respuesta: {"a": {"b": "}"}', "} fin"])), {"a": {"b": "}"}})
+
+    def test_incomplete_think_block(self):
+        self.assertIsNone(self.feed_all(["<think>", '{"a": 1}', " sin cerrar"]))
+
+
+class GenerateJSONTest(StubServerTestCase):
+    server_options = {"token_delay": 0.01}
+
+    def test_stops_when_json_is_complete(self):
+        data, raw, stats = run_with_client(self.server.url, lambda client: client.generate_json("CV de prueba"))
+        self.assertEqual(data, fake_analysis("CV de prueba"))
+        self.assertTrue(stats["early_stop"])
+        # Se cortó antes del texto que el servidor envía después del JSON
+        self.assertNotIn("Fin del análisis", raw)
+        # Sin el último fragmento los tokens del prompt son una estimación
+        self.assertEqual(stats["prompt_tokens_source"], "estimate")
+        self.assertGreater(stats["prompt_tokens"], 0)
+
+    def test_skips_think_block(self):
+        data, raw, _ = run_with_client(self.server.url, lambda client: client.generate_json("CV"))
+        self.assertTrue(raw.startswith("<think>"))
+        self.assertEqual(data["nombre"], fake_analysis("CV")["nombre"])
+
+    def test_analyze_cv_normalizes_fields(self):
+        result = run_with_client(self.server.url, lambda client: client.analyze_cv("Texto del CV"))
+        self.assertNotIn("error", result)
+        self.assertEqual(result["skills"], "Python, Docker, SQL")
+        self.assertIsInstance(result["match"], float)
+
+
+class RetryTest(StubServerTestCase):
+    server_options = {"fail_every": 1}
+
+    def test_retries_are_bounded(self):
+        result = run_with_client(self.server.url, lambda client: client.analyze_cv("CV"), max_retries=2)
+        self.assertIn("error", result)
+        self.assertEqual(self.server.requests, 3)
+
+    def test_error_after_last_retry(self):
+        result = run_with_client(self.server.url, lambda client: client.analyze_cv("CV"), max_retries=0)
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(set(result), {"error", "raw"})
+        self.assertTrue(result["error"].startswith("Ollama no devolvió un JSON válido"))
+
+
+class InvalidResponseTest(StubServerTestCase):
+    server_options = {"respond": lambda prompt: "sin JSON"}
+
+    def test_error_keeps_raw_response(self):
+        result = run_with_client(self.server.url, lambda client: client.analyze_cv("CV"), max_retries=1)
+        self.assertEqual(self.server.requests, 2)
+        self.assertIn("error", result)
+        self.assertIn("sin JSON", result["raw"])
+
+
+class DefaultClientTest(StubServerTestCase):
+    def test_each_event_loop_gets_its_own_client(self):
+        clients = []
+
+        async def main():
+            clients.append(ollama_client.default_client())
+            self.assertIs(ollama_client.default_client(), clients[-1])
+            result = await ollama_client.analyze_cv_async("CV")
+            await clients[-1].aclose()
+            return result
+
+        with mock.patch.object(ollama_client, "OllamaClient", lambda: OllamaClient(base_url=self.server.url)):
+            results = [asyncio.run(main()) for _ in range(2)]
+        self.assertTrue(all("error" not in result for result in results))
+        self.assertIsNot(clients[0], clients[1])
+
+
+class ConcurrencyTest(StubServerTestCase):
+    server_options = {"latency": 0.1}
+
+    def test_semaphore_caps_requests_in_flight(self):
+        async def work(client):
+            return await asyncio.gather(*(client.analyze_cv(f"CV {i}") for i in range(6)))
+
+        results = run_with_client(self.server.url, work, concurrency=2)
+        self.assertTrue(all("error" not in result for result in results))
+        self.assertEqual(self.server.requests, 6)
+        self.assertEqual(self.server.max_in_flight, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
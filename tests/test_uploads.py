@@ -0,0 +1,122 @@
+"""Pruebas de las subidas por streaming (uploads.py) con un endpoint mínimo.
+
+    python -m unittest discover tests
+"""
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uploads  # noqa: E402
+from uploads import UploadError, save_pdf, save_uploads  # noqa: E402
+
+PDF = b"%PDF-1.4\n" + b"x" * 1000
+
+
+def make_app(folder):
+    app = FastAPI()
+
+    @app.post("/one")
+    async def one(request: Request):
+        try:
+            return await save_pdf(request, folder)
+        except UploadError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    @app.post("/many")
+    async def many(request: Request):
+        try:
+            return await save_uploads(request, folder)
+        except UploadError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    return app
+
+
+def zip_with(**files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+class UploadTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.folder = directory.name
+        self.client = TestClient(make_app(self.folder))
+        patcher = mock.patch.object(uploads, "MAX_PDF_BYTES", 4096)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def files(self):
+        return sorted(os.listdir(self.folder))
+
+    def test_single_pdf(self):
+        response = self.client.post("/one", files={"file": ("cv.pdf", PDF)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["size"], len(PDF))
+        self.assertEqual(self.files(), ["cv.pdf"])
+
+    def test_oversized_pdf_stops_the_transfer(self):
+        # Cuerpo por bloques y sin Content-Length: el límite se aplica al leerlo
+        boundary = "limite"
+        head = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="cv.pdf"\r\n'
+                "Content-Type: application/pdf\r\n\r\n").encode() + PDF
+        chunks = [head] + [b"x" * 1024] * 64
+        received = []
+        sent = []
+
+        async def receive():
+            received.append(1)
+            body = chunks[len(received) - 1]
+            return {"type": "http.request", "body": body, "more_body": len(received) < len(chunks)}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+                 "scheme": "http", "path": "/one", "raw_path": b"/one", "query_string": b"", "root_path": "",
+                 "headers": [(b"content-type", f"multipart/form-data; boundary={boundary}".encode())],
+                 "client": ("test", 1), "server": ("test", 80)}
+        asyncio.run(make_app(self.folder)(scope, receive, send))
+        self.assertEqual(sent[0]["status"], 413)
+        self.assertLess(len(received), 10)
+        self.assertEqual(self.files(), [])
+
+    def test_content_length_is_checked_before_reading(self):
+        with mock.patch.object(uploads, "MAX_BATCH_BYTES", 2048):
+            response = self.client.post("/many", files=[("files", ("a.pdf", PDF)), ("files", ("b.pdf", PDF))])
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(self.files(), [])
+
+    def test_batch_results_per_file(self):
+        open(os.path.join(self.folder, "existe.pdf"), "wb").close()
+        files = [
+            ("files", ("a.pdf", PDF)),
+            ("files", ("grande.pdf", PDF * 5)),
+            ("files", ("existe.pdf", PDF)),
+            ("files", ("texto.pdf", b"hola")),
+            ("files", ("lote.zip", zip_with(**{"b.pdf": PDF, "c.txt": b"c"}))),
+        ]
+        response = self.client.post("/many", files=files)
+        self.assertEqual(response.status_code, 200)
+        status = {result["filename"]: result["status"] for result in response.json()}
+        self.assertEqual(status, {"a.pdf": "saved", "grande.pdf": "rejected", "existe.pdf": "exists",
+                                  "texto.pdf": "rejected", "b.pdf": "saved", "c.txt": "rejected"})
+        self.assertEqual(self.files(), ["a.pdf", "b.pdf", "existe.pdf"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+
+from cache import BlobCache
+
+# Cambiar al modificar la extracción o la limpieza del texto (utils.repair_text)
+EXTRACT_VERSION = "1"
+
+TEXT_CACHE_ENABLED = os.environ.get("CV_TEXT_CACHE", "1") != "0"
+TEXT_CACHE_PATH = os.environ.get("CV_TEXT_CACHE_PATH", "text_cache.db")
+TEXT_CACHE_MAX_MB = int(os.environ.get("CV_TEXT_CACHE_MAX_MB", "512"))
+
+text_cache = BlobCache(TEXT_CACHE_PATH, TEXT_CACHE_MAX_MB * 1024 * 1024)
+
+
+def text_cache_key(file_hash):
+    return f"{EXTRACT_VERSION}:{file_hash}"
+
+
+def covers(entry, max_pages=0, max_bytes=0):
+    """Si la entrada guardada basta para los límites pedidos (0 = sin límite).
+
+    Con límites solo se guardan las páginas leídas, así que una entrada parcial
+    sirve para límites iguales o menores pero no para leer el documento entero.
+    """
+    read = len(entry["pages"])
+    if read >= entry["page_count"]:
+        return True
+    if max_pages and read >= max_pages:
+        return True
+    return bool(max_bytes) and sum(len(page.encode("utf-8")) for page in entry["pages"]) >= max_bytes
+
+
+def get_pages(file_hash, max_pages=0, max_bytes=0):
+    """Texto por página guardado para el PDF, o None si no está o no alcanza"""
+    entry = text_cache.get_json(text_cache_key(file_hash))
+    if entry is None or not covers(entry, max_pages, max_bytes):
+        return None
+    pages = entry["pages"]
+    return pages[:max_pages] if max_pages else pages
+
+
+def set_pages(file_hash, pages, page_count, layout=None, metadata=None):
+    """Guarda el texto por página (ya reparado) con el tamaño y la rotación de
+    cada página y los metadatos del documento"""
+    text_cache.set_json(text_cache_key(file_hash), {
+        "pages": pages,
+        "page_count": page_count,
+        "layout": layout or [],
+        "metadata": metadata or {},
+    })
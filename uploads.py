@@ -0,0 +1,390 @@
+import os
+import tempfile
+import zipfile
+
+from starlette.concurrency import run_in_threadpool
+
+try:
+    from python_multipart.exceptions import FormParserError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.exceptions import FormParserError
+    from multipart.multipart import MultipartParser, parse_options_header
+
+CVS_FOLDER = "cvs"
+UPLOAD_CHUNK = 1024 * 1024
+MAX_PDF_BYTES = int(os.environ.get("CV_MAX_UPLOAD_MB", "25")) * 1024 * 1024
+MAX_ZIP_BYTES = int(os.environ.get("CV_MAX_ZIP_MB", "200")) * 1024 * 1024
+MAX_ZIP_FILES = int(os.environ.get("CV_MAX_ZIP_FILES", "500"))
+# Cuerpo completo de una subida múltiple (todos los PDFs y zips juntos)
+MAX_BATCH_BYTES = int(os.environ.get("CV_MAX_BATCH_MB", "500")) * 1024 * 1024
+# Margen para las cabeceras y separadores del formulario multipart
+MULTIPART_OVERHEAD = 64 * 1024
+
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+
+
+class UploadError(Exception):
+    """Archivo rechazado; status_code es el código HTTP equivalente"""
+
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def pdf_name(filename):
+    """Nombre seguro dentro de cvs/ (sin rutas) con extensión .pdf en minúsculas"""
+    name = os.path.basename((filename or "").replace("\\", "/")).strip()
+    stem, ext = os.path.splitext(name)
+    if ext.lower() != ".pdf" or not stem or stem.startswith("."):
+        raise UploadError(400, f"{name or filename}: solo se permiten archivos PDF")
+    return stem + ".pdf"
+
+
+def _new_part(folder):
+    # En la misma carpeta que el destino para que el renombrado sea atómico
+    fd, path = tempfile.mkstemp(prefix=".upload-", suffix=".part", dir=folder)
+    return os.fdopen(fd, "wb"), path
+
+
+def _publish(part_path, folder, name):
+    """Mueve el temporal a cvs/<name> sin sobrescribir; devuelve la ruta final"""
+    final_path = os.path.join(folder, name)
+    try:
+        # link() falla si el destino existe: nunca se pisa un CV ya subido
+        os.link(part_path, final_path)
+    except FileExistsError:
+        raise UploadError(409, f"{name}: el archivo ya existe")
+    except OSError:
+        # Sistemas de ficheros sin enlaces duros
+        if os.path.exists(final_path):
+            raise UploadError(409, f"{name}: el archivo ya existe")
+        os.rename(part_path, final_path)
+        return final_path
+    os.remove(part_path)
+    return final_path
+
+
+def _discard(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _mb(max_bytes):
+    return f"{max_bytes / 1024 / 1024:g} MB"
+
+
+class ReceivedFile:
+    """Archivo de un formulario multipart, copiado a un temporal de cvs/ a medida
+    que llega. error es el UploadError que lo rechazó (sus datos no se escriben)."""
+
+    def __init__(self, filename, max_bytes=0):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.path = None
+        self.size = 0
+        self.head = b""
+        self.error = None
+        self._file = None
+        self._pending = bytearray()
+
+    async def open(self, folder):
+        self._file, self.path = await run_in_threadpool(_new_part, folder)
+
+    async def write(self, data):
+        if self.error is not None:
+            return
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            self.reject(UploadError(413, f"{self.filename}: supera el máximo de {_mb(self.max_bytes)}"))
+            return
+        if len(self.head) < 8:
+            self.head += data[:8 - len(self.head)]
+        self._pending += data
+        if len(self._pending) >= UPLOAD_CHUNK:
+            await self._flush()
+
+    async def _flush(self):
+        # Las escrituras van a un hilo para no bloquear el event loop
+        chunk = bytes(self._pending)
+        self._pending.clear()
+        await run_in_threadpool(self._file.write, chunk)
+
+    async def finish(self):
+        if self.error is not None:
+            return
+        await self._flush()
+        await run_in_threadpool(self._file.close)
+        self._file = None
+
+    def reject(self, error):
+        self.error = error
+        self.discard()
+
+    def discard(self):
+        self._pending.clear()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.path:
+            _discard(self.path)
+            self.path = None
+
+
+class _MultipartReader:
+    """Convierte los callbacks de MultipartParser en eventos ("headers", {cabecera:
+    valor}), ("data", bytes) y ("end", None) por cada bloque recibido"""
+
+    def __init__(self, boundary):
+        self.complete = False
+        self._events = []
+        self._headers = {}
+        self._field = bytearray()
+        self._value = bytearray()
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": self._headers.clear,
+            "on_header_field": lambda data, start, end: self._field.extend(data[start:end]),
+            "on_header_value": lambda data, start, end: self._value.extend(data[start:end]),
+            "on_header_end": self._header_end,
+            "on_headers_finished": lambda: self._events.append(("headers", dict(self._headers))),
+            "on_part_data": lambda data, start, end: self._events.append(("data", bytes(data[start:end]))),
+            "on_part_end": lambda: self._events.append(("end", None)),
+            "on_end": self._end,
+        })
+
+    def _header_end(self):
+        self._headers[bytes(self._field).lower()] = bytes(self._value)
+        self._field.clear()
+        self._value.clear()
+
+    def _end(self):
+        self.complete = True
+
+    def feed(self, chunk):
+        self._parser.write(chunk)
+        events, self._events = self._events, []
+        return events
+
+
+async def _begin_file(headers, field, limit, folder):
+    """ReceivedFile para la parte si es un archivo del campo field, si no None"""
+    _, options = parse_options_header(headers.get(b"content-disposition", b""))
+    filename = options.get(b"filename")
+    if options.get(b"name") != field.encode() or filename is None:
+        return None
+    received = ReceivedFile(filename.decode("utf-8", "replace"))
+    try:
+        received.max_bytes = limit(received.filename)
+        await received.open(folder)
+    except UploadError as e:
+        received.reject(e)
+    return received
+
+
+def _discard_all(received):
+    for item in received:
+        item.discard()
+
+
+async def receive_files(request, field, limit, max_total, folder=CVS_FOLDER, stop_on_error=False):
+    """Lee el formulario multipart de request a medida que llega y copia cada
+    archivo del campo field a un temporal de folder, por bloques.
+
+    No usa el UploadFile de Starlette, que recibe la petición entera (en memoria
+    o en un temporal) antes de llamar al endpoint: aquí los límites cortan la
+    transferencia. limit(filename) devuelve el tamaño máximo del archivo o lanza
+    UploadError; un archivo que lo supera se descarta y el resto de sus bytes no
+    se escribe (con stop_on_error se deja de leer y se lanza su error). Si la
+    petición supera max_total, por Content-Length o al leerla, se lanza
+    UploadError(413) sin leer más. Devuelve [ReceivedFile] en el orden del formulario.
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise UploadError(400, "Se esperaba un formulario multipart/form-data")
+    too_large = UploadError(413, f"La petición supera el máximo de {_mb(max_total)}")
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > max_total:
+        raise too_large
+
+    os.makedirs(folder, exist_ok=True)
+    reader = _MultipartReader(boundary)
+    received = []
+    current = None
+    total = 0
+    try:
+        async for chunk in request.stream():
+            total += len(chunk)
+            if total > max_total:
+                raise too_large
+            for event, value in reader.feed(chunk):
+                if event == "headers":
+                    current = await _begin_file(value, field, limit, folder)
+                    if current is not None:
+                        received.append(current)
+                elif current is None:
+                    continue
+                elif event == "data":
+                    await current.write(value)
+                else:
+                    await current.finish()
+                    current = None
+                if stop_on_error and received and received[-1].error is not None:
+                    raise received[-1].error
+        if not reader.complete:
+            raise UploadError(400, "El formulario llegó incompleto")
+    except FormParserError as e:
+        _discard_all(received)
+        raise UploadError(400, f"Formulario multipart no válido: {e}")
+    except BaseException:
+        _discard_all(received)
+        raise
+    return received
+
+
+def _pdf_limit(filename, folder):
+    name = pdf_name(filename)
+    # Antes de recibir el contenido: nunca se pisa un CV ya subido
+    if os.path.exists(os.path.join(folder, name)):
+        raise UploadError(409, f"{name}: el archivo ya existe")
+    return MAX_PDF_BYTES
+
+
+def _upload_limit(filename, folder):
+    if filename.lower().endswith(".zip"):
+        return MAX_ZIP_BYTES
+    return _pdf_limit(filename, folder)
+
+
+async def _publish_pdf(received, folder):
+    """Mueve a cvs/ un PDF ya recibido; devuelve {"filename", "path", "size"} o lanza UploadError"""
+    if received.error is not None:
+        raise received.error
+    name = pdf_name(received.filename)
+    try:
+        if not received.head.startswith(PDF_MAGIC):
+            raise UploadError(400, f"{name}: el contenido no es un PDF")
+        path = await run_in_threadpool(_publish, received.path, folder, name)
+    except BaseException:
+        received.discard()
+        raise
+    received.path = None
+    return {"filename": name, "path": path, "size": received.size}
+
+
+async def save_pdf(request, folder=CVS_FOLDER):
+    """Guarda en cvs/ el PDF del campo file de la petición; devuelve
+    {"filename", "path", "size"} o lanza UploadError"""
+    received = await receive_files(request, "file", lambda filename: _pdf_limit(filename, folder),
+                                   MAX_PDF_BYTES + MULTIPART_OVERHEAD, folder, stop_on_error=True)
+    if len(received) != 1:
+        _discard_all(received)
+        raise UploadError(400, "Se esperaba un archivo PDF en el campo file")
+    return await _publish_pdf(received[0], folder)
+
+
+def _extract_zip(zip_path, folder, max_bytes):
+    """Extrae los PDFs de un zip a cvs/ (en un hilo). Devuelve un resultado por entrada."""
+    results = []
+    with zipfile.ZipFile(zip_path) as archive:
+        entries = [e for e in archive.infolist()
+                   if not e.is_dir() and not e.filename.startswith("__MACOSX/")]
+        if len(entries) > MAX_ZIP_FILES:
+            raise UploadError(413, f"El zip tiene {len(entries)} archivos (máximo {MAX_ZIP_FILES})")
+        for entry in entries:
+            try:
+                name = pdf_name(entry.filename)
+                if entry.file_size > max_bytes:
+                    raise UploadError(413, f"{name}: supera el máximo de {_mb(max_bytes)}")
+                if os.path.exists(os.path.join(folder, name)):
+                    raise UploadError(409, f"{name}: el archivo ya existe")
+                f, part_path = _new_part(folder)
+                try:
+                    size = 0
+                    with f, archive.open(entry) as source:
+                        head = source.read(len(PDF_MAGIC))
+                        if head != PDF_MAGIC:
+                            raise UploadError(400, f"{name}: el contenido no es un PDF")
+                        f.write(head)
+                        size = len(head)
+                        # Se cuenta lo leído de verdad: file_size del zip puede mentir
+                        while True:
+                            chunk = source.read(UPLOAD_CHUNK)
+                            if not chunk:
+                                break
+                            size += len(chunk)
+                            if size > max_bytes:
+                                raise UploadError(413, f"{name}: supera el máximo de {_mb(max_bytes)}")
+                            f.write(chunk)
+                    path = _publish(part_path, folder, name)
+                except BaseException:
+                    _discard(part_path)
+                    raise
+                results.append({"filename": name, "status": "saved", "path": path, "size": size})
+            except UploadError as e:
+                results.append(_rejected(entry.filename, e))
+            except (zipfile.BadZipFile, OSError) as e:
+                results.append({"filename": entry.filename, "status": "rejected", "error": str(e)})
+    return results
+
+
+def _rejected(filename, error):
+    status = "exists" if error.status_code == 409 else "rejected"
+    return {"filename": filename, "status": status, "error": error.detail}
+
+
+async def save_uploads(request, folder=CVS_FOLDER):
+    """Guarda los PDFs o zips con PDFs del campo files de la petición; devuelve
+    un resultado por PDF.
+
+    Los errores de un archivo no afectan a los demás: cada resultado tiene
+    status "saved", "exists" o "rejected" (con el motivo en "error"). Solo la
+    petición entera por encima de CV_MAX_BATCH_MB lanza UploadError.
+    """
+    received = await receive_files(request, "files", lambda filename: _upload_limit(filename, folder),
+                                   MAX_BATCH_BYTES, folder)
+    if not received:
+        raise UploadError(400, "No se recibió ningún archivo en el campo files")
+    results = []
+    try:
+        for upload in received:
+            filename = upload.filename
+            if not filename.lower().endswith(".zip"):
+                try:
+                    saved = await _publish_pdf(upload, folder)
+                    results.append(dict(saved, status="saved"))
+                except UploadError as e:
+                    results.append(_rejected(filename, e))
+                continue
+
+            try:
+                if upload.error is not None:
+                    raise upload.error
+                if not upload.head.startswith(ZIP_MAGIC):
+                    raise UploadError(400, f"{filename}: el contenido no es un zip")
+                results.extend(await run_in_threadpool(_extract_zip, upload.path, folder, MAX_PDF_BYTES))
+            except UploadError as e:
+                results.append(_rejected(filename, e))
+            except zipfile.BadZipFile as e:
+                results.append({"filename": filename, "status": "rejected", "error": f"{filename}: {e}"})
+            finally:
+                upload.discard()
+    finally:
+        _discard_all(received)
+    return results
+
+
+def clean_partial_uploads(folder=CVS_FOLDER):
+    """Borra temporales de subidas interrumpidas (p. ej. si se cayó el servidor)"""
+    if not os.path.isdir(folder):
+        return 0
+    removed = 0
+    for name in os.listdir(folder):
+        if name.startswith(".upload-") and name.endswith(".part"):
+            _discard(os.path.join(folder, name))
+            removed += 1
+    return removed
@@ -1,30 +1,212 @@
-import pymupdf
-import re
-
-def extract_text_from_pdf(file_path):
-    """Extrae texto de PDF con manejo robusto de caracteres"""
-    text = ""
-    try:
-        # Usar pymupdf directamente en lugar de fitz
-        doc = pymupdf.open(file_path)
-        for page in doc:
-            text += page.get_text("text", sort=True)
-    except Exception as e:
-        print(f"⚠️ Error abriendo PDF {file_path}: {str(e)}")
-        return ""
-    
-    # Limpiar caracteres no válidos y corregir codificación
-    text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', text)
-    
-    # Correcciones específicas para caracteres mal codificados
-    replacements = {
-        "Ã¡": "á", "Ã©": "é", "Ã­": "í", "Ã³": "ó", "Ãº": "ú",
-        "Ã±": "ñ", "Ã'": "Ñ", "Ã€": "À", "Ã‰": "É", "Ã"": "Ó",
-        "Ãš": "Ú", "Ã±": "ñ", "Ãˆ": "È", "Ã¼": "ü", "Ã§": "ç",
-        "Ã¢": "â", "Ãª": "ê", "Ã®": "î", "Ã´": "ô", "Ã»": "û"
-    }
-    
-    for wrong, correct in replacements.items():
-        text = text.replace(wrong, correct)
-    
-    return text
\ No newline at end of file
+import hashlib
+import os
+import pymupdf
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from metrics import observe
+from text_cache import TEXT_CACHE_ENABLED, get_pages, set_pages, text_cache
+
+# Procesos para la extracción en lote y tiempo máximo por archivo (segundos)
+EXTRACT_WORKERS = int(os.environ.get("CV_EXTRACT_WORKERS", os.cpu_count() or 1))
+EXTRACT_TIMEOUT = float(os.environ.get("CV_EXTRACT_TIMEOUT", "120"))
+
+# Límites de extracción (0 = sin límite): páginas leídas y bytes UTF-8 del texto
+EXTRACT_MAX_PAGES = int(os.environ.get("CV_EXTRACT_MAX_PAGES", "0"))
+EXTRACT_MAX_BYTES = int(os.environ.get("CV_EXTRACT_MAX_BYTES", "0"))
+
+# Caracteres que suelen aparecer mal decodificados: UTF-8 leído como cp1252
+# (p. ej. "Ã¡" en lugar de "á") o como latin-1 (la variante con controles C1)
+_MOJIBAKE_CHARS = "áéíóúÁÉÍÓÚñÑüÜçÇàèìòùÀÈÌÒÙâêîôûÂÊÎÔÛäëïöÄËÏÖ¿¡ºª°"
+MOJIBAKE = {}
+for _char in _MOJIBAKE_CHARS:
+    _raw = _char.encode("utf-8")
+    MOJIBAKE[_raw.decode("latin-1")] = _char
+    try:
+        MOJIBAKE[_raw.decode("cp1252")] = _char
+    except UnicodeDecodeError:
+        pass  # 0x81, 0x8d... no existen en cp1252
+_MOJIBAKE_RE = re.compile(r"[ÃÂ][^\x00-\x7fÃÂ]")
+_CONTROL_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]')
+
+def _repair_mojibake(text):
+    # Si todo el texto es UTF-8 mal decodificado, la vuelta completa lo arregla
+    # en C; el texto correcto con acentos no es UTF-8 válido al recodificarlo
+    for encoding in ("cp1252", "latin-1"):
+        try:
+            return text.encode(encoding).decode("utf-8")
+        except UnicodeError:
+            pass
+    # Texto mezclado: una pasada para encontrar las secuencias presentes y solo
+    # un replace por cada una que esté en la tabla
+    for sequence in set(_MOJIBAKE_RE.findall(text)):
+        if sequence in MOJIBAKE:
+            text = text.replace(sequence, MOJIBAKE[sequence])
+    return text
+
+def repair_text(text):
+    """Corrige la codificación y elimina caracteres de control"""
+    if "Ã" in text or "Â" in text:
+        text = _repair_mojibake(text)
+    return _CONTROL_RE.sub("", text)
+
+def extract_text_from_pdf(file_path, max_pages=None, max_bytes=None, file_hash=None):
+    """Extrae texto de PDF con manejo robusto de caracteres.
+
+    max_pages y max_bytes (por defecto CV_EXTRACT_MAX_PAGES y
+    CV_EXTRACT_MAX_BYTES; 0 = sin límite) cortan los documentos muy largos:
+    se dejan de leer páginas al alcanzar el límite.
+
+    El texto de cada página se guarda en la caché de texto (text_cache.py) por
+    el hash del contenido; si ya está no se abre el PDF. file_hash evita volver
+    a calcularlo cuando ya se conoce.
+    """
+    max_pages = EXTRACT_MAX_PAGES if max_pages is None else max_pages
+    max_bytes = EXTRACT_MAX_BYTES if max_bytes is None else max_bytes
+    use_cache = TEXT_CACHE_ENABLED
+    if use_cache:
+        try:
+            file_hash = file_hash or file_sha256(file_path)
+        except OSError as e:
+            print(f"⚠️ Error abriendo PDF {file_path}: {str(e)}")
+            return ""
+        try:
+            pages = get_pages(file_hash, max_pages, max_bytes)
+        except Exception as e:
+            print(f"⚠️ Error leyendo la caché de texto: {e}")
+            pages, use_cache = None, False
+        if pages is not None:
+            return _join_pages(pages, max_bytes)
+
+    pages = []
+    layout = []
+    size = 0
+    try:
+        # Usar pymupdf directamente en lugar de fitz
+        with pymupdf.open(file_path) as doc:
+            page_count = doc.page_count
+            metadata = {key: value for key, value in (doc.metadata or {}).items() if value}
+            for page_number in range(min(page_count, max_pages) if max_pages else page_count):
+                page = doc.load_page(page_number)
+                # Se repara por página: un PDF puede mezclar páginas bien y mal codificadas
+                page_text = repair_text(page.get_text("text", sort=True))
+                pages.append(page_text)
+                layout.append({"width": round(page.rect.width, 1), "height": round(page.rect.height, 1),
+                               "rotation": page.rotation})
+                if max_bytes:
+                    size += len(page_text.encode("utf-8"))
+                    if size >= max_bytes:
+                        break
+    except Exception as e:
+        print(f"⚠️ Error abriendo PDF {file_path}: {str(e)}")
+        return ""
+
+    if use_cache:
+        try:
+            set_pages(file_hash, pages, page_count, layout, metadata)
+        except Exception as e:
+            print(f"⚠️ Error guardando en la caché de texto: {e}")
+    return _join_pages(pages, max_bytes)
+
+def _join_pages(pages, max_bytes):
+    text = "".join(pages)
+    if max_bytes:
+        encoded = text.encode("utf-8")
+        if len(encoded) > max_bytes:
+            text = encoded[:max_bytes].decode("utf-8", errors="ignore")
+    return text
+
+def _extract_timed(file_path, file_hash=None):
+    """Se ejecuta en el pool: devuelve también si el texto salió de la caché
+    (None si no se consultó) para contarlo en el proceso principal"""
+    hits, misses = text_cache.hits, text_cache.misses
+    start = time.perf_counter()
+    text = extract_text_from_pdf(file_path, file_hash=file_hash)
+    seconds = time.perf_counter() - start
+    cached = True if text_cache.hits > hits else False if text_cache.misses > misses else None
+    return text, seconds, cached
+
+def extract_texts_parallel(file_paths, workers=None, timeout=None, on_start=None, file_hashes=None):
+    """Extrae el texto de varios PDFs repartiéndolos en un pool de procesos.
+
+    Genera tuplas (file_path, text, error, seconds) a medida que cada archivo
+    termina, sin esperar al más lento. Si un archivo supera el timeout se
+    reporta como error y se reinicia el pool para liberar el proceso bloqueado.
+    on_start(file_path) se llama cuando un archivo entra en un proceso.
+    file_hashes ({ruta: hash}) evita volver a leer los archivos para la caché de texto.
+    """
+    workers = workers or EXTRACT_WORKERS
+    timeout = timeout or EXTRACT_TIMEOUT
+    pending = list(file_paths)
+    pending.reverse()
+    running = {}  # future -> (file_path, deadline)
+    executor = ProcessPoolExecutor(max_workers=workers)
+
+    def submit(file_path):
+        if on_start is not None:
+            on_start(file_path)
+        future = executor.submit(_extract_timed, file_path, (file_hashes or {}).get(file_path))
+        running[future] = (file_path, time.monotonic() + timeout)
+
+    try:
+        # Solo hay tantos archivos en vuelo como procesos, para que el
+        # plazo de cada uno empiece a contar cuando de verdad arranca
+        while pending and len(running) < workers:
+            submit(pending.pop())
+
+        while running:
+            next_deadline = min(deadline for _, deadline in running.values())
+            done, _ = wait(running, timeout=max(0, next_deadline - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+
+            for future in done:
+                file_path, _ = running.pop(future)
+                try:
+                    text, seconds, cached = future.result()
+                    # El tiempo y el uso de la caché se miden en el proceso hijo y se registran aquí
+                    observe("cv_extract_seconds", seconds)
+                    if cached is not None:
+                        text_cache.record(cached)
+                    yield file_path, text, None, seconds
+                except Exception as e:
+                    yield file_path, "", str(e), None
+
+            now = time.monotonic()
+            expired = [f for f, (_, deadline) in running.items() if deadline <= now and not f.done()]
+            if expired:
+                for future in expired:
+                    file_path, _ = running.pop(future)
+                    yield file_path, "", f"Tiempo de extracción agotado ({timeout:.0f}s)", timeout
+                # Un proceso colgado no se puede cancelar: se reinicia el pool
+                # y se vuelven a lanzar los archivos que seguían en curso
+                retry = [file_path for file_path, _ in running.values()]
+                running.clear()
+                _terminate_pool(executor)
+                executor = ProcessPoolExecutor(max_workers=workers)
+                for file_path in retry:
+                    submit(file_path)
+
+            while pending and len(running) < workers:
+                submit(pending.pop())
+    finally:
+        _terminate_pool(executor)
+
+def _terminate_pool(executor):
+    processes = list((getattr(executor, "_processes", None) or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+def file_sha256(file_path, chunk_size=1024 * 1024):
+    """Hash SHA-256 del contenido de un archivo, leído por bloques"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def role_fingerprint(role=None):
+    """Huella estable del rol: ignora mayúsculas y espacios sobrantes"""
+    normalized = " ".join((role or "").lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
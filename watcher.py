@@ -0,0 +1,312 @@
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import threading
+import time
+import traceback
+
+from uploads import CVS_FOLDER
+
+# CV_WATCH=1 arranca el vigilante junto con la API
+WATCH_ENABLED = os.environ.get("CV_WATCH", "0") == "1"
+# Segundos sin cambios de tamaño ni fecha antes de dar un archivo por escrito
+WATCH_DEBOUNCE = float(os.environ.get("CV_WATCH_DEBOUNCE", "2"))
+# Intervalo de sondeo cuando no hay inotify (o CV_WATCH_POLL_ONLY=1)
+WATCH_POLL = float(os.environ.get("CV_WATCH_POLL", "5"))
+WATCH_POLL_ONLY = os.environ.get("CV_WATCH_POLL_ONLY", "0") == "1"
+# Archivos ya encolados (nombre -> tamaño y fecha), para no repetirlos tras un reinicio
+WATCH_STATE_PATH = os.environ.get("CV_WATCH_STATE", "watch_state.json")
+WATCH_ROLE = os.environ.get("CV_WATCH_ROLE") or None
+
+# Eventos de inotify (linux/inotify.h)
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE \
+    | IN_DELETE_SELF | IN_MOVE_SELF
+_EVENT = struct.Struct("iIII")
+
+
+def inotify_watch(folder):
+    """Descriptor de inotify que vigila folder (solo Linux); OSError si no se puede"""
+    if not sys.platform.startswith("linux"):
+        raise OSError("inotify solo existe en Linux")
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), "inotify_init1")
+    if libc.inotify_add_watch(fd, os.fsencode(folder), WATCH_MASK) < 0:
+        error = ctypes.get_errno()
+        os.close(fd)
+        raise OSError(error, f"inotify_add_watch {folder}")
+    return fd
+
+
+def read_events(fd):
+    """[(máscara, nombre)] de los eventos disponibles en el descriptor"""
+    try:
+        data = os.read(fd, 64 * 1024)
+    except BlockingIOError:
+        return []
+    events = []
+    offset = 0
+    while offset + _EVENT.size <= len(data):
+        _, mask, _, length = _EVENT.unpack_from(data, offset)
+        offset += _EVENT.size
+        name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+        offset += length
+        events.append((mask, name))
+    return events
+
+
+def is_candidate_file(name):
+    # Los temporales de las subidas (.upload-*.part) y ocultos no cuentan
+    return name.lower().endswith(".pdf") and not name.startswith(".")
+
+
+class FolderWatcher:
+    """Vigila cvs/ y encola los PDFs nuevos o modificados.
+
+    Usa inotify si está disponible y si no sondea la carpeta cada
+    CV_WATCH_POLL segundos. Un archivo se encola cuando lleva
+    CV_WATCH_DEBOUNCE segundos sin cambiar (las copias y subidas a medias no
+    se procesan); los que estén listos a la vez van en el mismo job.
+    on_files(paths) recibe las rutas a procesar. Lo ya encolado se guarda en
+    CV_WATCH_STATE, así que al arrancar solo se encola lo que cambió mientras
+    el vigilante estaba parado.
+    """
+
+    def __init__(self, on_files, folder=CVS_FOLDER, debounce=None, poll_interval=None, state_path=None):
+        self.on_files = on_files
+        self.folder = folder
+        self.debounce = WATCH_DEBOUNCE if debounce is None else debounce
+        self.poll_interval = poll_interval or WATCH_POLL
+        self.state_path = state_path or WATCH_STATE_PATH
+        self.mode = None
+        self.enqueued = 0
+        self.last_enqueue = None
+        self._seen = self._load_state()
+        self._pending = {}  # nombre -> (tamaño, fecha, instante del último cambio)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                return {name: tuple(value) for name, value in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Estado del vigilante ilegible ({e}), se revisará toda la carpeta")
+            return {}
+
+    def _save_state(self):
+        folder = os.path.dirname(self.state_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._seen, f, ensure_ascii=False)
+        os.replace(temp_path, self.state_path)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="cv-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def run(self):
+        os.makedirs(self.folder, exist_ok=True)
+        fd = None
+        if not WATCH_POLL_ONLY:
+            try:
+                fd = inotify_watch(self.folder)
+            except (OSError, AttributeError) as e:
+                print(f"⚠️ inotify no disponible ({e}), se sondea la carpeta cada {self.poll_interval:g} s")
+        self.mode = "inotify" if fd is not None else "polling"
+        print(f"👀 Vigilando {self.folder}/ ({self.mode})")
+        try:
+            self.scan()
+            next_poll = time.monotonic() + self.poll_interval
+            while not self._stop.is_set():
+                timeout = self._next_timeout(next_poll if fd is None else None)
+                if fd is not None:
+                    ready, _, _ = select.select([fd], [], [], timeout)
+                    if ready and self._handle_events(read_events(fd)):
+                        # Carpeta borrada o movida: seguir sondeando
+                        os.close(fd)
+                        fd = None
+                        self.mode = "polling"
+                        next_poll = time.monotonic()
+                else:
+                    self._stop.wait(timeout)
+                    if time.monotonic() >= next_poll:
+                        os.makedirs(self.folder, exist_ok=True)
+                        self.scan()
+                        next_poll = time.monotonic() + self.poll_interval
+                self.flush()
+        except Exception:
+            traceback.print_exc()
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    def _next_timeout(self, next_poll):
+        """Espera hasta el próximo archivo que pueda estar listo o el próximo sondeo"""
+        now = time.monotonic()
+        with self._lock:
+            deadlines = [changed + self.debounce for _, _, changed in self._pending.values()]
+        if next_poll is not None:
+            deadlines.append(next_poll)
+        if not deadlines:
+            return 1.0  # Para atender stop() aunque no pase nada
+        return min(max(0.05, min(deadlines) - now), 1.0)
+
+    def _handle_events(self, events):
+        lost = False
+        for mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                self.scan()  # Se perdieron eventos: revisar toda la carpeta
+            elif mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                lost = True
+            elif name and is_candidate_file(name):
+                if mask & (IN_DELETE | IN_MOVED_FROM):
+                    self._forget(name)
+                else:
+                    self._touch(name)
+        return lost
+
+    def _stat(self, name):
+        try:
+            st = os.stat(os.path.join(self.folder, name))
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def _touch(self, name):
+        """Marca el archivo como pendiente si cambió respecto a lo ya encolado"""
+        current = self._stat(name)
+        with self._lock:
+            if current is None:
+                self._pending.pop(name, None)
+                return
+            pending = self._pending.get(name)
+            if pending is not None and pending[:2] == current:
+                return
+            if pending is None and self._seen.get(name) == current:
+                return
+            self._pending[name] = (*current, time.monotonic())
+
+    def _forget(self, name):
+        with self._lock:
+            self._pending.pop(name, None)
+            if self._seen.pop(name, None) is not None:
+                self._save_state()
+
+    def scan(self):
+        """Compara la carpeta con el estado guardado (arranque, sondeo o eventos perdidos)"""
+        names = {name for name in os.listdir(self.folder) if is_candidate_file(name)}
+        for name in names:
+            self._touch(name)
+        for name in set(self._seen) - names:
+            self._forget(name)
+
+    def flush(self):
+        """Encola los pendientes que llevan debounce segundos sin cambiar"""
+        now = time.monotonic()
+        ready = []
+        with self._lock:
+            for name, (size, mtime, changed) in list(self._pending.items()):
+                if now - changed < self.debounce:
+                    continue
+                current = self._stat(name)
+                if current is None:
+                    del self._pending[name]
+                elif current != (size, mtime):
+                    self._pending[name] = (*current, now)  # Se sigue escribiendo
+                else:
+                    del self._pending[name]
+                    if size > 0:
+                        ready.append((name, current))
+        if not ready:
+            return []
+        paths = [os.path.join(self.folder, name) for name, _ in ready]
+        try:
+            self.on_files(paths)
+        except Exception as e:
+            print(f"❌ No se pudieron encolar los CVs nuevos: {e}")
+            with self._lock:
+                for name, current in ready:
+                    self._pending.setdefault(name, (*current, time.monotonic()))
+            return []
+        with self._lock:
+            self._seen.update(ready)
+            self._save_state()
+            self.enqueued += len(paths)
+            self.last_enqueue = time.time()
+        print(f"📥 {len(paths)} CV(s) nuevos o modificados encolados")
+        return paths
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def claim(self, paths):
+        """Marca como ya encolados archivos que se procesan por otra vía
+        (POST /process-cvs, subidas con process=true). Sin el vigilante en
+        marcha (CV_WATCH=0) no hace nada: nadie leería el estado"""
+        if not self.running:
+            return
+        with self._lock:
+            for path in paths:
+                name = os.path.basename(path)
+                current = self._stat(name)
+                self._pending.pop(name, None)
+                if current is not None:
+                    self._seen[name] = current
+            self._save_state()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "folder": self.folder,
+                "mode": self.mode,
+                "running": self.running,
+                "pending": len(self._pending),
+                "seen": len(self._seen),
+                "enqueued": self.enqueued,
+                "last_enqueue": self.last_enqueue,
+            }
+
+
+if __name__ == "__main__":
+    # python watcher.py [rol] -> vigila cvs/ y procesa lo que llegue, sin la API
+    from db import init_db
+    from jobs import job_manager
+    from uploads import clean_partial_uploads
+
+    init_db()
+    clean_partial_uploads()
+    job_manager.resume()
+    role = " ".join(sys.argv[1:]) or WATCH_ROLE
+    watcher = FolderWatcher(lambda paths: job_manager.submit(paths, role))
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass